@@ -17,7 +17,7 @@ class APIEndpoint(object):
         """ Creates an instance of the APIEndpoint class.
 
         Args:
-            api - Gophish.client - The authenticated REST client
+            api - GophishClient - The authenticated REST client
             endpoint - str - The URL path to the resource endpoint
             cls - gophish.models.Model - The Class to use when parsing results
         """
@@ -25,7 +25,7 @@ class APIEndpoint(object):
         self.endpoint = endpoint
         self._cls = cls
 
-    def get(
+    async def get(
         self,
         resource_id=None,
         resource_action=None,
@@ -52,13 +52,13 @@ class APIEndpoint(object):
             resource_cls = self._cls
 
         if resource_id:
-            endpoint = "{}/{}".format(endpoint, resource_id)
+            endpoint = "{}/{}".format(endpoint.rstrip("/"), resource_id)
 
         if resource_action:
-            endpoint = "{}/{}".format(endpoint, resource_action)
+            endpoint = "{}/{}".format(endpoint.rstrip("/"), resource_action)
 
-        response = self.api.execute("GET", endpoint)
-        if not response.ok:
+        response = await self.api.execute("GET", endpoint)
+        if response.failed:
             return Error.parse(response.json())
 
         if resource_id or single_resource:
@@ -66,21 +66,23 @@ class APIEndpoint(object):
 
         return [resource_cls.parse(resource) for resource in response.json()]
 
-    def post(self, resource):
+    async def post(self, resource):
         """ Creates a new instance of the resource.
 
         Args:
             resource - gophish.models.Model - The resource instance
 
         """
-        response = self.api.execute("POST", self.endpoint, json=(resource.as_dict()))
+        response = await self.api.execute(
+            "POST", self.endpoint, json=(resource.as_dict())
+        )
 
-        if not response.ok:
+        if response.failed:
             return Error.parse(response.json())
 
         return self._cls.parse(response.json())
 
-    def put(self, resource):
+    async def put(self, resource):
         """ Edits an existing resource
 
         Args:
@@ -90,27 +92,27 @@ class APIEndpoint(object):
         endpoint = self.endpoint
 
         if resource.id:
-            endpoint = "{}/{}".format(endpoint, resource.id)
+            endpoint = "{}/{}".format(endpoint.rstrip("/"), resource.id)
 
-        response = self.api.execute("PUT", endpoint, json=resource.as_json())
+        response = await self.api.execute("PUT", endpoint, json=resource.as_dict())
 
-        if not respose.ok:
+        if response.failed:
             return Error.parse(response.json())
 
         return self._cls.parse(response.json())
 
-    def delete(self, resource_id):
+    async def delete(self, resource_id):
         """ Deletes an existing resource
 
         Args:
             resource_id - int - The resource ID to be deleted
         """
 
-        endpoint = "{}/{}".format(self.endpoint, resource_id)
+        endpoint = "{}/{}".format(self.endpoint.rstrip("/"), resource_id)
 
-        response = self.api.execute("DELETE", endpoint)
+        response = await self.api.execute("DELETE", endpoint)
 
-        if not response.ok:
+        if response.failed:
             return Error.parse(response.json())
 
         return self._cls.parse(response.json())
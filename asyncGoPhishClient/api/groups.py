@@ -1,4 +1,4 @@
-from asyncGoPhishClient.models import Group
+from asyncGoPhishClient.models import Group, GroupSummaries
 from asyncGoPhishClient.api import APIEndpoint
 
 
@@ -6,18 +6,26 @@ class API(APIEndpoint):
     def __init__(self, api, endpoint="/api/groups/"):
         super(API, self).__init__(api, endpoint=endpoint, cls=Group)
 
-    def get(self, group_id=None):
+    async def get(self, group_id=None):
         """ Gets one or more groups """
-        return super(API, self).get(resource_id=group_id)
+        return await super(API, self).get(resource_id=group_id)
 
-    def post(self, group):
+    async def post(self, group):
         """ Creates a new group """
-        return super(API, self).post(group)
+        return await super(API, self).post(group)
 
-    def put(self, group):
+    async def put(self, group):
         """ Edits a group """
-        return super(API, self).put(group)
+        return await super(API, self).put(group)
 
-    def delete(self, group_id):
+    async def delete(self, group_id):
         """ Deletes a group by ID """
-        return super(API, self).delete(group_id)
+        return await super(API, self).delete(group_id)
+
+    async def summary(self):
+        """ Lists every group with its number of targets but not the targets """
+        return await super(API, self).get(
+            resource_action="summary",
+            resource_cls=GroupSummaries,
+            single_resource=True,
+        )
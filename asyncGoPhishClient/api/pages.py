@@ -6,22 +6,22 @@ class API(APIEndpoint):
     def __init__(self, api, endpoint="/api/pages/"):
         super(API, self).__init__(api, endpoint=endpoint, cls=Page)
 
-    def get(self, page_id=None):
+    async def get(self, page_id=None):
         """ Gets one or more pages """
 
-        return super(API, self).get(resource_id=page_id)
+        return await super(API, self).get(resource_id=page_id)
 
-    def post(self, page):
+    async def post(self, page):
         """ Creates a new page """
 
-        return super(API, self).post(page)
+        return await super(API, self).post(page)
 
-    def put(self, page):
+    async def put(self, page):
         """ Edits a page """
 
-        return super(API, self).put(put)
+        return await super(API, self).put(page)
 
-    def delete(self, page_id):
+    async def delete(self, page_id):
         """ Deletes a page by ID """
 
-        return super(API, self).delete(page_id)
+        return await super(API, self).delete(page_id)
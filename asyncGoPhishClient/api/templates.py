@@ -6,22 +6,22 @@ class API(APIEndpoint):
     def __init__(self, api, endpoint="/api/templates/"):
         super(API, self).__init__(api, endpoint=endpoint, cls=Template)
 
-    def get(self, template_id=None):
+    async def get(self, template_id=None):
         """ Gets one or more templates """
 
-        return super(API, self).get(resource_id=template_id)
+        return await super(API, self).get(resource_id=template_id)
 
-    def post(self, template):
+    async def post(self, template):
         """ Creates a new template """
 
-        return super(API, self).post(template)
+        return await super(API, self).post(template)
 
-    def put(self, template):
+    async def put(self, template):
         """ Edits a template """
 
-        return super(API, self).put(template)
+        return await super(API, self).put(template)
 
-    def delete(self, template_id):
+    async def delete(self, template_id):
         """ Deletes a template by ID """
 
-        return super(API, self).delete(template_id)
+        return await super(API, self).delete(template_id)
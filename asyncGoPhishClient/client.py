@@ -1,38 +1,156 @@
-import asyncio
+import json
+import ssl
+
 import aiohttp
 
-# from gophish.api import (campaigns, groups, pages, smtp, templates)
 from asyncGoPhishClient.api import campaigns, groups, pages, smtp, templates
 
 DEFAULT_URL = "http://localhost:3333"
 
 
+class Response(object):
+    """ Status and body of a finished request """
+
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+        self.is_json = None
+        self._parsed = None
+
+    @property
+    def ok(self):
+        return self.status < 400
+
+    def json(self):
+        """ The body parsed as JSON. Bodies that aren't JSON become an error message """
+        if self.is_json is None:
+            try:
+                self._parsed = json.loads(self.body)
+                self.is_json = True
+            except ValueError:
+                self._parsed = {
+                    "message": self.body.decode("utf-8", "replace").strip(),
+                    "success": False,
+                    "data": None,
+                }
+                self.is_json = False
+        return self._parsed
+
+    @property
+    def failed(self):
+        """ Whether the request failed or the body isn't JSON """
+        self.json()
+        return not self.ok or not self.is_json
+
+
 class GophishClient(object):
-    """ A standard HTTP REST client used by Gophish """
+    """ An asynchronous HTTP REST client used by Gophish
 
-    def __init__(self, api_key, host=DEFAULT_URL, **kwargs):
+    Every request goes through one shared aiohttp session, so connections
+    are kept alive and reused. At most limit connections are open at once,
+    further requests wait for a free one.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        host=DEFAULT_URL,
+        verify=True,
+        limit=20,
+        timeout=60,
+        keepalive_timeout=30,
+        **kwargs
+    ):
+        """ Creates a new client. Call open() or use it with async with.
+
+        Args:
+            api_key - str - The Gophish API key
+            host - str - The URL of the Gophish admin server
+            verify - bool or str - Verify TLS certificates, or a CA bundle to verify with
+            limit - int - Maximum simultaneous connections
+            timeout - int - Default seconds a request may take
+            keepalive_timeout - int - Seconds an idle connection is kept open
+            kwargs - Passed to every request
+        """
         self.api_key = api_key
         self.host = host
+        self.verify = verify
+        self.limit = limit
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
         self._client_kwargs = kwargs
-        self.campaigns = campaigns.API(self.client)
-        self.groups = groups.API(self.client)
-        self.pages = pages.API(self.client)
-        self.smtp = smtp.API(self.client)
-        self.templates = templates.API(self.client)
+        self.session = None
 
-    async def execute(self, method, path, **kwargs):
-        """ Executes a request to a given endpoint, returning the result """
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exception_type, exception_value, traceback):
+        await self.close()
+
+    async def open(self):
+        """ Creates the shared session """
+        if self.session is not None:
+            return
+
+        if self.verify is False:
+            ssl_context = False
+        elif isinstance(self.verify, str):
+            ssl_context = ssl.create_default_context(cafile=self.verify)
+        else:
+            ssl_context = None
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            keepalive_timeout=self.keepalive_timeout,
+            ssl=ssl_context,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    async def close(self):
+        """ Closes the shared session and its connections """
+        if self.session is None:
+            return
+        await self.session.close()
+        self.session = None
+
+    async def execute(self, method, path, timeout=None, **kwargs):
+        """ Executes a request to a given endpoint, returning the result
+
+        Args:
+            method - str - HTTP method
+            path - str - The URL path of the endpoint
+            timeout - int - Seconds this request may take instead of the default
+            kwargs - Passed to aiohttp, e.g. json=
+
+        Returns:
+            Response with the status and the body, read before the
+            connection goes back to the pool
+        """
+        if self.session is None:
+            await self.open()
 
         url = "{}{}".format(self.host, path)
         kwargs.update(self._client_kwargs)
-        async with aiohttp.request(
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        async with self.session.request(
             method, url, params={"api_key": self.api_key}, **kwargs
         ) as response:
-            # response = requests.request( method, url, params={"api_key": self.api_key}, **kwargs)
-            return response
+            return Response(response.status, await response.read())
 
 
 class Gophish(object):
+    """ Gophish API client. Use it with async with so the session is closed:
+
+    async with Gophish(api_key, host=host) as api:
+        groups = await api.groups.get()
+    """
+
     def __init__(self, api_key, host=DEFAULT_URL, client=GophishClient, **kwargs):
         self.client = client(api_key, host=host, **kwargs)
         self.campaigns = campaigns.API(self.client)
@@ -40,3 +158,13 @@ class Gophish(object):
         self.pages = pages.API(self.client)
         self.smtp = smtp.API(self.client)
         self.templates = templates.API(self.client)
+
+    async def __aenter__(self):
+        await self.client.open()
+        return self
+
+    async def __aexit__(self, exception_type, exception_value, traceback):
+        await self.client.close()
+
+    async def close(self):
+        await self.client.close()
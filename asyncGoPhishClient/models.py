@@ -22,7 +22,7 @@ class Model(object):
             if isinstance(val, datetime):
                 val = val.isoformat()
             # Parse custom classes
-            elif val and not isinstance(val, (int, float, str, list, dict, unicode)):
+            elif val and not isinstance(val, (int, float, str, list, dict)):
                 val = val.as_dict()
             # Parse lists of objects
             elif isinstance(val, list):
@@ -293,6 +293,53 @@ class Group(Model):
         return group
 
 
+class GroupSummaries(Model):
+    """ Represents a list of group summary objects """
+
+    _valid_properties = {"total": None, "groups": None}
+
+    def __init__(self):
+        """ Creates a new instance of the group summaries"""
+        for key, default in GroupSummaries._valid_properties.items():
+            setattr(self, key, default)
+
+    @classmethod
+    def parse(cls, json):
+        group_summaries = cls()
+        for key, val in json.items():
+            if key == "groups":
+                summaries = [GroupSummary.parse(summary) for summary in val]
+                setattr(group_summaries, key, summaries)
+            elif key in cls._valid_properties:
+                setattr(group_summaries, key, val)
+        return group_summaries
+
+
+class GroupSummary(Model):
+    """ Represents a group without its targets """
+
+    _valid_properties = {
+        "id": None,
+        "name": None,
+        "modified_date": None,
+        "num_targets": None,
+    }
+
+    def __init__(self):
+        for key, default in GroupSummary._valid_properties.items():
+            setattr(self, key, default)
+
+    @classmethod
+    def parse(cls, json):
+        summary = cls()
+        for key, val in json.items():
+            if key == "modified_date":
+                setattr(summary, key, parse_date(val))
+            elif key in cls._valid_properties:
+                setattr(summary, key, val)
+        return summary
+
+
 class SMTP(Model):
     _valid_properties = {
         "id": None,
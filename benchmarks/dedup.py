@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""
+Check that host and host:port de-duplication scales linearly.
+
+Feeds synthetic ReportHost records through the live-host-count and
+sslippycup aggregators at doubling sizes. The per-record cost should stay
+flat as the record count grows.
+
+    python -m benchmarks.dedup --start 50000 --steps 6
+"""
+
+# Standard Library
+import time
+
+# 3rd Party Libs
+import click
+from tabulate import tabulate
+
+# Lazy Lib
+from lazyLib.nessusParseLib import (
+    LiveHostAggregator,
+    ReportHost,
+    ReportItem,
+    SSLippyCupAggregator,
+)
+
+
+def synthetic_hosts(count, ports=(443, 8443)):
+    """
+    Yield count ReportHost records on a /16 with an SSL finding per port.
+    Every host is yielded twice to exercise the duplicate path.
+    """
+    for repeat in range(2):
+        for n in range(count // 2):
+            name = "10.{}.{}.{}".format((n >> 16) & 255, (n >> 8) & 255, n & 255)
+            items = [
+                ReportItem(
+                    name,
+                    str(port),
+                    "tcp",
+                    "www",
+                    "10863",
+                    "0",
+                    "SSL Certificate Information",
+                    None,
+                )
+                for port in ports
+            ]
+            yield ReportHost(name=name, properties=dict(), items=items)
+
+
+def time_aggregator(aggregator, count):
+    hosts = list(synthetic_hosts(count))
+    start = time.perf_counter()
+    for host in hosts:
+        aggregator.add_host(host)
+    aggregator.report()
+    return time.perf_counter() - start
+
+
+@click.command()
+@click.option(
+    "--start", help="Records in the first run.", type=click.INT, default=50000
+)
+@click.option("--steps", help="Number of doublings.", type=click.INT, default=6)
+def cli(start, steps):
+    """
+    Time the ordered set aggregators at doubling record counts.
+    """
+    rows = list()
+    for step in range(steps):
+        count = start * 2**step
+        for aggregator in (LiveHostAggregator(), SSLippyCupAggregator()):
+            elapsed = time_aggregator(aggregator, count)
+            rows.append(
+                {
+                    "Aggregator": aggregator.name,
+                    "Records": count,
+                    "Seconds": "{:.3f}".format(elapsed),
+                    "ns/record": "{:.0f}".format(elapsed / count * 1e9),
+                }
+            )
+
+    click.echo(tabulate(rows, headers="keys"))
+
+
+if __name__ == "__main__":
+    cli()
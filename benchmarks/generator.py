@@ -0,0 +1,228 @@
+#!/usr/bin/python3
+"""
+Generate synthetic but realistic .nessus files for benchmarking.
+
+The output follows the NessusClientData_v2 layout: a Policy block followed by
+one Report of ReportHost elements, each with HostProperties tags and a number
+of ReportItem findings carrying description, solution and plugin_output text.
+Output is deterministic for a given seed.
+
+    python -m benchmarks.generator -o /tmp/100M.nessus --size 100M
+"""
+
+# Standard Library
+import json
+import os
+import random
+from xml.sax.saxutils import escape, quoteattr
+
+# 3rd Party Libs
+import click
+
+# A mix of common plugins, weighted towards informational findings like a
+# real credentialed scan. (pluginID, pluginName, severity, port, svc_name)
+PLUGINS = [
+    (10863, "SSL Certificate Information", 0, 443, "www"),
+    (10863, "SSL Certificate Information", 0, 8443, "www"),
+    (11219, "Nessus SYN scanner", 0, 22, "ssh"),
+    (11219, "Nessus SYN scanner", 0, 80, "www"),
+    (11219, "Nessus SYN scanner", 0, 443, "www"),
+    (19506, "Nessus Scan Information", 0, 0, "general"),
+    (10287, "Traceroute Information", 0, 0, "general"),
+    (22964, "Service Detection", 0, 443, "www"),
+    (10107, "HTTP Server Type and Version", 0, 80, "www"),
+    (45410, "SSL Certificate 'commonName' Mismatch", 0, 443, "www"),
+    (56984, "SSL / TLS Versions Supported", 0, 443, "www"),
+    (70658, "SSH Server CBC Mode Ciphers Enabled", 2, 22, "ssh"),
+    (51192, "SSL Certificate Cannot Be Trusted", 2, 443, "www"),
+    (57582, "SSL Self-Signed Certificate", 2, 443, "www"),
+    (104743, "TLS Version 1.0 Protocol Detection", 2, 443, "www"),
+    (42873, "SSL Medium Strength Cipher Suites Supported (SWEET32)", 3, 443, "www"),
+    (
+        97833,
+        "MS17-010: Security Update for Microsoft Windows SMB Server",
+        4,
+        445,
+        "cifs",
+    ),
+]
+
+WORDS = (
+    "the remote host service certificate version server protocol cipher "
+    "openssl apache nginx windows linux kernel update patch vulnerable "
+    "configuration authentication request response header plugin detected"
+).split()
+
+
+def sentence(rng, length):
+    """Return roughly length characters of filler text"""
+    words = list()
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def host_name(n):
+    """Map a host number onto an address in 10.0.0.0/8"""
+    return "10.{}.{}.{}".format((n >> 16) & 255, (n >> 8) & 255, n & 255)
+
+
+def write_host(f, rng, n, items_per_host, output_size, description_size):
+    """
+    Write one ReportHost
+    :return: Number of ReportItems written
+    :rtype: int
+    """
+    name = host_name(n)
+    f.write("<ReportHost name={}><HostProperties>\n".format(quoteattr(name)))
+    for tag, value in (
+        ("HOST_START", "Mon Jan  1 00:00:00 2024"),
+        ("host-ip", name),
+        ("host-fqdn", "host{}.corp.example.com".format(n)),
+        ("operating-system", rng.choice(["Linux Kernel 4.15", "Microsoft Windows"])),
+        ("HOST_END", "Mon Jan  1 00:10:00 2024"),
+    ):
+        f.write("<tag name={}>{}</tag>\n".format(quoteattr(tag), escape(value)))
+    f.write("</HostProperties>\n")
+
+    for _ in range(items_per_host):
+        plugin_id, plugin_name, severity, port, svc_name = rng.choice(PLUGINS)
+        f.write(
+            '<ReportItem port="{}" svc_name="{}" protocol="tcp" severity="{}" '
+            'pluginID="{}" pluginName={} pluginFamily="General">\n'.format(
+                port, svc_name, severity, plugin_id, quoteattr(plugin_name)
+            )
+        )
+        f.write(
+            "<description>{}</description>\n".format(
+                escape(sentence(rng, description_size))
+            )
+        )
+        f.write("<risk_factor>None</risk_factor>\n")
+        f.write("<solution>{}</solution>\n".format(escape(sentence(rng, 60))))
+        f.write(
+            "<plugin_output>Subject Name: CN=host{}.corp.example.com\n{}</plugin_output>\n".format(
+                n, escape(sentence(rng, output_size))
+            )
+        )
+        f.write("</ReportItem>\n")
+
+    f.write("</ReportHost>\n")
+    return items_per_host
+
+
+def generate(
+    output_path,
+    hosts=None,
+    size=None,
+    items_per_host=20,
+    output_size=200,
+    description_size=300,
+    seed=0,
+):
+    """
+    Write a synthetic .nessus file with either a fixed number of hosts or
+    enough hosts to reach a target size. A <output_path>.meta.json file
+    records what was generated for the benchmarks.
+    :param output_path: File to write
+    :param hosts: Number of ReportHosts to write
+    :param size: Approximate size of the file in bytes, used if hosts is None
+    :param items_per_host: ReportItems per host
+    :param output_size: Approximate length of each plugin_output
+    :param description_size: Approximate length of each description
+    :param seed: Random seed
+    :return: Metadata about the generated file
+    :rtype: dict
+    """
+    if hosts is None and size is None:
+        raise ValueError("Either hosts or size must be given")
+
+    rng = random.Random(seed)
+    items = 0
+    n = 0
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" ?>\n<NessusClientData_v2>\n')
+        f.write("<Policy><policyName>Synthetic Benchmark</policyName></Policy>\n")
+        f.write(
+            '<Report name="Synthetic Benchmark" xmlns:cm="http://www.nessus.org/cm">\n'
+        )
+        while True:
+            if hosts is not None and n >= hosts:
+                break
+            if hosts is None and f.tell() >= size:
+                break
+            items += write_host(
+                f, rng, n, items_per_host, output_size, description_size
+            )
+            n += 1
+        f.write("</Report>\n</NessusClientData_v2>\n")
+
+    meta = {
+        "hosts": n,
+        "items": items,
+        "bytes": os.path.getsize(output_path),
+        "items_per_host": items_per_host,
+        "output_size": output_size,
+        "description_size": description_size,
+        "seed": seed,
+    }
+    with open(output_path + ".meta.json", "w") as f:
+        json.dump(meta, f, indent=4)
+
+    return meta
+
+
+def parse_size(value):
+    """Convert sizes like 100M, 1G or 5G to bytes"""
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3}
+    value = value.strip().upper()
+    if value[-1:] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+@click.command()
+@click.option("-o", "--output-path", help="File to write.", required=True)
+@click.option("--hosts", help="Number of hosts to generate.", type=click.INT)
+@click.option(
+    "--size", help="Approximate file size, e.g. 100M or 1G.", type=click.STRING
+)
+@click.option("--items-per-host", help="Findings per host.", type=click.INT, default=20)
+@click.option(
+    "--output-size", help="Characters of plugin output.", type=click.INT, default=200
+)
+@click.option(
+    "--description-size",
+    help="Characters of description.",
+    type=click.INT,
+    default=300,
+)
+@click.option("--seed", help="Random seed.", type=click.INT, default=0)
+def cli(output_path, hosts, size, items_per_host, output_size, description_size, seed):
+    """
+    Generate a synthetic .nessus file.
+    """
+    if hosts is None and size is None:
+        raise click.BadParameter("Give either --hosts or --size")
+
+    meta = generate(
+        output_path,
+        hosts=hosts,
+        size=parse_size(size) if size else None,
+        items_per_host=items_per_host,
+        output_size=output_size,
+        description_size=description_size,
+        seed=seed,
+    )
+    click.secho(
+        "[*] Wrote {hosts} hosts and {items} findings ({bytes} bytes)".format(**meta),
+        fg="green",
+    )
+
+
+if __name__ == "__main__":
+    cli()
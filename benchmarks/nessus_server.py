@@ -0,0 +1,341 @@
+#!/usr/bin/python3
+"""
+Local stand-in for the Nessus REST API, for benchmarking uploads, imports
+and downloads offline.
+
+Implements the endpoints nessus6Lib and nessus6AsyncLib use: session,
+file/upload, scans/import, scans, scans/{id}, scans/{id}/hosts/{host_id},
+its plugins/{plugin_id}, export, export status and export download (with
+Range support). Every request can be delayed by a fixed latency, exports
+become ready after an export delay and downloads return a payload of the
+configured size. Credentials aren't checked.
+
+    python -m benchmarks.nessus_server --port 8834 --latency 0.05 --payload-size 100M
+"""
+
+# Standard Library
+import asyncio
+import ssl
+import time
+
+# 3rd Party Libs
+import click
+from aiohttp import web
+
+# Lazy Lib
+from benchmarks.generator import parse_size
+
+# Downloads repeat this block until payload_size bytes have been sent
+BLOCK = (b"<ReportItem>" + b"x" * 1012 + b"</ReportItem>\n") * 64
+
+# Plugins every host reports: (plugin_id, plugin_name, severity, count, port)
+# A port is only given for plugins the plugin endpoint knows about
+HOST_PLUGINS = [
+    (10863, "SSL Certificate Information", 0, 1, "443 / tcp / www"),
+    (51192, "SSL Certificate Cannot Be Trusted", 2, 1, "443 / tcp / www"),
+    (11219, "Nessus SYN scanner", 0, 3, None),
+    (19506, "Nessus Scan Information", 0, 1, None),
+]
+
+
+def scan_host(scan, host_id):
+    """Entry of a scan's host list, every scan gets its own /24"""
+    return {
+        "host_id": host_id,
+        "hostname": "10.{}.{}.{}".format(scan["id"] // 256, scan["id"] % 256, host_id),
+    }
+
+
+class NessusStandIn(object):
+    """
+    In-memory fake Nessus server with configurable latency, export delay
+    and payload size. counters keeps request and byte totals.
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        export_delay=1.0,
+        payload_size=10 * 1024**2,
+        scans=20,
+        hosts=5,
+    ):
+        self.latency = latency
+        self.export_delay = export_delay
+        self.payload_size = payload_size
+        self.hosts = hosts
+        self.scans = {
+            scan_id: {
+                "id": scan_id,
+                "name": "Benchmark scan {}".format(scan_id),
+                "folder_id": 3,
+                "status": "completed",
+                "last_modification_date": int(time.time()),
+            }
+            for scan_id in range(1, scans + 1)
+        }
+        self.uploads = dict()
+        self.exports = dict()
+        self.counters = {"requests": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def app(self):
+        app = web.Application(middlewares=[self.latency_middleware])
+        app.router.add_post("/session", self.login)
+        app.router.add_delete("/session", self.logout)
+        app.router.add_post("/file/upload", self.upload)
+        app.router.add_post("/scans/import", self.scan_import)
+        app.router.add_get("/scans", self.list_scans)
+        app.router.add_get("/scans/{scan_id}", self.scan_details)
+        app.router.add_get("/scans/{scan_id}/hosts/{host_id}", self.host_details)
+        app.router.add_get(
+            "/scans/{scan_id}/hosts/{host_id}/plugins/{plugin_id}",
+            self.plugin_details,
+        )
+        app.router.add_post("/scans/{scan_id}/export", self.export)
+        app.router.add_get("/scans/{scan_id}/export/{file_id}/status", self.status)
+        app.router.add_get("/scans/{scan_id}/export/{file_id}/download", self.download)
+        return app
+
+    @web.middleware
+    async def latency_middleware(self, request, handler):
+        self.counters["requests"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await handler(request)
+
+    def scan(self, request):
+        scan_id = int(request.match_info["scan_id"])
+        if scan_id not in self.scans:
+            raise web.HTTPNotFound(
+                text='{"error": "The requested file was not found"}',
+                content_type="application/json",
+            )
+        return self.scans[scan_id]
+
+    def host(self, request):
+        scan = self.scan(request)
+        host_id = int(request.match_info["host_id"])
+        if not 1 <= host_id <= self.hosts:
+            raise web.HTTPNotFound(
+                text='{"error": "Host not found"}', content_type="application/json"
+            )
+        return scan_host(scan, host_id)
+
+    async def login(self, request):
+        await request.read()
+        return web.json_response({"token": "benchmark"})
+
+    async def logout(self, request):
+        return web.Response()
+
+    async def upload(self, request):
+        reader = await request.multipart()
+        name = None
+        size = 0
+        async for part in reader:
+            if part.name == "Filedata":
+                name = part.filename
+                while True:
+                    chunk = await part.read_chunk(2**20)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+        self.counters["bytes_in"] += size
+        # Nessus may rename uploads, clients have to use the returned name
+        stored = "{}-{}".format(len(self.uploads), name)
+        self.uploads[stored] = size
+        return web.json_response({"fileuploaded": stored})
+
+    async def scan_import(self, request):
+        body = await request.json()
+        if body.get("file") not in self.uploads:
+            return web.json_response({"error": "Invalid file"}, status=400)
+        scan_id = max(self.scans) + 1
+        self.scans[scan_id] = {
+            "id": scan_id,
+            "name": body["file"],
+            "folder_id": body.get("folder_id"),
+            "status": "imported",
+            "last_modification_date": int(time.time()),
+        }
+        return web.json_response({"scan": self.scans[scan_id]})
+
+    async def list_scans(self, request):
+        since = int(request.query.get("last_modification_date", 0))
+        return web.json_response(
+            {
+                "folders": [{"id": 3, "name": "My Scans"}],
+                "scans": [
+                    scan
+                    for scan in self.scans.values()
+                    if scan["last_modification_date"] > since
+                ],
+                "timestamp": int(time.time()),
+            }
+        )
+
+    async def scan_details(self, request):
+        scan = self.scan(request)
+        hosts = [scan_host(scan, host_id) for host_id in range(1, self.hosts + 1)]
+        return web.json_response({"info": scan, "hosts": hosts})
+
+    async def host_details(self, request):
+        host = self.host(request)
+        return web.json_response(
+            {
+                "info": {
+                    "host-ip": host["hostname"],
+                    "operating-system": "Linux Kernel 4.15",
+                },
+                "vulnerabilities": [
+                    {
+                        "host_id": host["host_id"],
+                        "hostname": host["hostname"],
+                        "plugin_id": plugin_id,
+                        "plugin_name": plugin_name,
+                        "severity": severity,
+                        "count": count,
+                    }
+                    for plugin_id, plugin_name, severity, count, _ in HOST_PLUGINS
+                ],
+            }
+        )
+
+    async def plugin_details(self, request):
+        host = self.host(request)
+        plugin_id = int(request.match_info["plugin_id"])
+        for known_id, plugin_name, severity, count, port in HOST_PLUGINS:
+            if known_id == plugin_id and port:
+                return web.json_response(
+                    {
+                        "info": {"plugindescription": {"pluginname": plugin_name}},
+                        "outputs": [
+                            {
+                                "plugin_output": "Subject Name: CN={}".format(
+                                    host["hostname"]
+                                ),
+                                "severity": severity,
+                                "ports": {port: [{"hostname": host["hostname"]}]},
+                            }
+                        ],
+                    }
+                )
+        return web.json_response({"error": "Plugin not found"}, status=404)
+
+    async def export(self, request):
+        self.scan(request)
+        await request.read()
+        file_id = len(self.exports) + 1
+        self.exports[file_id] = time.monotonic() + self.export_delay
+        return web.json_response({"file": file_id})
+
+    async def status(self, request):
+        ready_at = self.exports.get(int(request.match_info["file_id"]))
+        if ready_at is None:
+            return web.json_response(
+                {"error": "The requested file was not found"}, status=404
+            )
+        ready = time.monotonic() >= ready_at
+        return web.json_response({"status": "ready" if ready else "loading"})
+
+    async def download(self, request):
+        if int(request.match_info["file_id"]) not in self.exports:
+            return web.json_response(
+                {"error": "The requested file was not found"}, status=404
+            )
+
+        start = 0
+        if request.http_range.start:
+            start = request.http_range.start
+        response = web.StreamResponse(status=206 if start else 200)
+        response.content_length = self.payload_size - start
+        if start:
+            response.headers["Content-Range"] = "bytes {}-{}/{}".format(
+                start, self.payload_size - 1, self.payload_size
+            )
+        await response.prepare(request)
+
+        offset = start
+        while offset < self.payload_size:
+            block_offset = offset % len(BLOCK)
+            chunk = BLOCK[block_offset : block_offset + self.payload_size - offset]
+            await response.write(chunk)
+            offset += len(chunk)
+        self.counters["bytes_out"] += self.payload_size - start
+        await response.write_eof()
+        return response
+
+    async def start(self, host="127.0.0.1", port=0, ssl_context=None):
+        """
+        Start serving in the running event loop
+        :return: The AppRunner and the port it listens on
+        :rtype: tuple
+        """
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port, ssl_context=ssl_context)
+        await site.start()
+        return runner, runner.addresses[0][1]
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=click.INT, default=8834, show_default=True)
+@click.option(
+    "--latency",
+    help="Seconds added to every request.",
+    type=click.FLOAT,
+    default=0.0,
+    show_default=True,
+)
+@click.option(
+    "--export-delay",
+    help="Seconds before an export is ready.",
+    type=click.FLOAT,
+    default=1.0,
+    show_default=True,
+)
+@click.option(
+    "--payload-size",
+    help="Size of every download, e.g. 10M or 1G.",
+    default="10M",
+    show_default=True,
+)
+@click.option(
+    "--scans", help="Scans to list.", type=click.INT, default=20, show_default=True
+)
+@click.option(
+    "--hosts", help="Hosts in every scan.", type=click.INT, default=5, show_default=True
+)
+@click.option("--certfile", help="Serve HTTPS with this certificate.")
+@click.option("--keyfile", help="Private key of --certfile.")
+def cli(
+    host, port, latency, export_delay, payload_size, scans, hosts, certfile, keyfile
+):
+    """
+    Run a stand-in Nessus server. With --certfile it serves HTTPS, which the
+    'lazy nessus' commands require.
+    """
+    ssl_context = None
+    if certfile:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(certfile, keyfile)
+
+    server = NessusStandIn(
+        latency=latency,
+        export_delay=export_delay,
+        payload_size=parse_size(payload_size),
+        scans=scans,
+        hosts=hosts,
+    )
+    click.secho(
+        "[*] Serving a stand-in Nessus API on {}://{}:{}".format(
+            "https" if ssl_context else "http", host, port
+        ),
+        fg="green",
+    )
+    web.run_app(server.app(), host=host, port=port, ssl_context=ssl_context, print=None)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,211 @@
+#!/usr/bin/python3
+"""
+Repeatable parsing benchmarks for the .nessus analysis commands.
+
+Runs the sslippycup, live-host-count and event-count aggregators (and all
+three together, as 'nessus analyze' does) over fixed synthetic fixtures and
+reports throughput in MB/s and items/s along with peak RSS. Each benchmark
+runs in a fresh process so peak RSS isn't polluted by earlier runs.
+
+    python -m benchmarks.parsing --sizes 100M,1G,5G --json-out results.json
+    python -m benchmarks.parsing --sizes 100M --baseline results.json
+"""
+
+# Standard Library
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+# 3rd Party Libs
+import click
+from tabulate import tabulate
+
+# Lazy Lib
+from benchmarks import generator
+from lazyLib import nessusParseLib
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+BENCHMARKS = {
+    "sslippycup": lambda: [nessusParseLib.SSLippyCupAggregator()],
+    "live-host-count": lambda: [nessusParseLib.LiveHostAggregator()],
+    "event-count": lambda: [nessusParseLib.EventCountAggregator()],
+    "analyze": lambda: [
+        nessusParseLib.SSLippyCupAggregator(),
+        nessusParseLib.LiveHostAggregator(),
+        nessusParseLib.EventCountAggregator(),
+    ],
+}
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes"""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return maxrss
+    return maxrss * 1024
+
+
+def fixture(fixture_dir, size):
+    """
+    Return the path of the fixture for a size, generating it if needed
+    :param fixture_dir: Directory holding the fixtures
+    :param size: Size string such as 100M
+    :return: Path to the fixture and its metadata
+    :rtype: tuple
+    """
+    os.makedirs(fixture_dir, exist_ok=True)
+    path = os.path.join(fixture_dir, "synthetic_{}.nessus".format(size.upper()))
+    meta_path = path + ".meta.json"
+
+    if not os.path.isfile(path) or not os.path.isfile(meta_path):
+        click.secho("[*] Generating {} fixture {}".format(size, path), fg="white")
+        return path, generator.generate(path, size=generator.parse_size(size))
+
+    with open(meta_path) as f:
+        return path, json.load(f)
+
+
+def _run_one(benchmark, path):
+    aggregators = BENCHMARKS[benchmark]()
+    start = time.perf_counter()
+    nessusParseLib.aggregate_files([os.path.split(path)], aggregators)
+    for aggregator in aggregators:
+        aggregator.report()
+    return time.perf_counter() - start, peak_rss()
+
+
+def run_benchmark(benchmark, path):
+    """
+    Run a benchmark over a fixture in a fresh process. Raises
+    BrokenProcessPool if the process dies, e.g. when it runs out of memory.
+    :return: Elapsed seconds and peak RSS in bytes
+    :rtype: tuple
+    """
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return executor.submit(_run_one, benchmark, path).result()
+
+
+@click.command()
+@click.option(
+    "--sizes",
+    help="Comma separated fixture sizes.",
+    default="100M,1G,5G",
+    show_default=True,
+)
+@click.option(
+    "-b",
+    "--benchmark",
+    help="Benchmark to run. Can be given more than once. Default: all",
+    type=click.Choice(list(BENCHMARKS)),
+    multiple=True,
+)
+@click.option(
+    "--fixture-dir",
+    help="Where fixtures are generated and reused.",
+    type=click.Path(file_okay=False),
+    default=DEFAULT_FIXTURE_DIR,
+    show_default=True,
+)
+@click.option(
+    "-r",
+    "--repeat",
+    help="Runs per benchmark, best is kept.",
+    type=click.INT,
+    default=3,
+)
+@click.option(
+    "--json-out", help="Save results as JSON.", type=click.Path(dir_okay=False)
+)
+@click.option(
+    "--baseline",
+    help="Earlier --json-out results to check for regressions.",
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option(
+    "--tolerance",
+    help="Allowed throughput drop against the baseline, in percent.",
+    type=click.FLOAT,
+    default=10.0,
+    show_default=True,
+)
+def cli(sizes, benchmark, fixture_dir, repeat, json_out, baseline, tolerance):
+    """
+    Benchmark .nessus parsing against fixed synthetic fixtures.
+    """
+    if not benchmark:
+        benchmark = list(BENCHMARKS)
+
+    results = list()
+    for size in sizes.split(","):
+        path, meta = fixture(fixture_dir, size.strip())
+        megabytes = meta["bytes"] / 1024**2
+
+        for name in benchmark:
+            try:
+                runs = [run_benchmark(name, path) for _ in range(repeat)]
+            except BrokenProcessPool:
+                click.secho(
+                    "[!] The {} benchmark process died on the {} fixture".format(
+                        name, size.strip().upper()
+                    ),
+                    fg="red",
+                )
+                sys.exit(1)
+            elapsed = min(run[0] for run in runs)
+            rss = max(run[1] for run in runs)
+            results.append(
+                {
+                    "benchmark": name,
+                    "size": size.strip().upper(),
+                    "seconds": round(elapsed, 3),
+                    "mb_per_s": round(megabytes / elapsed, 2),
+                    "items_per_s": round(meta["items"] / elapsed),
+                    "peak_rss_mb": round(rss / 1024**2, 1),
+                }
+            )
+
+    click.echo(tabulate(results, headers="keys"))
+
+    if json_out:
+        with open(json_out, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if baseline:
+        with open(baseline) as f:
+            previous = {(r["benchmark"], r["size"]): r for r in json.load(f)}
+
+        regressions = list()
+        for result in results:
+            before = previous.get((result["benchmark"], result["size"]))
+            if before is None:
+                continue
+            change = (result["mb_per_s"] / before["mb_per_s"] - 1) * 100
+            if change < -tolerance:
+                regressions.append(
+                    "{} {}: {:.1f} MB/s -> {:.1f} MB/s ({:+.1f}%)".format(
+                        result["benchmark"],
+                        result["size"],
+                        before["mb_per_s"],
+                        result["mb_per_s"],
+                        change,
+                    )
+                )
+
+        if regressions:
+            for regression in regressions:
+                click.secho("[!] Regression: {}".format(regression), fg="red")
+            sys.exit(1)
+        click.secho("[*] No regressions against {}".format(baseline), fg="green")
+
+
+if __name__ == "__main__":
+    cli()
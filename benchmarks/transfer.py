@@ -0,0 +1,287 @@
+#!/usr/bin/python3
+"""
+Upload, import and download throughput of the Nessus clients.
+
+Starts the stand-in from benchmarks.nessus_server in its own process and
+runs the code paths behind 'nessus upload' (nessus6AsyncLib.upload_scans)
+and 'nessus download' (nessus6AsyncLib.download_scans for several scans,
+nessus6Lib.download_scan for a single one) against it at each concurrency
+level. Reports MB/s and files/s along with the mean time of each request
+type, so the effect of latency and export delay can be seen.
+
+    python -m benchmarks.transfer --files 20 --file-size 5M --concurrency 1,4,8
+    python -m benchmarks.transfer -b download --latency 0.05 --payload-size 100M
+"""
+
+# Standard Library
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+# 3rd Party Libs
+import click
+from tabulate import tabulate
+
+# Lazy Lib
+from benchmarks import generator
+from benchmarks.nessus_server import NessusStandIn
+from lazyLib.nessusAsyncLib import nessus6AsyncLib
+from lazyLib.nessusLib import RequestMetrics, nessus6Lib
+
+BENCHMARKS = ["upload", "download", "download-sync"]
+
+
+def _serve(options, ready):
+    async def serve():
+        server = NessusStandIn(**options)
+        runner, port = await server.start()
+        ready.put(port)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(serve())
+
+
+def start_server(**options):
+    """
+    Run the stand-in in a separate process so it doesn't compete with the
+    clients for the GIL
+    :param options: Keyword arguments of NessusStandIn
+    :return: The process and the server's URL
+    :rtype: tuple
+    """
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Queue()
+    proc = ctx.Process(target=_serve, args=(options, ready), daemon=True)
+    proc.start()
+    return proc, "http://127.0.0.1:{}".format(ready.get(timeout=30))
+
+
+def mean_elapsed(metrics, action_suffix):
+    """Mean seconds of the requests whose action ends with action_suffix"""
+    elapsed = [
+        record["elapsed"]
+        for record in metrics.records
+        if record["action"].endswith(action_suffix)
+    ]
+    if not elapsed:
+        return None
+    return round(sum(elapsed) / len(elapsed), 4)
+
+
+def run_upload(url, file_paths, concurrency):
+    """
+    Upload and import every file with upload_scans()
+    :return: Seconds taken, files that failed and the client's metrics
+    :rtype: tuple
+    """
+    metrics = RequestMetrics()
+
+    async def run():
+        async with nessus6AsyncLib(
+            url,
+            api_akey="benchmark",
+            api_skey="benchmark",
+            concurrency=concurrency,
+            metrics=metrics,
+        ) as nessusAPI:
+            return await nessusAPI.upload_scans(file_paths, 3, concurrency=concurrency)
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for _, result in results if isinstance(result, Exception))
+    return elapsed, failed, metrics
+
+
+def run_download(url, count, output_path, concurrency):
+    """
+    Export and download the first count scans with download_scans()
+    :return: Seconds taken, scans that failed and the client's metrics
+    :rtype: tuple
+    """
+    metrics = RequestMetrics()
+
+    async def run():
+        async with nessus6AsyncLib(
+            url,
+            api_akey="benchmark",
+            api_skey="benchmark",
+            concurrency=concurrency,
+            metrics=metrics,
+        ) as nessusAPI:
+            scans = (await nessusAPI.list_scans())["scans"][:count]
+            return await nessusAPI.download_scans(scans, output_path)
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for _, result in results if isinstance(result, Exception))
+    return elapsed, failed, metrics
+
+
+def run_download_sync(url, count, output_path):
+    """
+    Export and download the first count scans one after the other with
+    nessus6Lib.download_scan()
+    :return: Seconds taken, scans that failed and the client's metrics
+    :rtype: tuple
+    """
+    nessusAPI = nessus6Lib(url, api_akey="benchmark", api_skey="benchmark")
+    start = time.perf_counter()
+    for scan_id in range(1, count + 1):
+        nessusAPI.download_scan(
+            scan_id,
+            output_file=os.path.join(output_path, "{}.nessus".format(scan_id)),
+        )
+    return time.perf_counter() - start, 0, nessusAPI.metrics
+
+
+@click.command()
+@click.option(
+    "-b",
+    "--benchmark",
+    help="Benchmark to run. Can be given more than once. Default: all",
+    type=click.Choice(BENCHMARKS),
+    multiple=True,
+)
+@click.option(
+    "--files",
+    help="Files to upload, and scans to download.",
+    type=click.INT,
+    default=20,
+    show_default=True,
+)
+@click.option(
+    "--file-size", help="Size of each uploaded file.", default="5M", show_default=True
+)
+@click.option(
+    "--payload-size",
+    help="Size of each downloaded export.",
+    default="10M",
+    show_default=True,
+)
+@click.option(
+    "--concurrency",
+    help="Comma separated concurrency levels.",
+    default="1,4,8",
+    show_default=True,
+)
+@click.option(
+    "--latency",
+    help="Seconds the server adds to every request.",
+    type=click.FLOAT,
+    default=0.0,
+    show_default=True,
+)
+@click.option(
+    "--export-delay",
+    help="Seconds before an export is ready.",
+    type=click.FLOAT,
+    default=0.5,
+    show_default=True,
+)
+@click.option(
+    "-r",
+    "--repeat",
+    help="Runs per benchmark, best is kept.",
+    type=click.INT,
+    default=1,
+)
+@click.option(
+    "--json-out", help="Save results as JSON.", type=click.Path(dir_okay=False)
+)
+def cli(
+    benchmark,
+    files,
+    file_size,
+    payload_size,
+    concurrency,
+    latency,
+    export_delay,
+    repeat,
+    json_out,
+):
+    """
+    Benchmark Nessus uploads, imports and downloads against a local stand-in.
+    """
+    if not benchmark:
+        benchmark = BENCHMARKS
+    levels = [int(level) for level in concurrency.split(",")]
+    payload_bytes = generator.parse_size(payload_size)
+
+    proc, url = start_server(
+        latency=latency,
+        export_delay=export_delay,
+        payload_size=payload_bytes,
+        scans=files,
+    )
+    click.secho("[*] Stand-in Nessus server on {}".format(url), fg="white")
+
+    results = list()
+    with tempfile.TemporaryDirectory() as tmp:
+        upload_path = os.path.join(tmp, "upload.nessus")
+        meta = generator.generate(upload_path, size=generator.parse_size(file_size))
+        file_paths = [upload_path] * files
+
+        for name in benchmark:
+            # One after the other is the only way the sync client downloads
+            for level in [1] if name == "download-sync" else levels:
+                runs = list()
+                for _ in range(repeat):
+                    output_path = tempfile.mkdtemp(dir=tmp)
+                    if name == "upload":
+                        runs.append(run_upload(url, file_paths, level))
+                    elif name == "download":
+                        runs.append(run_download(url, files, output_path, level))
+                    else:
+                        runs.append(run_download_sync(url, files, output_path))
+                elapsed, failed, metrics = min(runs, key=lambda run: run[0])
+
+                if name == "upload":
+                    megabytes = meta["bytes"] * files / 1024**2
+                    request_means = {
+                        "mean_upload_s": mean_elapsed(metrics, "file/upload"),
+                        "mean_import_s": mean_elapsed(metrics, "scans/import"),
+                    }
+                else:
+                    megabytes = payload_bytes * files / 1024**2
+                    request_means = {
+                        "mean_export_s": mean_elapsed(metrics, "/export"),
+                        "mean_status_s": mean_elapsed(metrics, "/status"),
+                        "mean_download_s": mean_elapsed(metrics, "/download"),
+                    }
+
+                results.append(
+                    dict(
+                        {
+                            "benchmark": name,
+                            "concurrency": level,
+                            "files": files,
+                            "failed": failed,
+                            "seconds": round(elapsed, 3),
+                            "mb_per_s": round(megabytes / elapsed, 2),
+                            "files_per_s": round(files / elapsed, 2),
+                            "requests": len(metrics.records),
+                        },
+                        **request_means
+                    )
+                )
+
+    proc.terminate()
+    proc.join()
+
+    click.echo(tabulate(results, headers="keys"))
+
+    if json_out:
+        with open(json_out, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,6 +1,8 @@
 # Standard Libraries
 import csv
 import os
+import re
+import sys
 from pprint import pprint
 
 # Third party Libraries
@@ -10,10 +12,8 @@ import asyncio
 import asyncssh
 import click
 
-# from asyncGoPhishClient import Gophish
-# from asyncGoPhishClient.models import *
-from gophish import Gophish
-from gophish.models import *
+from asyncGoPhishClient import Gophish
+from asyncGoPhishClient.models import *
 import requests
 from tabulate import tabulate
 
@@ -26,6 +26,11 @@ requests.packages.urllib3.disable_warnings()
 
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
 
+# Failures talking to the GoPhish server
+GOPHISH_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s.]+$")
+
 
 @click.group(
     name="gosetup",
@@ -62,7 +67,7 @@ def cli(ctx):
 @click.option(
     "-g",
     "--group-size",
-    help="Define the email group size on import.",
+    help="Define the email group size on import. 0 puts every user in one group.",
     default="0",
     type=click.INT,
 )
@@ -81,13 +86,18 @@ def cli(ctx):
     type=click.STRING,
     required=True,
 )
+@click.option(
+    "--concurrency",
+    help="Groups to create at the same time.",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+)
 @click.pass_context
-def email_import(ctx, user_csv, group_size, group_name, section_name):
+def email_import(ctx, user_csv, group_size, group_name, section_name, concurrency):
     """
     Import a list of emails into the GoPhish instance
     """
-    usersChunked = dict()
-
     config_options = lazyTools.TOMLConfigCTXImport(ctx)
 
     debug = lazyTools.parentSetting(ctx, "debug")
@@ -136,107 +146,112 @@ def email_import(ctx, user_csv, group_size, group_name, section_name):
                 port=config_options["gophish"][section_name.lower()]["Port"],
             ),
             verify=config_options["gophish"][section_name.lower()]["Verify_SSL"],
+            limit=concurrency,
         )
 
-        # Try to get list of existing groups
-        try:
-            groups = api.groups.get()
-        except requests.exceptions.ConnectionError as e:
-            click.secho(
-                "Connection to the GoPhish server failed because {e}. Check the host and try again.".format(
-                    e=e
-                ),
-                fg="red",
-            )
-            raise click.Abort()
-
-        # Check if something went wrong. Error parsing on the part of GoPhish library needs some love.
-        if isinstance(groups, Error):
-            click.secho(
-                "[!] {message}. Remediate the issue and try again.".format(
-                    message=groups.message
-                ),
-                fg="red",
-                bold=True,
-            )
-            raise click.Abort()
-
-        # groups isn't an Error object, so we *should* be good to go.
-        if debug:
-            click.secho("A list of groups was successfully acquired.", fg="green")
-
-            # List all users in existing groups
-            for group in groups:
-                # print(group.targets)
-                for user in group.targets:
-                    pass  # print(vars(user))
-                # printUsersInGroup(group)
-
-        # Read the CSV file with the users in it.
-        with open(user_csv, "r", encoding="utf-8") as user_csv_file:
-            # dialect = csv.Sniffer().sniff(user_csv_file.read(1024))
-            # print(vars(dialect))
-            userReader = csv.DictReader(user_csv_file, delimiter=",")
-            rowList = list()
-            for row in userReader:
-                rowList.append(row)
-
-        # click.echo(tabulate(rowList, headers='keys', tablefmt="grid"))
-
-        # Divide the list of users into groups by group name
         # Template: <First>_<Second>_<Number
         # i.e. Phishing_Campaign_Remote_4
-
         group_name = group_name.replace(" ", "_")
         group_name = group_name + "_{}"
 
-        if group_size == 0:
-            # Do not divide list of group_size is 0
-            usersChunked = {group_name.format(1): rowList}
+        invalid = list()
+        # Bytes of the CSV each group was read from, to advance the progress bar
+        group_bytes = dict()
 
-        else:
-            chunks = [
-                rowList[x : x + group_size] for x in range(0, len(rowList), group_size)
-            ]
-
-            for count, userListChunk in enumerate(chunks, start=1):
-                usersChunked.update({group_name.format(count): userListChunk})
-
-        # For each group in usersChunked, upload
-        with click.progressbar(
-            usersChunked,
-            length=len(usersChunked),
-            label="Groups Added",
-            show_eta=False,
-            show_pos=True,
-        ) as bar:
-            for chunkName in bar:
-                targetList = list()
-                for user in usersChunked[chunkName]:
-                    targetList.append(
-                        User(
-                            first_name=user["First Name"],
-                            last_name=user["Last Name"],
-                            email=user["Email"],
-                            position=user["Position"],
-                        )
+        async def import_groups(user_csv_file, bar):
+            async with api:
+                # Try to get list of existing groups
+                try:
+                    groups = await api.groups.summary()
+                except GOPHISH_ERRORS as e:
+                    click.secho(
+                        "Connection to the GoPhish server failed because {e}. Check the host and try again.".format(
+                            e=e
+                        ),
+                        fg="red",
                     )
-                group = Group(name=chunkName, targets=targetList)
-
-                group = api.groups.post(group)
+                    raise click.Abort()
 
-                if isinstance(group, Error):
+                # Check if something went wrong. Error parsing on the part of GoPhish library needs some love.
+                if isinstance(groups, Error):
                     click.secho(
                         "[!] {message}. Remediate the issue and try again.".format(
-                            message=group.message
+                            message=groups.message
                         ),
                         fg="red",
                         bold=True,
                     )
                     raise click.Abort()
 
+                # groups isn't an Error object, so we *should* be good to go.
                 if debug:
-                    click.echo("Group {} was successfully added.".format(group.name))
+                    click.secho(
+                        "A list of groups was successfully acquired.", fg="green"
+                    )
+
+                def read_groups():
+                    position = 0
+                    for group in batch_groups(
+                        read_targets(user_csv_file, invalid), group_size, group_name
+                    ):
+                        # The buffer reads ahead, so this is approximate
+                        group_bytes[group.name] = user_csv_file.buffer.tell() - position
+                        position += group_bytes[group.name]
+                        yield group
+
+                def posted(group, result):
+                    bar.update(group_bytes.pop(group.name))
+                    if debug and not isinstance(result, (Error, Exception)):
+                        click.echo(
+                            "Group {} was successfully added.".format(result.name)
+                        )
+
+                return await post_groups(
+                    api, read_groups(), concurrency=concurrency, callback=posted
+                )
+
+        # Groups are posted while later rows are still being read. Counting
+        # rows would take a second pass, so the bar shows how much of the file
+        # has been imported.
+        with open(user_csv, "r", encoding="utf-8", newline="") as user_csv_file:
+            with click.progressbar(
+                length=os.path.getsize(user_csv),
+                label="Share of the CSV imported",
+                show_eta=False,
+                show_pos=False,
+            ) as bar:
+                added, failed = asyncio.run(import_groups(user_csv_file, bar))
+                bar.update(bar.length - bar.pos)
+
+        click.secho(
+            "[*] {} of {} groups were added.".format(added, added + len(failed)),
+            fg="green",
+        )
+        if invalid:
+            click.secho(
+                "[!] {} rows were skipped because their email address isn't "
+                "valid:".format(len(invalid)),
+                fg="yellow",
+            )
+            for line_num, email in invalid[:20]:
+                click.secho("    line {}: {!r}".format(line_num, email), fg="yellow")
+            if len(invalid) > 20:
+                click.secho("    ...", fg="yellow")
+        if failed:
+            click.secho(
+                "[!] {} groups failed. Remediate the issues and import them "
+                "again:".format(len(failed)),
+                fg="red",
+                bold=True,
+            )
+            for name, result in failed:
+                click.secho(
+                    "    {}: {}".format(
+                        name, result.message if isinstance(result, Error) else result
+                    ),
+                    fg="red",
+                )
+            sys.exit(1)
 
     else:
         raise click.BadParameter(
@@ -259,8 +274,15 @@ def email_import(ctx, user_csv, group_size, group_name, section_name):
     type=click.STRING,
     required=True,
 )
+@click.option(
+    "--concurrency",
+    help="Groups to delete at the same time.",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+)
 @click.pass_context
-def delete_groups(ctx, group_prefix, section_name):
+def delete_groups(ctx, group_prefix, section_name, concurrency):
     """
     Delete groups that start with a given string.
     """
@@ -269,9 +291,6 @@ def delete_groups(ctx, group_prefix, section_name):
     debug = lazyTools.parentSetting(ctx, "debug")
     verbose = lazyTools.parentSetting(ctx, "verbose")
 
-    group_found = False
-    group_counter = 0
-
     if section_name.lower() in config_options["gophish"]:
 
         # Debug print statement to check if the section name was properly found
@@ -317,51 +336,98 @@ def delete_groups(ctx, group_prefix, section_name):
                 port=config_options["gophish"][section_name.lower()]["Port"],
             ),
             verify=config_options["gophish"][section_name.lower()]["Verify_SSL"],
+            limit=concurrency,
         )
 
-        groups = api.groups.get()
-
-        with click.progressbar(
-            groups,
-            length=len(groups),
-            label="Groups Removed",
-            show_eta=False,
-            show_pos=True,
-        ) as bar:
-            for group in bar:
-                groupName = group.name
-                group_prefix = group_prefix.replace(" ", "_")
-                if group.name.startswith(group_prefix):
-                    group_found = True
-                    group_counter += 1
-                    if debug:
-                        click.echo("Found group: {}".format(groupName))
-
-                    deleteResponse = api.groups.delete(group.id)
-                    # The response is just a bunch of None and not helpful.
-
-                    if isinstance(deleteResponse, Error):
-                        click.secho(
-                            "[!] {message}. Remediate the issue and try again.".format(
-                                message=deleteResponse.message
-                            ),
-                            fg="red",
-                            bold=True,
-                        )
-                        raise click.Abort()
-        if group_found == False:
+        group_prefix = group_prefix.replace(" ", "_")
+
+        async def delete_matching():
+            async with api:
+                # The summary leaves out the targets of every group
+                summaries = await api.groups.summary()
+                if isinstance(summaries, Error):
+                    click.secho(
+                        "[!] {message}. Remediate the issue and try again.".format(
+                            message=summaries.message
+                        ),
+                        fg="red",
+                        bold=True,
+                    )
+                    raise click.Abort()
+
+                matching = [
+                    group
+                    for group in summaries.groups or []
+                    if group.name.startswith(group_prefix)
+                ]
+                if not matching:
+                    return matching, list()
+                if debug:
+                    for group in matching:
+                        click.echo("Found group: {}".format(group.name))
+
+                with click.progressbar(
+                    length=len(matching),
+                    label="Groups Removed",
+                    show_eta=False,
+                    show_pos=True,
+                ) as bar:
+                    failed = await delete_groups_by_id(
+                        api,
+                        matching,
+                        concurrency=concurrency,
+                        callback=lambda group, result: bar.update(1),
+                    )
+                return matching, failed
+
+        try:
+            matching, failed = asyncio.run(delete_matching())
+        except GOPHISH_ERRORS as e:
+            click.secho(
+                "Connection to the GoPhish server failed because {e}. Check the host and try again.".format(
+                    e=e
+                ),
+                fg="red",
+            )
+            raise click.Abort()
+
+        if not matching:
             click.secho(
                 "[!] No groups were found that start with {} .".format(group_prefix),
                 bold=True,
             )
-        else:
-            click.secho(
-                "[*] {count} groups were found and they were deleted.".format(
-                    count=group_counter
+            return
+
+        failed_names = set(name for name, _ in failed)
+        click.secho(
+            "[*] {deleted} of {count} groups starting with {prefix} were deleted, "
+            "removing {targets} targets.".format(
+                deleted=len(matching) - len(failed),
+                count=len(matching),
+                prefix=group_prefix,
+                targets=sum(
+                    group.num_targets or 0
+                    for group in matching
+                    if group.name not in failed_names
                 ),
+            ),
+            bold=True,
+            fg="green",
+        )
+        if failed:
+            click.secho(
+                "[!] {} groups could not be deleted:".format(len(failed)),
+                fg="red",
                 bold=True,
-                fg="green",
             )
+            for name, result in failed:
+                click.secho(
+                    "    {}: {}".format(
+                        name, result.message if isinstance(result, Error) else result
+                    ),
+                    fg="red",
+                )
+            sys.exit(1)
     else:
         raise click.BadParameter(
             "The section name '{}' doesn't appear to exist. Check the config file and try again.".format(
@@ -499,6 +565,146 @@ def shutdown(loop):
         task.cancel()
 
 
+def normalize_email(email):
+    """
+    Clean up an email address from a target list
+    :return: The address without surrounding whitespace or <>, with its
+             domain lowercased, or None if it isn't a valid address
+    :rtype: str
+    """
+    email = (email or "").strip().strip("<>").strip()
+    if not EMAIL_PATTERN.match(email):
+        return None
+    local_part, domain = email.rsplit("@", 1)
+    return "{}@{}".format(local_part, domain.lower())
+
+
+def read_targets(user_csv_file, invalid):
+    """
+    Read users from a CSV file one row at a time
+    :param user_csv_file: Open CSV file with First Name, Last Name, Email
+                          and Position columns
+    :param invalid: List that (line number, email) of skipped rows is added to
+    :return: Generator of User objects with normalized email addresses
+    """
+    userReader = csv.DictReader(user_csv_file, delimiter=",")
+    if "Email" not in (userReader.fieldnames or []):
+        raise click.BadParameter(
+            "The CSV file doesn't have an 'Email' column.", param_hint="USER_CSV"
+        )
+
+    for row in userReader:
+        email = normalize_email(row["Email"])
+        if email is None:
+            invalid.append((userReader.line_num, row["Email"]))
+            continue
+        yield User(
+            first_name=(row.get("First Name") or "").strip(),
+            last_name=(row.get("Last Name") or "").strip(),
+            email=email,
+            position=(row.get("Position") or "").strip(),
+        )
+
+
+def batch_groups(targets, group_size, group_name):
+    """
+    Gather users into groups as they're read
+    :param targets: Iterable of User objects
+    :param group_size: Users per group, 0 puts everyone in one group
+    :param group_name: Format string for the group names, e.g. Phishing_{}
+    :return: Generator of Group objects, numbered from 1
+    """
+    batch = list()
+    count = 1
+    for target in targets:
+        batch.append(target)
+        if group_size and len(batch) == group_size:
+            yield Group(name=group_name.format(count), targets=batch)
+            batch = list()
+            count += 1
+    if batch:
+        yield Group(name=group_name.format(count), targets=batch)
+
+
+async def post_groups(api, groups, concurrency=8, callback=None):
+    """
+    Create groups as they come out of an iterable. At most concurrency
+    requests are in flight and the next group is only taken once one of
+    them finishes, so a generator reading a large CSV stays just ahead of
+    the server. A group that fails doesn't stop the others.
+    :param api: Open asyncGoPhishClient.Gophish
+    :param groups: Iterable of Group objects to create
+    :param concurrency: Maximum simultaneous requests
+    :param callback: Called with (group, result) as each request finishes
+    :return: Number of groups added and list of (name, Error or exception) that failed
+    :rtype: tuple
+    """
+    slots = asyncio.Semaphore(concurrency)
+    added = 0
+    failed = list()
+
+    async def one(group):
+        nonlocal added
+        try:
+            try:
+                result = await api.groups.post(group)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Anything else, e.g. a reply that can't be parsed, only fails this group
+                result = e
+        finally:
+            slots.release()
+
+        if isinstance(result, (Error, Exception)):
+            failed.append((group.name, result))
+        else:
+            added += 1
+        if callback is not None:
+            callback(group, result)
+
+    # Only unfinished tasks are kept, so memory doesn't grow with the CSV
+    pending = set()
+    for group in groups:
+        await slots.acquire()
+        task = asyncio.ensure_future(one(group))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    await asyncio.gather(*pending)
+
+    return added, failed
+
+
+async def delete_groups_by_id(api, groups, concurrency=8, callback=None):
+    """
+    Delete several groups at once. At most concurrency requests are in
+    flight, a group that fails doesn't stop the others.
+    :param api: Open asyncGoPhishClient.Gophish
+    :param groups: List of Group or GroupSummary objects to delete
+    :param concurrency: Maximum simultaneous requests
+    :param callback: Called with (group, result) as each request finishes
+    :return: List of (name, Error or exception) that failed
+    :rtype: list
+    """
+    slots = asyncio.Semaphore(concurrency)
+    failed = list()
+
+    async def one(group):
+        try:
+            async with slots:
+                result = await api.groups.delete(group.id)
+        except GOPHISH_ERRORS as e:
+            result = e
+
+        if isinstance(result, (Error, Exception)):
+            failed.append((group.name, result))
+        if callback is not None:
+            callback(group, result)
+
+    await asyncio.gather(*(one(group) for group in groups))
+    return failed
+
+
 def listUsersInDict(group) -> list:
     """
     List users in GoPhish Groups
@@ -1,10 +1,14 @@
 # Standard Lib
+import asyncio
+import csv
+import datetime
 import os
 from os import walk
 import logging
 import json
 from pprint import pprint
 import sys
+import time
 
 # 3rd Party Libs
 import click
@@ -13,8 +17,19 @@ from tabulate import tabulate
 
 # My Junk
 from lazyLib.nessusLib import nessus6Lib as ness6rest
+from lazyLib.nessusLib import NessusException
+from lazyLib.nessusLib import RequestMetrics
+from lazyLib.nessusAsyncLib import NESSUS_ERRORS
+from lazyLib.nessusAsyncLib import fan_out
+from lazyLib.nessusAsyncLib import nessus6AsyncLib
 from lazyLib import lazyTools
 from lazyLib import LazyCustomTypes
+from lazyLib import nessusDiffLib
+from lazyLib import nessusExportLib
+from lazyLib import nessusIndexLib
+from lazyLib import nessusParseLib
+from lazyLib import nessusRegistryLib
+from lazyLib import nessusScanCacheLib
 
 __version__ = "1.0"
 
@@ -35,6 +50,165 @@ def cli(ctx):
     """
 
 
+def metrics_option(f):
+    """
+    Option shared by every command that talks to a Nessus server
+    """
+    return click.option(
+        "--metrics-json",
+        help="Save timing, size and status of every request to the server as JSON.",
+        type=click.Path(dir_okay=False, writable=True),
+    )(f)
+
+
+def watch_requests(ctx, metrics):
+    """
+    Print every request to the Nessus server as it finishes when debugging
+    """
+    if not lazyTools.parentSetting(ctx, "debug"):
+        return
+
+    def show_request(record):
+        click.secho(
+            "[D] {method} {action} -> {status} in {elapsed:.3f}s, "
+            "{bytes_out} bytes out, {bytes_in} bytes in{}".format(
+                " (retry)" if record["retry"] else "", **record
+            ),
+            fg="white",
+            err=True,
+        )
+
+    metrics.add_hook(show_request)
+
+
+def show_metrics(ctx, metrics, metrics_json=None):
+    """
+    Print a summary of the requests to the Nessus server when running verbose
+    and save them all if asked to
+    """
+    if metrics_json:
+        metrics.dump(metrics_json)
+
+    if not lazyTools.parentSetting(ctx, "verbose"):
+        return
+
+    summary = metrics.summary()
+    if summary["calls"] == 0:
+        return
+
+    click.secho(
+        "[*] {calls} API calls in {total:.2f}s. First call {first:.3f}s, "
+        "later calls {mean_after_first:.3f}s on average.".format(**summary),
+        fg="white",
+    )
+    click.secho(
+        "[*] {} sent, {} received, {retries} retries, {errors} errors.".format(
+            format_bytes(summary["bytes_out"]),
+            format_bytes(summary["bytes_in"]),
+            **summary
+        ),
+        fg="white",
+    )
+
+
+def find_scan_id(scan_cache, scanner, scan_name):
+    """
+    Look up the ID of a scan or folder by name in the cached listing
+    :return: The ID, or None if nothing has that name
+    """
+    scans, folders = scan_cache.find(scanner, scan_name)
+    matches = scans + folders
+    if len(matches) > 1:
+        raise click.BadParameter(
+            "{} matches more than one scan or folder: {}. Use --id.".format(
+                scan_name, ", ".join(str(match["id"]) for match in matches)
+            )
+        )
+    if matches:
+        return matches[0]["id"]
+    return None
+
+
+def show_export_waits(export_waits, scan_names):
+    """
+    Print how long each export took to become ready on the server
+    :param export_waits: export_waits of a Nessus client
+    :param scan_names: Dict of scan ID to scan name
+    """
+    for wait in export_waits:
+        click.secho(
+            "[*] Export of {} was ready after {:.2f}s ({} status checks)".format(
+                scan_names.get(wait["scan_id"], wait["scan_id"]),
+                wait["seconds"],
+                wait["polls"],
+            ),
+            fg="white",
+        )
+
+
+def format_bytes(size):
+    """Human readable size, e.g. 12.3 MB"""
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return (
+                "{:.1f} {}".format(size, unit) if unit != "B" else "{} B".format(size)
+            )
+        size /= 1024
+
+
+class DownloadProgress(object):
+    """
+    Redraw one status line on stderr with the bytes received and throughput
+    of one or more downloads. Call it with (received, total, elapsed) for a
+    single download or use update() with a key per download.
+    """
+
+    # Seconds between redraws
+    interval = 0.5
+
+    def __init__(self, label):
+        self.label = label
+        self.transfers = dict()
+        self.start = time.perf_counter()
+        self.drawn = 0
+        self.width = 0
+
+    def __call__(self, received, total, elapsed):
+        self.update(None, received, total)
+
+    def update(self, key, received, total):
+        self.transfers[key] = (received, total)
+        now = time.perf_counter()
+        if now - self.drawn >= self.interval:
+            self.drawn = now
+            self.draw(now)
+
+    def draw(self, now):
+        received = sum(transfer[0] for transfer in self.transfers.values())
+        totals = [transfer[1] for transfer in self.transfers.values()]
+        line = "[*] {}: {}".format(self.label, format_bytes(received))
+        if None not in totals and sum(totals):
+            line += " of {} ({:.0%})".format(
+                format_bytes(sum(totals)), received / sum(totals)
+            )
+        line += " at {}/s".format(format_bytes(received / max(now - self.start, 1e-6)))
+        click.echo("\r" + line.ljust(self.width), nl=False, err=True)
+        self.width = len(line)
+
+    def clear(self):
+        """Blank the status line so other messages can be printed"""
+        if self.width:
+            click.echo("\r" + " " * self.width + "\r", nl=False, err=True)
+            self.width = 0
+
+    def finish(self):
+        """Draw the final totals and end the line"""
+        if self.transfers:
+            self.draw(time.perf_counter())
+            click.echo(err=True)
+            self.width = 0
+
+
 @cli.command(
     name="upload",
     context_settings=CONTEXT_SETTINGS,
@@ -75,14 +249,49 @@ def cli(ctx):
 @click.option(
     "-n", "--name", help="Name of a configuration section", default="dc2astns02"
 )
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Files to upload, and import, at the same time.",
+)
+@click.option(
+    "-f",
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Upload files even if they were already imported into the folder.",
+)
+@click.option(
+    "--registry-path",
+    help="Location of the record of imported files.",
+    type=click.Path(dir_okay=False, writable=True),
+    default=nessusRegistryLib.UploadRegistry.DEFAULT_PATH,
+    show_default=True,
+)
+@metrics_option
 @click.pass_context
-def upload(ctx, local_nessus, remote_folder, test, target, port, name):
+def upload(
+    ctx,
+    local_nessus,
+    remote_folder,
+    test,
+    target,
+    port,
+    name,
+    concurrency,
+    force,
+    registry_path,
+    metrics_json,
+):
     """
     Upload lots of Nessus files to a folder in a Nessus Server.
     - Get user credentials - API or username and password
     - Determine if local_nessus is a directory or file
     -- Find all '.nessus' files in directory
-    - Upload Nessus file to given folder
+    - Skip files already imported into the folder, unless forced
+    - Upload and import the Nessus files into the given folder, several at a time
     """
 
     # Check server information
@@ -112,63 +321,115 @@ def upload(ctx, local_nessus, remote_folder, test, target, port, name):
         else:
             # Not connected to VPN
             raise click.ClickException("Not connected to corporate VPN.")
-    # Try to log in with API keys
-    if ctx.obj["access_key"] and ctx.obj["secret_key"]:
-
-        nessusAPI = ness6rest.Scanner(
-            url=ctx.obj["target"],
-            api_akey=ctx.obj["access_key"],
-            api_skey=ctx.obj["secret_key"],
-            insecure=True,
+    # Log in with API keys if we have them, otherwise username and password
+    if ctx.obj.get("access_key") and ctx.obj.get("secret_key"):
+        credentials = dict(
+            api_akey=ctx.obj["access_key"], api_skey=ctx.obj["secret_key"]
+        )
+    elif ctx.obj.get("username") and ctx.obj.get("password"):
+        credentials = dict(login=ctx.obj["username"], password=ctx.obj["password"])
+    else:
+        raise click.ClickException(
+            "No API keys or username and password for the Nessus server."
         )
-        if test == False:
-            for full_path in nessus_list:
-                print(os.path.basename((os.path.join(full_path[0], full_path[1]))))
-                click.secho(
-                    "[*] Attempting to upload {}".format(full_path[1].rstrip()),
-                    fg="white",
-                )
-                nessusAPI.upload(os.path.join(full_path[0], full_path[1]))
-                click.secho("[*] Upload successful.", fg="green")
 
-                click.secho(
-                    "[*] Attempting to import the scan into the correct folder.",
-                    fg="white",
-                )
-                nessusAPI.scan_import(full_path[1], remote_folder)
-                click.secho("[*] Import successful.", fg="green")
+    file_paths = [os.path.join(file[0], file[1]) for file in nessus_list]
+
+    registry = nessusRegistryLib.UploadRegistry(registry_path)
+    pending, skipped = registry.partition(ctx.obj["target"], remote_folder, file_paths)
+    if force:
+        pending += [(file_path, sha256) for file_path, sha256, _ in skipped]
+        pending.sort(key=lambda upload: file_paths.index(upload[0]))
+        skipped = list()
+    for file_path, _, earlier_path in skipped:
+        click.secho(
+            "[*] Skipping {}, same content as {}".format(file_path, earlier_path),
+            fg="white",
+        )
+    file_paths = [file_path for file_path, _ in pending]
+    file_hashes = dict(pending)
+
+    if not file_paths and not test:
+        click.secho(
+            "[*] All {} files were already imported. Use --force to upload them "
+            "again.".format(len(skipped)),
+            fg="green",
+        )
+        return
+
+    def imported(file_path, result):
+        if isinstance(result, Exception):
+            click.secho(
+                "[!] Failed to upload {}: {}".format(
+                    os.path.basename(file_path), result
+                ),
+                fg="red",
+            )
         else:
+            registry.record(
+                ctx.obj["target"],
+                remote_folder,
+                file_hashes[file_path],
+                file_path,
+                result.get("id"),
+            )
             click.secho(
-                "[*] This was a test. No files were uploaded.", fg="blue", bg="white"
+                "[*] Uploaded and imported {}".format(os.path.basename(file_path)),
+                fg="green",
             )
-        click.secho("[*] All done!", fg="green")
-    elif ctx.obj["username"] and ctx.obj["password"]:
-        nessusAPI = ness6rest.Scanner(
-            ctx.obj["target"],
-            login=ctx.obj["username"],
-            password=ctx.obj["password"],
-            insecure=True,
-        )
-        if test == False:
-            for full_path in nessus_list:
-                click.secho(
-                    "[*] Attempting to upload {}".format(full_path[1].rstrip()),
-                    fg="white",
-                )
-                nessusAPI.upload(os.path.join(full_path[0], full_path[1]))
-                click.secho("[*] Upload successful.", fg="green")
 
-                click.secho(
-                    "[*] Attempting to import the scan into the correct folder.",
-                    fg="white",
-                )
-                nessusAPI.scan_import(full_path[1], remote_folder)
-                click.secho("[*] Import successful.", fg="green")
-        else:
+    asyncAPI = nessus6AsyncLib(
+        url=ctx.obj["target"], concurrency=concurrency * 2, **credentials
+    )
+    watch_requests(ctx, asyncAPI.metrics)
+
+    async def upload_all():
+        async with asyncAPI:
+            if test:
+                # Logging in and listing scans proves the credentials work
+                await asyncAPI.list_scans()
+                return None
             click.secho(
-                "[*] This was a test. No files were uploaded.", fg="blue", bg="white"
+                "[*] Uploading {} files, {} at a time".format(
+                    len(file_paths), concurrency
+                ),
+                fg="white",
+            )
+            return await asyncAPI.upload_scans(
+                file_paths, remote_folder, concurrency=concurrency, callback=imported
             )
+
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(upload_all())
+    except NESSUS_ERRORS as e:
+        raise click.ClickException(str(e))
+    show_metrics(ctx, asyncAPI.metrics, metrics_json)
+
+    if results is None:
+        click.secho(
+            "[*] This was a test. No files were uploaded.", fg="blue", bg="white"
+        )
         click.secho("[*] All done!", fg="green")
+        return
+
+    failed = [result for result in results if isinstance(result[1], Exception)]
+    click.secho(
+        "[*] Imported {} of {} files in {:.1f}s. {} already imported files "
+        "skipped.".format(
+            len(results) - len(failed),
+            len(results),
+            time.perf_counter() - start,
+            len(skipped),
+        ),
+        fg="green",
+    )
+    if failed:
+        click.secho("[!] {} files failed:".format(len(failed)), fg="red")
+        for file_path, error in failed:
+            click.secho("    {}: {}".format(file_path, error), fg="red")
+        sys.exit(1)
+    click.secho("[*] All done!", fg="green")
 
 
 @cli.command(
@@ -177,10 +438,15 @@ def upload(ctx, local_nessus, remote_folder, test, target, port, name):
 @click.option(
     "-i",
     "--id",
-    required=True,
     type=click.INT,
     help="ID of the scan or folder on the Nessus server.",
 )
+@click.option(
+    "-s",
+    "--scan-name",
+    type=click.STRING,
+    help="Name of the scan or folder on the Nessus server, instead of --id.",
+)
 @click.option(
     "-o",
     "--output-path",
@@ -216,19 +482,82 @@ def upload(ctx, local_nessus, remote_folder, test, target, port, name):
 @click.option(
     "-n", "--name", help="Name of a configuration section", default="dc2astns02"
 )
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Scans of a folder to download at the same time.",
+)
+@click.option(
+    "--poll-ceiling",
+    type=click.FloatRange(min=0.25),
+    default=30,
+    show_default=True,
+    help="Longest wait in seconds between checks of an export's status.",
+)
+@click.option(
+    "--export-timeout",
+    type=click.IntRange(min=1),
+    default=3600,
+    show_default=True,
+    help="Seconds to wait for an export before giving up on it.",
+)
+@click.option(
+    "--listing-ttl",
+    type=click.IntRange(min=0),
+    default=300,
+    show_default=True,
+    help="Seconds the cached scan and folder listing is used without asking the server.",
+)
+@click.option(
+    "--refresh",
+    is_flag=True,
+    default=False,
+    help="Fetch the whole scan and folder listing again.",
+)
+@click.option(
+    "--scan-cache-path",
+    help="Location of the cached scan and folder listings.",
+    type=click.Path(dir_okay=False, writable=True),
+    default=nessusScanCacheLib.ScanListCache.DEFAULT_PATH,
+    show_default=True,
+)
+@metrics_option
 @click.pass_context
-def export(ctx, id, output_path, test, export_type, target, port, name):
+def export(
+    ctx,
+    id,
+    scan_name,
+    output_path,
+    test,
+    export_type,
+    target,
+    port,
+    name,
+    concurrency,
+    poll_ceiling,
+    export_timeout,
+    listing_ttl,
+    refresh,
+    scan_cache_path,
+    metrics_json,
+):
     """
     Download Nessus scans from a file or folder on a remote server
     - Get user credentials - API or username and password
+    - Get the scan and folder listing, from the local cache if it's fresh
     - Determine if remote Nessus target is folder or a scan
     - If folder:
     -- Get scan IDs in folder
-    -- Download scans one by one
+    -- Export all of them at once and download them concurrently
     - elif scan
     -- Get scan
     """
 
+    if (id is None) == (scan_name is None):
+        raise click.UsageError("Give either --id or --scan-name.")
+
     # Check server information
     ctx, target, port, name = lazyTools.checkNessusServerConfig(ctx, target, port, name)
 
@@ -252,14 +581,44 @@ def export(ctx, id, output_path, test, export_type, target, port, name):
                 api_akey=ctx.obj["access_key"],
                 api_skey=ctx.obj["secret_key"],
                 debug=False,
+                poll_ceiling=poll_ceiling,
+                export_timeout=export_timeout,
             )
+            watch_requests(ctx, nessusAPI.metrics)
 
-            scanFolderDict = nessusAPI.list_scans()
+            scanCache = nessusScanCacheLib.ScanListCache(
+                scan_cache_path, ttl=listing_ttl
+            )
+            scanFolderDict = scanCache.listing(
+                ctx.obj["target"], nessusAPI.list_scans, refresh=refresh
+            )
 
             click.secho(
                 "[*] Downloaded scan and folder data. Checking if provided ID is valid."
             )
 
+            if scan_name is not None:
+                id = find_scan_id(scanCache, ctx.obj["target"], scan_name)
+                if id is None and not refresh:
+                    # Maybe it's newer than the cached listing
+                    scanFolderDict = scanCache.listing(
+                        ctx.obj["target"], nessusAPI.list_scans, refresh=True
+                    )
+                    id = find_scan_id(scanCache, ctx.obj["target"], scan_name)
+                if id is None:
+                    raise click.BadParameter(
+                        "{} is not the name of a scan or folder".format(scan_name)
+                    )
+            elif not refresh and not any(
+                item["id"] == id
+                for item in scanFolderDict["folders"] + scanFolderDict["scans"]
+            ):
+                # Maybe it's newer than the cached listing
+                scanFolderDict = scanCache.listing(
+                    ctx.obj["target"], nessusAPI.list_scans, refresh=True
+                )
+            scanCache.close()
+
             # Get list of folder IDs
             for folder in scanFolderDict["folders"]:
                 folderIDDict.update({folder["id"]: folder["name"]})
@@ -272,49 +631,91 @@ def export(ctx, id, output_path, test, export_type, target, port, name):
             if id in scanIDDict:
                 nessusAPI.scan_id = id
                 click.secho("[*] Downloading scan: {}".format(scanIDDict[id]))
-                scanString = nessusAPI.download_scan(
-                    nessusAPI.scan_id, export_format=export_type
-                )
+                progress = DownloadProgress(scanIDDict[id])
+                try:
+                    nessusAPI.download_scan(
+                        nessusAPI.scan_id,
+                        export_format=export_type,
+                        output_file="{}.{}".format(
+                            os.path.join(output_path, scanIDDict[id]), export_type
+                        ),
+                        progress=progress,
+                    )
+                except NessusException as e:
+                    progress.clear()
+                    raise click.ClickException(str(e))
+                progress.finish()
+                show_export_waits(nessusAPI.export_waits, scanIDDict)
 
                 click.secho("[*] Downloaded scan: {}".format(scanIDDict[id]))
-                with open(
-                    "{}.{}".format(
-                        os.path.join(output_path, scanIDDict[id]), export_type
-                    ),
-                    "wb",
-                ) as f:
-                    f.write(scanString)
                 click.secho(
                     "[*] Saved {}.{} to disk.".format(scanIDDict[id], export_type)
                 )
             elif id in folderIDDict:
                 click.secho("[*] Downloading from folder {}".format(folderIDDict[id]))
-                for scans in scanFolderDict["scans"]:
-                    if scans["folder_id"] == id:
-                        click.secho("[+] Downloading scan: {}".format(scans["name"]))
-                        nessusAPI.scan_id = scans["id"]
-                        scanString = nessusAPI.download_scan(
-                            nessusAPI.scan_id, export_format=export_type
+                folderScans = [
+                    scans
+                    for scans in scanFolderDict["scans"]
+                    if scans["folder_id"] == id
+                ]
+                for scans in folderScans:
+                    click.secho("[+] Exporting scan: {}".format(scans["name"]))
+
+                progress = DownloadProgress(folderIDDict[id])
+
+                def saved(scans, result):
+                    progress.clear()
+                    if isinstance(result, Exception):
+                        click.secho(
+                            "[!] Failed to download {}: {}".format(
+                                scans["name"], result
+                            ),
+                            fg="red",
+                        )
+                    else:
+                        click.secho(
+                            "[*] Saved {} to disk.".format(os.path.basename(result))
                         )
 
-                        # click.secho('[*] Downloaded scan: {}'.format(scans['name']))
-                        with open(
-                            "{}.{}".format(
-                                os.path.join(output_path, scans["name"]), export_type
+                async def download_folder():
+                    async with nessus6AsyncLib(
+                        url=ctx.obj["target"],
+                        api_akey=ctx.obj["access_key"],
+                        api_skey=ctx.obj["secret_key"],
+                        concurrency=concurrency,
+                        poll_ceiling=poll_ceiling,
+                        export_timeout=export_timeout,
+                        metrics=nessusAPI.metrics,
+                    ) as asyncAPI:
+                        results = await asyncAPI.download_scans(
+                            folderScans,
+                            output_path,
+                            export_format=export_type,
+                            callback=saved,
+                            progress=lambda scans, received, total: progress.update(
+                                scans["id"], received, total
                             ),
-                            "wb",
-                        ) as f:
-                            f.write(scanString)
-                        click.secho(
-                            "[*] Saved {}.{} to disk.".format(
-                                scans["name"], export_type
-                            )
                         )
+                        return results, asyncAPI.export_waits
+
+                results, exportWaits = asyncio.run(download_folder())
+                progress.finish()
+                show_export_waits(exportWaits, scanIDDict)
+                failed = [r for r in results if isinstance(r[1], Exception)]
+                if failed:
+                    click.secho(
+                        "[!] {} of {} scans failed to download.".format(
+                            len(failed), len(results)
+                        ),
+                        fg="red",
+                    )
             else:
                 raise click.BadParameter(
                     "{} is not a valid scan or folder number".format(id)
                 )
 
+            show_metrics(ctx, nessusAPI.metrics, metrics_json)
+
     except KeyError:
         # Access_key or Secret_Key is missing
         raise click.ClickException(
@@ -322,6 +723,303 @@ def export(ctx, id, output_path, test, export_type, target, port, name):
         )
 
 
+def select_servers(ctx, names):
+    """
+    Get the configured Nessus servers to fan out to, checking the VPN once
+    if any of them need it
+    :param names: Configuration section names, every server if empty
+    :rtype: list
+    """
+    servers = lazyTools.nessusServerConfigs(ctx, names)
+    if not servers:
+        raise click.ClickException("No Nessus servers are configured.")
+
+    if any(server["vpn_required"] for server in servers):
+        if not lazyTools.ConnectedToVPN(lazyTools.parentSetting(ctx, "config_path")):
+            raise click.ClickException("Not connected to corporate VPN.")
+    return servers
+
+
+def fan_out_options(f):
+    """
+    Options shared by every command that works across several Nessus servers
+    """
+    f = metrics_option(f)
+    f = click.option(
+        "--concurrency",
+        type=click.IntRange(min=1),
+        default=4,
+        show_default=True,
+        help="Connections to each server at the same time.",
+    )(f)
+    f = click.option(
+        "-n",
+        "--name",
+        "names",
+        help="Name of a configuration section. Can be given more than once. Default: every server",
+        multiple=True,
+    )(f)
+    return f
+
+
+def report_server_errors(results):
+    """
+    Print the servers that failed
+    :param results: fan_out() results
+    :return: Results of the servers that worked
+    :rtype: list
+    """
+    worked = list()
+    for server, result in results:
+        if isinstance(result, Exception):
+            click.secho("[!] {}: {}".format(server["name"], result), fg="red")
+        else:
+            worked.append((server, result))
+    return worked
+
+
+def matching_scans(listing, search):
+    """
+    Scans of a GET /scans response whose name contains search, with the name
+    of their folder
+    :return: List of (scan, folder name)
+    :rtype: list
+    """
+    folders = {folder["id"]: folder["name"] for folder in listing.get("folders") or []}
+    return [
+        (scan, folders.get(scan.get("folder_id"), ""))
+        for scan in listing.get("scans") or []
+        if not search or search.lower() in (scan.get("name") or "").lower()
+    ]
+
+
+@cli.command(
+    name="list-scans",
+    short_help="List or search the scans of every configured Nessus server.",
+)
+@click.option(
+    "-s",
+    "--search",
+    help="Only list scans whose name contains this, ignoring case.",
+    type=click.STRING,
+)
+@fan_out_options
+@click.pass_context
+def list_scans(ctx, search, names, concurrency, metrics_json):
+    """
+    Fetch the scan listing of several Nessus servers at once and show them
+    as one table.
+    """
+    servers = select_servers(ctx, names)
+    metrics = RequestMetrics()
+    watch_requests(ctx, metrics)
+
+    async def listing(server, client):
+        return await client.list_scans()
+
+    results = report_server_errors(
+        asyncio.run(fan_out(servers, listing, concurrency=concurrency, metrics=metrics))
+    )
+
+    rows = list()
+    for server, result in results:
+        for scan, folder in matching_scans(result, search):
+            modified = scan.get("last_modification_date")
+            rows.append(
+                [
+                    server["name"],
+                    scan["id"],
+                    scan.get("name"),
+                    folder,
+                    scan.get("status"),
+                    (
+                        datetime.datetime.fromtimestamp(modified).strftime(
+                            "%Y-%m-%d %H:%M"
+                        )
+                        if modified
+                        else ""
+                    ),
+                ]
+            )
+
+    click.echo(
+        tabulate(
+            rows, headers=["Scanner", "ID", "Name", "Folder", "Status", "Modified"]
+        )
+    )
+    click.secho(
+        "[*] {} scans on {} of {} servers.".format(
+            len(rows), len(results), len(servers)
+        ),
+        fg="green",
+    )
+    show_metrics(ctx, metrics, metrics_json)
+
+
+@cli.command(
+    name="download-all",
+    short_help="Download matching scans from every configured Nessus server.",
+)
+@click.option(
+    "-s",
+    "--search",
+    help="Download scans whose name contains this, ignoring case.",
+    type=click.STRING,
+    required=True,
+)
+@click.option(
+    "-o",
+    "--output-path",
+    type=click.Path(
+        exists=False, file_okay=False, dir_okay=True, resolve_path=True, writable=True
+    ),
+    help="Directory to save the scans to, in one sub-directory per server.",
+    envvar="PWD",
+)
+@click.option(
+    "-eT",
+    "--export-type",
+    help="Define the exported file's type.",
+    type=click.Choice(["nessus", "pdf", "html", "csv"]),
+    default="nessus",
+)
+@fan_out_options
+@click.pass_context
+def download_all(
+    ctx, search, output_path, export_type, names, concurrency, metrics_json
+):
+    """
+    Find the scans whose name matches on several Nessus servers at once and
+    download them all, each server with its own connection pool.
+    """
+    servers = select_servers(ctx, names)
+    metrics = RequestMetrics()
+    watch_requests(ctx, metrics)
+
+    async def download(server, client):
+        scans = [scan for scan, _ in matching_scans(await client.list_scans(), search)]
+        server_path = os.path.join(output_path, server["name"])
+        os.makedirs(server_path, exist_ok=True)
+
+        def saved(scan, result):
+            if isinstance(result, Exception):
+                click.secho(
+                    "[!] {}: failed to download {}: {}".format(
+                        server["name"], scan["name"], result
+                    ),
+                    fg="red",
+                )
+            else:
+                click.secho("[*] {}: saved {}".format(server["name"], result))
+
+        return await client.download_scans(
+            scans,
+            server_path,
+            export_format=export_type,
+            callback=saved,
+        )
+
+    results = report_server_errors(
+        asyncio.run(
+            fan_out(servers, download, concurrency=concurrency, metrics=metrics)
+        )
+    )
+
+    downloads = [download for _, result in results for download in result]
+    failed = [download for download in downloads if isinstance(download[1], Exception)]
+    click.secho(
+        "[*] Downloaded {} of {} scans from {} of {} servers.".format(
+            len(downloads) - len(failed), len(downloads), len(results), len(servers)
+        ),
+        fg="green",
+    )
+    show_metrics(ctx, metrics, metrics_json)
+    if failed or len(results) != len(servers):
+        sys.exit(1)
+
+
+def analysis_options(f):
+    """
+    Options shared by every command that walks local Nessus files
+    """
+    f = click.option(
+        "--cache-path",
+        help="Location of the parsed findings cache.",
+        type=click.Path(dir_okay=False, writable=True),
+        default=nessusParseLib.NessusCache.DEFAULT_PATH,
+        show_default=True,
+    )(f)
+    f = click.option(
+        "-c",
+        "--cache",
+        help="Answer from the parsed findings cache and only parse new or changed files.",
+        is_flag=True,
+        default=False,
+    )(f)
+    f = click.option(
+        "-w",
+        "--workers",
+        help="Number of processes used to parse Nessus files in parallel.",
+        type=click.IntRange(min=1),
+        default=1,
+    )(f)
+    return f
+
+
+def build_aggregators(report, plugin_id):
+    """
+    Create an aggregator for each report name, every report if none are given
+    :param report: List of names from nessusParseLib.AGGREGATORS
+    :param plugin_id: Plugin IDs for the sslippycup report
+    :rtype: list
+    """
+    if not report:
+        report = list(nessusParseLib.AGGREGATORS)
+
+    aggregators = list()
+    for report_name in report:
+        if report_name == nessusParseLib.SSLippyCupAggregator.name:
+            aggregators.append(nessusParseLib.SSLippyCupAggregator(plugin_id))
+        else:
+            aggregators.append(nessusParseLib.AGGREGATORS[report_name]())
+    return aggregators
+
+
+def print_reports(aggregators):
+    """Print each aggregator's report under its name"""
+    for aggregator in aggregators:
+        click.secho("[*] {}".format(aggregator.name), fg="green")
+        for line in aggregator.report():
+            click.echo(line)
+        click.echo()
+
+
+def run_aggregators(nessus_files, aggregators, workers=1, cache=False, cache_path=None):
+    """
+    Find the Nessus files in nessus_files and walk them once, feeding every
+    aggregator. Exits if no files are found or a file can't be parsed.
+    """
+    nessus_list = nessusParseLib.find_nessus_files(nessus_files)
+
+    # Make sure we actually found a Nessus file to play with
+    if len(nessus_list) == 0:
+        click.secho("[!] No Nessus files were specified.", fg="red")
+        click.secho("[*] Exiting.", fg="green")
+        sys.exit()
+
+    if not cache:
+        cache_path = None
+
+    try:
+        return nessusParseLib.aggregate_files(
+            nessus_list, aggregators, workers=workers, cache_path=cache_path
+        )
+    except:
+        click.echo("An error occured, are you sure that you've got a Nessus file?")
+        click.echo(sys.exc_info()[0])
+        sys.exit(1)
+
+
 @cli.command(
     name="sslippycup",
     short_help="Display all the hosts and ports with a valid SSL/TLS cert.",
@@ -338,73 +1036,89 @@ def export(ctx, id, output_path, test, export_type, target, port, name):
     "--plugin-id",
     help="Plugin ID to export hostname and ports for. Default plugin: 'SSL Certificate Information' : 10863",
     type=click.STRING,
-    default="10863",
+    default=["10863"],
     multiple=True,
 )
+@analysis_options
 @click.pass_context
-def sslippycup(ctx, nessus_files, plugin_id):
+def sslippycup(ctx, nessus_files, plugin_id, workers, cache, cache_path):
     """
     Display all the hosts and their ports associated to the given Nessus plugin ID.
     """
 
-    outlist = list()
-
-    nessus_list = list()
-
     notify = lazyTools.parentSetting(ctx, "notify")
 
     if notify:
         ctx.call_on_close(lazyTools.notifications)
 
-    for entry in nessus_files:
-        if os.path.isfile(entry):
-            if entry.split(".")[-1:][0] == "nessus":
-                nessus_list.append(os.path.split(entry))
-        elif os.path.isdir(entry):
-            for (dirpath, dirnames, filenames) in walk(entry):
-                for fn in filenames:
-                    if fn.split(".")[-1:][0] == "nessus":
-                        nessus_list.append((dirpath, fn))
+    aggregator = nessusParseLib.SSLippyCupAggregator(plugin_id)
+    run_aggregators(
+        nessus_files, [aggregator], workers=workers, cache=cache, cache_path=cache_path
+    )
 
-    # Make sure we actually found a Nessus file to play with
-    if len(nessus_list) == 0:
-        click.secho("[!] No Nessus files were specified.", fg="red")
-        click.secho("[*] Exiting.", fg="green")
-        sys.exit()
+    for host_port in aggregator.report():
+        click.echo(host_port)
 
-    for file in nessus_list:
-        nessus_file_path = os.path.join(file[0], file[1])
-        if os.path.isfile(nessus_file_path):
-            try:
-                tree = etree.parse(nessus_file_path)
 
-                root = tree.getroot()
+@cli.command(
+    name="live-host-count",
+    short_help="Display all the hosts and ports with a valid SSL/TLS cert.",
+)
+@click.argument(
+    "nessus_files",
+    nargs=-1,
+    type=click.Path(
+        exists=True, file_okay=True, dir_okay=True, resolve_path=True, readable=True
+    ),
+)
+@analysis_options
+@click.pass_context
+def livehostcount(ctx, nessus_files, workers, cache, cache_path):
+    """
+    Display all the hosts and their ports associated to the given Nessus plugin ID.
+    """
 
-                for i in root.xpath("./Report/ReportHost/ReportItem"):
-                    if i.attrib["pluginID"] in plugin_id:
-                        for h in i.xpath(".."):
-                            hostname = h.attrib["name"]
+    aggregator = nessusParseLib.LiveHostAggregator()
+    run_aggregators(
+        nessus_files, [aggregator], workers=workers, cache=cache, cache_path=cache_path
+    )
 
-                        port = i.attrib["port"]
+    for host in aggregator.report():
+        click.echo(host)
 
-                        final_str = "{}:{}".format(hostname, port)
 
-                        if final_str not in outlist:
-                            outlist.append(final_str)
-            except:
-                click.echo(
-                    "An error occured, are you sure that you've got a Nessus file?"
-                )
-                click.echo(sys.exc_info()[0])
-                sys.exit(1)
+@cli.command(
+    name="event-count",
+    short_help="Count the number of times each event occurs for vuln assessments.",
+)
+@click.argument(
+    "nessus_files",
+    nargs=-1,
+    type=click.Path(
+        exists=True, file_okay=True, dir_okay=True, resolve_path=True, readable=True
+    ),
+)
+@analysis_options
+@click.pass_context
+def event_count(ctx, nessus_files, workers, cache, cache_path):
+    """
+    Goals:
+    - Count the number of events
+    - Order by severity then alphabetically
+    """
 
-    for host_port in outlist:
-        click.echo(host_port)
+    aggregator = nessusParseLib.EventCountAggregator()
+    run_aggregators(
+        nessus_files, [aggregator], workers=workers, cache=cache, cache_path=cache_path
+    )
+
+    for line in aggregator.report():
+        click.echo(line)
 
 
 @cli.command(
-    name="live-host-count",
-    short_help="Display all the hosts and ports with a valid SSL/TLS cert.",
+    name="analyze",
+    short_help="Run several reports over Nessus files in a single pass.",
 )
 @click.argument(
     "nessus_files",
@@ -413,62 +1127,200 @@ def sslippycup(ctx, nessus_files, plugin_id):
         exists=True, file_okay=True, dir_okay=True, resolve_path=True, readable=True
     ),
 )
+@click.option(
+    "-r",
+    "--report",
+    help="Report to generate. Can be given more than once. Default: all reports",
+    type=click.Choice(list(nessusParseLib.AGGREGATORS)),
+    multiple=True,
+)
+@click.option(
+    "-p",
+    "--plugin-id",
+    help="Plugin ID used by the sslippycup report. Default plugin: 'SSL Certificate Information' : 10863",
+    type=click.STRING,
+    default=["10863"],
+    multiple=True,
+)
+@analysis_options
 @click.pass_context
-def livehostcount(ctx, nessus_files):
+def analyze(ctx, nessus_files, report, plugin_id, workers, cache, cache_path):
     """
-    Display all the hosts and their ports associated to the given Nessus plugin ID.
+    Walk each Nessus file once and print every requested report at the end.
     """
 
-    outlist = list()
+    aggregators = build_aggregators(report, plugin_id)
 
-    nessus_list = list()
+    run_aggregators(
+        nessus_files, aggregators, workers=workers, cache=cache, cache_path=cache_path
+    )
 
-    hostname_list = list()
+    print_reports(aggregators)
 
-    for entry in nessus_files:
-        if os.path.isfile(entry):
-            if entry.split(".")[-1:][0] == "nessus":
-                nessus_list.append(os.path.split(entry))
-        elif os.path.isdir(entry):
-            for (dirpath, dirnames, filenames) in walk(entry):
-                for fn in filenames:
-                    if fn.split(".")[-1:][0] == "nessus":
-                        nessus_list.append((dirpath, fn))
 
-    # Make sure we actually found a Nessus file to play with
-    if len(nessus_list) == 0:
-        click.secho("[!] No Nessus files were specified.", fg="red")
-        click.secho("[*] Exiting.", fg="green")
-        sys.exit()
+@cli.command(
+    name="remote-analyze",
+    short_help="Run the analyze reports on scans straight from a Nessus server.",
+)
+@click.option(
+    "-i",
+    "--id",
+    "scan_ids",
+    help="ID of a scan on the Nessus server. Can be given more than once.",
+    type=click.INT,
+    multiple=True,
+    required=True,
+)
+@click.option(
+    "-r",
+    "--report",
+    help="Report to generate. Can be given more than once. Default: all reports",
+    type=click.Choice(list(nessusParseLib.AGGREGATORS)),
+    multiple=True,
+)
+@click.option(
+    "--plugin-id",
+    help="Plugin ID used by the sslippycup report. Default plugin: 'SSL Certificate Information' : 10863",
+    type=click.STRING,
+    default=["10863"],
+    multiple=True,
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="Requests to the server at the same time.",
+)
+@click.option(
+    "-t",
+    "--target",
+    type=click.STRING,
+    help="Nessus server to read the scans from. This should be an IP address or hostanme.",
+)
+@click.option(
+    "-p",
+    "--port",
+    type=LazyCustomTypes.port,
+    default="8834",
+    help="Port number Nessus server can be accessed on.",
+)
+@click.option(
+    "-n", "--name", help="Name of a configuration section", default="dc2astns02"
+)
+@metrics_option
+@click.pass_context
+def remote_analyze(
+    ctx,
+    scan_ids,
+    report,
+    plugin_id,
+    concurrency,
+    target,
+    port,
+    name,
+    metrics_json,
+):
+    """
+    Read hosts and findings from the scans/{id} and scans/{id}/hosts/{host_id}
+    JSON endpoints and print the same reports as analyze. Skips the export
+    queue and XML parsing when only counts or host:port lists are needed.
 
-    for file in nessus_list:
-        nessus_file_path = os.path.join(file[0], file[1])
-        if os.path.isfile(nessus_file_path):
-            try:
-                tree = etree.parse(nessus_file_path)
+    The JSON API lists each plugin once per host without ports, so ports are
+    only fetched for the sslippycup plugins. Counts match analyze, the other
+    per-port details aren't available.
+    """
+    # Check server information
+    ctx, target, port, name = lazyTools.checkNessusServerConfig(ctx, target, port, name)
 
-                root = tree.getroot()
+    # Check if we need to be on the VPN
+    if ctx.obj["vpn_required"] == True:
+        if not lazyTools.ConnectedToVPN(ctx.parent.parent.params["config_path"]):
+            raise click.ClickException("Not connected to corporate VPN.")
 
-                for i in root.xpath("./Report/ReportHost"):
-                    hostname = i.attrib["name"]
-                    hostname_list.append(hostname)
+    if ctx.obj.get("access_key") and ctx.obj.get("secret_key"):
+        credentials = dict(
+            api_akey=ctx.obj["access_key"], api_skey=ctx.obj["secret_key"]
+        )
+    else:
+        credentials = dict(
+            login=ctx.obj.get("username"), password=ctx.obj.get("password")
+        )
 
-                outlist = lazyTools.order_preserve_uniq_list(hostname_list)
+    aggregators = build_aggregators(report, plugin_id)
+    port_plugins = list()
+    for aggregator in aggregators:
+        if isinstance(aggregator, nessusParseLib.SSLippyCupAggregator):
+            port_plugins.extend(aggregator.plugin_id)
 
-            except:
-                click.echo(
-                    "An error occured, are you sure that you've got a Nessus file?"
-                )
-                click.echo(sys.exc_info()[0])
-                sys.exit(1)
+    asyncAPI = nessus6AsyncLib(
+        url=ctx.obj["target"], concurrency=concurrency, **credentials
+    )
+    watch_requests(ctx, asyncAPI.metrics)
 
-    for host in outlist:
-        click.echo(host)
+    def fetched(host, result):
+        if isinstance(result, Exception):
+            click.secho(
+                "[!] Failed to read host {}: {}".format(host.get("hostname"), result),
+                fg="red",
+            )
+
+    async def pull_scan(scan_id):
+        try:
+            return scan_id, await asyncAPI.report_hosts(
+                scan_id,
+                port_plugins=port_plugins,
+                concurrency=concurrency,
+                callback=fetched,
+            )
+        except NESSUS_ERRORS as e:
+            click.secho("[!] Failed to read scan {}: {}".format(scan_id, e), fg="red")
+            return scan_id, e
+
+    async def pull_scans():
+        async with asyncAPI:
+            return await asyncio.gather(*(pull_scan(scan_id) for scan_id in scan_ids))
+
+    try:
+        scans = asyncio.run(pull_scans())
+    except NESSUS_ERRORS as e:
+        raise click.ClickException(str(e))
+
+    failed_scans = [scan for scan in scans if isinstance(scan[1], Exception)]
+    hosts = [
+        result
+        for scan_id, results in scans
+        if not isinstance(results, Exception)
+        for result in results
+    ]
+    failed_hosts = [host for host in hosts if isinstance(host[1], Exception)]
+
+    for _, host in hosts:
+        if not isinstance(host, Exception):
+            for aggregator in aggregators:
+                aggregator.add_host(host)
+
+    print_reports(aggregators)
+    if failed_scans:
+        click.secho(
+            "[!] {} of {} scans couldn't be read.".format(
+                len(failed_scans), len(scans)
+            ),
+            fg="red",
+        )
+    if failed_hosts:
+        click.secho(
+            "[!] {} of {} hosts couldn't be read, the reports leave them out.".format(
+                len(failed_hosts), len(hosts)
+            ),
+            fg="red",
+        )
+    show_metrics(ctx, asyncAPI.metrics, metrics_json)
 
 
 @cli.command(
-    name="event-count",
-    short_help="Count the number of times each event occurs for vuln assessments.",
+    name="export-findings",
+    short_help="Convert Nessus files into a Parquet, Feather or .npz findings table.",
 )
 @click.argument(
     "nessus_files",
@@ -477,37 +1329,48 @@ def livehostcount(ctx, nessus_files):
         exists=True, file_okay=True, dir_okay=True, resolve_path=True, readable=True
     ),
 )
+@click.option(
+    "-o",
+    "--output-path",
+    help="File to write the findings table to.",
+    type=click.Path(
+        exists=False, file_okay=True, dir_okay=False, resolve_path=True, writable=True
+    ),
+    required=True,
+)
+@click.option(
+    "-f",
+    "--format",
+    "export_format",
+    help="Columnar format to write.",
+    type=click.Choice(nessusExportLib.EXPORT_FORMATS),
+    default="parquet",
+    show_default=True,
+)
+@click.option(
+    "--plugin-output",
+    help="Include the plugin output text of each finding.",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    help="Number of findings per row group or record batch.",
+    type=click.IntRange(min=1),
+    default=65536,
+    show_default=True,
+)
 @click.pass_context
-def event_count(ctx, nessus_files):
+def export_findings(
+    ctx, nessus_files, output_path, export_format, plugin_output, batch_size
+):
     """
-    Goals:
-    - Count the number of events
-    - Order by severity then alphabetically
+    Export host, port, protocol, pluginID, severity and pluginName for every
+    finding into a columnar file that can be loaded into pandas or DuckDB.
+    Findings are streamed in batches so memory use stays bounded.
     """
-
-    # Output format:
-    ## {<plugin_id_number>: {'Severity': <severity>, 'Plugin Name': <pluginName>, 'Count': <count>}}
-    outdict = dict()
-
-    nessus_list = list()
-
-    sev_list = {
-        "0": "Informational",
-        "1": "Low",
-        "2": "Medium",
-        "3": "High",
-        "4": "High",
-    }
-
-    for entry in nessus_files:
-        if os.path.isfile(entry):
-            if entry.split(".")[-1:][0] == "nessus":
-                nessus_list.append(os.path.split(entry))
-        elif os.path.isdir(entry):
-            for (dirpath, dirnames, filenames) in walk(entry):
-                for fn in filenames:
-                    if fn.split(".")[-1:][0] == "nessus":
-                        nessus_list.append((dirpath, fn))
+    nessus_list = nessusParseLib.find_nessus_files(nessus_files)
 
     # Make sure we actually found a Nessus file to play with
     if len(nessus_list) == 0:
@@ -515,56 +1378,298 @@ def event_count(ctx, nessus_files):
         click.secho("[*] Exiting.", fg="green")
         sys.exit()
 
-    for file in nessus_list:
-        nessus_file_path = os.path.join(file[0], file[1])
-        if os.path.isfile(nessus_file_path):
-            try:
-                tree = etree.parse(nessus_file_path)
+    file_paths = [os.path.join(file[0], file[1]) for file in nessus_list]
 
-                root = tree.getroot()
+    try:
+        rows = nessusExportLib.export_findings(
+            file_paths,
+            output_path,
+            export_format,
+            batch_size=batch_size,
+            plugin_output=plugin_output,
+        )
+    except ImportError as e:
+        raise click.ClickException(
+            "Exporting to {} needs an optional library: {}".format(export_format, e)
+        )
+    except (etree.LxmlError, nessusParseLib.NessusParseException) as e:
+        # Don't leave a truncated table behind
+        if os.path.isfile(output_path):
+            os.remove(output_path)
+        click.secho(
+            "[!] An error occured, are you sure that you've got a Nessus file? "
+            "{}".format(e),
+            fg="red",
+        )
+        sys.exit(1)
 
-                for i in root.xpath("./Report/ReportHost/ReportItem"):
-                    if i.attrib["pluginID"] in outdict:
-                        tempCount = outdict[i.attrib["pluginID"]]["Count"]
-                        tempCount += 1
-                        outdict[i.attrib["pluginID"]] = {
-                            "Severity": i.attrib["severity"],
-                            "Vulnerability Name": i.attrib["pluginName"],
-                            "Count": tempCount,
-                        }
+    click.secho(
+        "[*] Wrote {} findings from {} files to {}".format(
+            rows, len(file_paths), output_path
+        ),
+        fg="green",
+    )
 
-                    else:
-                        # First time we've seen this plugin, count = 0
-                        outdict[i.attrib["pluginID"]] = {
-                            "Severity": i.attrib["severity"],
-                            "Vulnerability Name": i.attrib["pluginName"],
-                            "Count": 0,
-                        }
-
-            except:
-                click.echo(
-                    "An error occured, are you sure that you've got a Nessus file?"
-                )
-                click.echo(sys.exc_info()[0])
-                sys.exit(1)
 
-    delimeter = ","
+@cli.command(
+    name="diff",
+    short_help="Compare old and new Nessus scans and report new, fixed and persisting findings.",
+)
+@click.option(
+    "-o",
+    "--old",
+    "old_files",
+    help="Nessus file or folder from the earlier scan. Can be given more than once.",
+    type=click.Path(
+        exists=True, file_okay=True, dir_okay=True, resolve_path=True, readable=True
+    ),
+    multiple=True,
+    required=True,
+)
+@click.option(
+    "-n",
+    "--new",
+    "new_files",
+    help="Nessus file or folder from the retest. Can be given more than once.",
+    type=click.Path(
+        exists=True, file_okay=True, dir_okay=True, resolve_path=True, readable=True
+    ),
+    multiple=True,
+    required=True,
+)
+@click.option(
+    "-s",
+    "--show",
+    help="Findings to list. Can be given more than once. Default: new and fixed",
+    type=click.Choice(nessusDiffLib.DIFF_STATUSES),
+    multiple=True,
+)
+@click.option(
+    "--min-severity",
+    help="Ignore findings below this severity. 0 is informational, 4 is critical.",
+    type=click.IntRange(min=0, max=4),
+    default=0,
+    show_default=True,
+)
+@click.option(
+    "--summary-only",
+    help="Only print the number of findings in each status.",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "-c",
+    "--cache",
+    help="Answer from the parsed findings cache and only parse new or changed files.",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--cache-path",
+    help="Location of the parsed findings cache.",
+    type=click.Path(dir_okay=False, writable=True),
+    default=nessusParseLib.NessusCache.DEFAULT_PATH,
+    show_default=True,
+)
+@click.pass_context
+def diff(
+    ctx, old_files, new_files, show, min_severity, summary_only, cache, cache_path
+):
+    """
+    Join the findings of two sets of Nessus files on host, port and plugin ID.
+    Both sides are streamed through an on-disk table so very large scans can
+    be compared in bounded memory.
+    """
+    old_list = nessusParseLib.find_nessus_files(old_files)
+    new_list = nessusParseLib.find_nessus_files(new_files)
+
+    # Make sure we actually found Nessus files on both sides
+    if len(old_list) == 0 or len(new_list) == 0:
+        click.secho("[!] No Nessus files were specified.", fg="red")
+        click.secho("[*] Exiting.", fg="green")
+        sys.exit()
 
-    headers = (
-        "Severity"
-        + delimeter
-        + "Vulnerability Name"
-        + delimeter
-        + "Total Occurrences Found"
+    if not show:
+        show = ["new", "fixed"]
+
+    if not cache:
+        cache_path = None
+
+    sev_list = nessusParseLib.EventCountAggregator.sev_list
+
+    with nessusDiffLib.NessusDiff(
+        min_severity=min_severity, cache_path=cache_path
+    ) as scan_diff:
+        try:
+            scan_diff.load("old", [os.path.join(*file) for file in old_list])
+            scan_diff.load("new", [os.path.join(*file) for file in new_list])
+        except:
+            click.echo("An error occured, are you sure that you've got a Nessus file?")
+            click.echo(sys.exc_info()[0])
+            sys.exit(1)
+
+        if not summary_only:
+            writer = csv.writer(click.get_text_stream("stdout"), lineterminator="\n")
+            writer.writerow(
+                [
+                    "Status",
+                    "Host",
+                    "Port",
+                    "Plugin ID",
+                    "Severity",
+                    "Vulnerability Name",
+                ]
+            )
+            for status in show:
+                for finding in scan_diff.iter_status(status):
+                    writer.writerow(
+                        [
+                            finding.status,
+                            finding.host,
+                            finding.port,
+                            finding.pluginID,
+                            sev_list.get(finding.severity, finding.severity),
+                            finding.pluginName,
+                        ]
+                    )
+
+        counts = scan_diff.counts()
+
+    click.secho(
+        "[*] New: {new}  Fixed: {fixed}  Persisting: {persisting}".format(**counts),
+        fg="green",
+        err=True,
     )
-    click.echo(headers)
 
-    for plugin in outdict:
 
-        click.echo(
-            sev_list[outdict[plugin]["Severity"]]
-            + delimeter
-            + outdict[plugin]["Vulnerability Name"]
-            + delimeter
-            + str(outdict[plugin]["Count"])
+@cli.command(
+    name="index",
+    short_help="Build or update a full-text search index of Nessus files.",
+)
+@click.argument(
+    "nessus_files",
+    nargs=-1,
+    type=click.Path(
+        exists=True, file_okay=True, dir_okay=True, resolve_path=True, readable=True
+    ),
+)
+@click.option(
+    "-i",
+    "--index-path",
+    help="Location of the search index.",
+    type=click.Path(dir_okay=False, writable=True),
+    default=nessusIndexLib.NessusIndex.DEFAULT_PATH,
+    show_default=True,
+)
+@click.pass_context
+def index(ctx, nessus_files, index_path):
+    """
+    Index the plugin output, plugin name and host properties of every finding.
+    Files that are already indexed and unchanged are skipped.
+    """
+    nessus_list = nessusParseLib.find_nessus_files(nessus_files)
+
+    # Make sure we actually found a Nessus file to play with
+    if len(nessus_list) == 0:
+        click.secho("[!] No Nessus files were specified.", fg="red")
+        click.secho("[*] Exiting.", fg="green")
+        sys.exit()
+
+    try:
+        with nessusIndexLib.NessusIndex(index_path) as search_index:
+            indexed = search_index.update(
+                [os.path.join(file[0], file[1]) for file in nessus_list]
+            )
+            files, findings = search_index.stats()
+    except nessusIndexLib.NessusIndexException.FTS5NotAvailable as e:
+        raise click.ClickException(str(e))
+    except (etree.LxmlError, nessusParseLib.NessusParseException) as e:
+        # The file that failed has already been dropped from the index
+        click.secho(
+            "[!] An error occured, are you sure that you've got a Nessus file? "
+            "{}".format(e),
+            fg="red",
         )
+        sys.exit(1)
+
+    for path, count in indexed:
+        click.secho("[+] Indexed {} findings from {}".format(count, path))
+    click.secho(
+        "[*] {} new or changed files indexed. The index holds {} findings from {} files.".format(
+            len(indexed), findings, files
+        ),
+        fg="green",
+    )
+
+
+@cli.command(
+    name="search",
+    short_help="Search the full-text index of Nessus plugin output.",
+)
+@click.argument("query")
+@click.option(
+    "-i",
+    "--index-path",
+    help="Location of the search index.",
+    type=click.Path(dir_okay=False),
+    default=nessusIndexLib.NessusIndex.DEFAULT_PATH,
+    show_default=True,
+)
+@click.option(
+    "-l",
+    "--limit",
+    help="Maximum number of results. 0 shows every match.",
+    type=click.IntRange(min=0),
+    default=100,
+    show_default=True,
+)
+@click.option(
+    "--hosts-only",
+    help="Only print the unique hosts that matched.",
+    is_flag=True,
+    default=False,
+)
+@click.pass_context
+def search(ctx, query, index_path, limit, hosts_only):
+    """
+    Search plugin output, plugin names and host properties. QUERY uses the
+    SQLite FTS5 syntax, e.g. 'openssl AND "1.0.2k"', 'plugin_output:CN',
+    'properties:"host-fqdn"' or 'host:"10.0.0.1"'. Terms with punctuation,
+    such as IP addresses, have to be in double quotes.
+    """
+    if not os.path.isfile(os.path.expanduser(index_path)):
+        raise click.ClickException(
+            "No index found at {}. Run 'nessus index' first.".format(index_path)
+        )
+
+    try:
+        with nessusIndexLib.NessusIndex(index_path) as search_index:
+            results = list(search_index.search(query, limit=limit))
+    except (
+        nessusIndexLib.NessusIndexException.FTS5NotAvailable,
+        nessusIndexLib.NessusIndexException.InvalidQuery,
+    ) as e:
+        raise click.ClickException(str(e))
+
+    if hosts_only:
+        hosts = nessusParseLib.LiveHostAggregator()
+        for result in results:
+            hosts.add(result.host)
+        for host in hosts.report():
+            click.echo(host)
+        return
+
+    rows = list()
+    for result in results:
+        rows.append(
+            {
+                "Host": "{}:{}".format(result.host, result.port),
+                "Plugin ID": result.pluginID,
+                "Vulnerability Name": result.pluginName,
+                "Match": (result.snippet or "").replace("\n", " "),
+                "File": os.path.basename(result.path),
+            }
+        )
+
+    click.echo(tabulate(rows, headers="keys"))
+    click.secho("[*] {} matches.".format(len(rows)), fg="green", err=True)
@@ -302,6 +302,64 @@ def checkNessusServerConfig(ctx, target, port, name):
     return ctx, target, port, name
 
 
+def nessusServerConfigs(ctx, names=None):
+    """
+    Read every [nessus.<name>] section of the configuration, or only the
+    given ones, for commands that work across several scanners. Sections
+    without a hostname, port and API keys are skipped with a warning, or
+    rejected if they were asked for by name.
+    :param names: Section names, all sections if empty
+    :return: List of dicts with name, target, port, access_key, secret_key and vpn_required
+    :rtype: list
+    """
+    configOptions = TOMLConfigCTXImport(ctx)
+    sections = {
+        name: section
+        for name, section in configOptions.get("nessus", {}).items()
+        if isinstance(section, dict)
+    }
+
+    unknown = [name for name in names or [] if name not in sections]
+    if unknown:
+        raise click.BadParameter(
+            "No Nessus configuration section named {}".format(", ".join(unknown))
+        )
+
+    servers = list()
+    for name in names or sections:
+        section = sections[name]
+        missing = [
+            key
+            for key in ("Hostname", "Port", "access_key", "secret_key")
+            if not section.get(key)
+        ]
+        if missing:
+            message = "Nessus configuration section {} has no {}".format(
+                name, ", ".join(missing)
+            )
+            if names:
+                raise click.BadParameter(message)
+            # Only sections that can be used without prompting are fanned out to
+            click.secho("[!] {}, skipping it.".format(message), fg="yellow", err=True)
+            continue
+
+        target = section["Hostname"]
+        if not target.startswith("https://"):
+            target = "https://{}".format(target)
+
+        servers.append(
+            {
+                "name": name,
+                "target": "{}:{}".format(target.rstrip("/"), section["Port"]),
+                "port": section["Port"],
+                "access_key": section["access_key"],
+                "secret_key": section["secret_key"],
+                "vpn_required": section.get("VPN_Required", False),
+            }
+        )
+    return servers
+
+
 class AliasedGroup(click.Group):
     def get_command(self, ctx, cmd_name):
         rv = click.Group.get_command(self, ctx, cmd_name)
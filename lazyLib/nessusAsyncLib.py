@@ -0,0 +1,670 @@
+# Standard Library
+import asyncio
+import collections
+import json
+import os
+import time
+
+# 3rd Party Libs
+import aiohttp
+
+# LazyLib Tools
+from lazyLib.nessusLib import NessusException
+from lazyLib.nessusLib import PartialDownload
+from lazyLib.nessusLib import RequestMetrics
+from lazyLib.nessusLib import check_export_status
+from lazyLib.nessusLib import export_poll_delay
+from lazyLib.nessusLib import poll_delays
+from lazyLib.nessusLib import raise_for_download_status
+from lazyLib.nessusLib import record_export_wait
+from lazyLib.nessusParseLib import ReportHost
+from lazyLib.nessusParseLib import ReportItem
+
+# Errors a single scan can fail with without stopping the others
+NESSUS_ERRORS = (
+    NessusException,
+    NessusException.FailureToConnect,
+    NessusException.InvalidCredentials,
+    NessusException.RequestedFileNotFound,
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+    OSError,
+)
+
+
+class nessus6AsyncLib(object):
+    """
+    asyncio counterpart to nessus6Lib. Every call shares one aiohttp session
+    so many exports, uploads and downloads can be in flight at once.
+
+    At most concurrency downloads stream at the same time. The session has
+    control_connections more connections than that, so export, status and
+    other API calls never queue behind long downloads.
+
+    async with nessus6AsyncLib(url, api_akey=..., api_skey=...) as nessusAPI:
+        scans = await nessusAPI.list_scans()
+    """
+
+    def __init__(
+        self,
+        url,
+        login="",
+        password="",
+        api_akey="",
+        api_skey="",
+        insecure=True,
+        concurrency=10,
+        timeout=300,
+        poll_ceiling=30,
+        export_timeout=3600,
+        metrics=None,
+        control_connections=4,
+    ):
+        self.url = url
+        self.auth = [login, password]
+        self.api_akey = api_akey
+        self.api_skey = api_skey
+        self.use_api = bool(api_akey and api_skey)
+        self.insecure = insecure
+        self.concurrency = concurrency
+        self.control_connections = control_connections
+        self.download_slots = None
+        self.timeout = timeout
+        self.poll_ceiling = poll_ceiling
+        self.export_timeout = export_timeout
+        self.export_waits = []
+        # Share a collector with other clients to report on them together
+        self.metrics = metrics if metrics is not None else RequestMetrics()
+        self.token = ""
+        self.session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exception_type, exception_value, traceback):
+        await self.close()
+
+    async def open(self):
+        """
+        Create the shared session and log in if API keys weren't given
+        """
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency + self.control_connections,
+            ssl=False if self.insecure else None,
+        )
+        self.download_slots = asyncio.Semaphore(self.concurrency)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+        if self.use_api:
+            self.session.headers.update(
+                {
+                    "X-ApiKeys": "accessKey="
+                    + self.api_akey
+                    + "; secretKey="
+                    + self.api_skey
+                }
+            )
+        else:
+            res = await self.action(
+                "session",
+                "post",
+                extra={"username": self.auth[0], "password": self.auth[1]},
+            )
+            self.token = res["token"]
+            self.session.headers.update({"X-Cookie": "token=" + str(self.token)})
+
+    async def close(self):
+        """
+        Log out if we logged in and close the shared session
+        """
+        if self.session is None:
+            return
+        if not self.use_api and self.token:
+            try:
+                await self.action("session", "delete")
+            except NessusException.FailureToConnect:
+                pass
+        await self.session.close()
+        self.session = None
+
+    async def action(
+        self,
+        action,
+        method,
+        extra=None,
+        data=None,
+        download=False,
+        timeout=None,
+        bytes_out=0,
+    ):
+        """
+        Generic REST call. JSON is sent unless form data is given.
+        :param action: API path, e.g. 'scans'
+        :param method: HTTP method
+        :param extra: JSON payload
+        :param data: aiohttp.FormData for file uploads
+        :param download: Return the raw body instead of parsed JSON
+        :param timeout: aiohttp.ClientTimeout to use instead of the session's
+        :param bytes_out: Size of form data, for self.metrics
+        :return: Parsed JSON, raw bytes when downloading, or {} for empty bodies
+        """
+        url = "%s/%s" % (self.url, action)
+        kwargs = dict()
+        if data is not None:
+            kwargs["data"] = data
+        elif extra:
+            kwargs["data"] = json.dumps(extra).encode("utf-8")
+            kwargs["headers"] = {"Content-Type": "application/json"}
+            bytes_out = len(kwargs["data"])
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        start = time.perf_counter()
+        status = None
+        body = b""
+        try:
+            async with self.session.request(method.upper(), url, **kwargs) as req:
+                status = req.status
+                body = await req.read()
+
+                if req.status != 200:
+                    try:
+                        error = json.loads(body).get("error", "")
+                    except ValueError:
+                        error = body.decode("utf-8", "replace")
+
+                    if error == "Invalid Credentials":
+                        raise NessusException.InvalidCredentials(
+                            "Provided credentials didn't work"
+                        )
+                    elif error == "The requested file was not found":
+                        raise NessusException.RequestedFileNotFound(
+                            "Requested file not found"
+                        )
+                    raise NessusException(
+                        "%s %s returned %d: %s"
+                        % (method.upper(), url, req.status, error)
+                    )
+        except aiohttp.ClientConnectionError:
+            raise NessusException.FailureToConnect(
+                "Could not connect to %s.\nExiting!\n" % url
+            ) from None
+        finally:
+            self.metrics.record(
+                method,
+                action,
+                status,
+                time.perf_counter() - start,
+                bytes_out=bytes_out,
+                bytes_in=len(body),
+            )
+
+        if download:
+            return body
+        if not body:
+            return {}
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise NessusException(
+                "%s %s returned a body that isn't JSON: %r"
+                % (method.upper(), url, body[:200])
+            ) from None
+
+    async def list_scans(self, last_modification_date=None):
+        """
+        List all scans and their containing folder
+        :param last_modification_date: Only list scans modified since this timestamp
+        """
+        action = "scans"
+        if last_modification_date is not None:
+            action += "?last_modification_date=%d" % last_modification_date
+        return await self.action(action, "get")
+
+    async def upload(self, upload_file):
+        """
+        Upload a file, streaming it from disk
+        :param upload_file: Path to the file
+        :return: The name the server saved the file under
+        :rtype: str
+        """
+        # Large files can take longer than the session timeout to send
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=self.timeout)
+        with open(upload_file, "rb") as f:
+            data = aiohttp.FormData()
+            data.add_field("Filedata", f, filename=os.path.basename(upload_file))
+            res = await self.action(
+                "file/upload",
+                "post",
+                data=data,
+                timeout=timeout,
+                bytes_out=os.path.getsize(upload_file),
+            )
+        if "fileuploaded" not in res:
+            raise NessusException(
+                "Uploading %s returned no file name: %r" % (upload_file, res)
+            )
+        return res["fileuploaded"]
+
+    async def scan_import(self, file_name, dest_folder):
+        """
+        Import an uploaded scan into a folder
+        :param file_name: Name returned by upload()
+        :param dest_folder: Folder ID
+        :return: The imported scan
+        :rtype: dict
+        """
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=self.timeout)
+        res = await self.action(
+            "scans/import",
+            "post",
+            extra={"file": file_name, "folder_id": dest_folder},
+            timeout=timeout,
+        )
+        return res.get("scan", res)
+
+    async def upload_scans(self, file_paths, dest_folder, concurrency=4, callback=None):
+        """
+        Upload and import several scans at once.
+
+        Uploads and imports are pipelined: while one file is being imported
+        the next ones are already uploading. At most concurrency uploads and
+        concurrency imports run at the same time. A file that fails doesn't
+        stop the others.
+        :param file_paths: List of paths to .nessus files
+        :param dest_folder: Folder ID to import into
+        :param concurrency: Maximum simultaneous uploads, and imports
+        :param callback: Called with (path, scan or exception) as each file finishes
+        :return: List of (path, scan or exception) in the order given
+        :rtype: list
+        """
+        upload_slots = asyncio.Semaphore(concurrency)
+        import_slots = asyncio.Semaphore(concurrency)
+
+        async def one(file_path):
+            try:
+                async with upload_slots:
+                    file_name = await self.upload(file_path)
+                async with import_slots:
+                    result = await self.scan_import(file_name, dest_folder)
+            except NESSUS_ERRORS as e:
+                result = e
+
+            if callback is not None:
+                callback(file_path, result)
+            return file_path, result
+
+        return await asyncio.gather(*(one(file_path) for file_path in file_paths))
+
+    async def scan_details(self, scan_id):
+        """Summary of a scan with its list of hosts"""
+        return await self.action("scans/" + str(scan_id), "get")
+
+    async def host_details(self, scan_id, host_id):
+        """A host's properties and the plugins that fired on it"""
+        return await self.action(
+            "scans/" + str(scan_id) + "/hosts/" + str(host_id), "get"
+        )
+
+    async def plugin_details(self, scan_id, host_id, plugin_id):
+        """A plugin's output and ports on one host"""
+        return await self.action(
+            "scans/"
+            + str(scan_id)
+            + "/hosts/"
+            + str(host_id)
+            + "/plugins/"
+            + str(plugin_id),
+            "get",
+        )
+
+    async def report_hosts(
+        self, scan_id, port_plugins=(), concurrency=10, callback=None
+    ):
+        """
+        Read a scan's hosts and findings straight from the JSON API instead
+        of exporting and parsing a .nessus file. Hosts are fetched
+        concurrently, a host that fails doesn't stop the others.
+
+        The host endpoint lists each plugin once with an instance count but
+        without ports, so findings get no port unless the plugin is in
+        port_plugins. Those cost one more request per host and plugin.
+        :param scan_id: Scan ID
+        :param port_plugins: Plugin IDs to look up the ports of
+        :param concurrency: Maximum simultaneous requests
+        :param callback: Called with (host, ReportHost or exception) as each host finishes
+        :return: List of (host, ReportHost or exception) in the scan's host order
+        :rtype: list
+        """
+        scan = await self.scan_details(scan_id)
+        port_plugins = frozenset(str(plugin_id) for plugin_id in port_plugins)
+        slots = asyncio.Semaphore(concurrency)
+
+        async def plugin_ports(host_id, plugin_id):
+            async with slots:
+                plugin = await self.plugin_details(scan_id, host_id, plugin_id)
+            return plugin_id, parse_plugin_ports(plugin)
+
+        async def one(host):
+            try:
+                async with slots:
+                    details = await self.host_details(scan_id, host["host_id"])
+                ports = await asyncio.gather(
+                    *(
+                        plugin_ports(host["host_id"], str(vuln["plugin_id"]))
+                        for vuln in details.get("vulnerabilities") or []
+                        if str(vuln["plugin_id"]) in port_plugins
+                    ),
+                    return_exceptions=True,
+                )
+                for port in ports:
+                    if isinstance(port, Exception):
+                        raise port
+                result = json_report_host(host, details, dict(ports))
+            except NESSUS_ERRORS as e:
+                result = e
+
+            if callback is not None:
+                callback(host, result)
+            return host, result
+
+        return await asyncio.gather(*(one(host) for host in scan.get("hosts") or []))
+
+    async def export_scan(self, scan_id, export_format="nessus", dbpasswd=""):
+        """
+        Ask the server to start exporting a scan
+        :return: The export's file ID
+        """
+        if export_format == "db":
+            data = {"format": "db", "password": dbpasswd}
+        else:
+            data = {"format": export_format}
+        res = await self.action("scans/" + str(scan_id) + "/export", "post", extra=data)
+        return res["file"]
+
+    async def wait_for_export(self, scan_id, file_id):
+        """
+        Poll an export until the server reports it ready, backing off as
+        described in poll_delays(). Raises NessusException if the export
+        fails or isn't ready within export_timeout seconds.
+        :return: Seconds until the export was ready
+        :rtype: float
+        """
+        start = time.perf_counter()
+        polls = 0
+        for delay in poll_delays(ceiling=self.poll_ceiling):
+            await asyncio.sleep(
+                export_poll_delay(scan_id, file_id, start, delay, self.export_timeout)
+            )
+            polls += 1
+            res = await self.action(
+                "scans/" + str(scan_id) + "/export/" + str(file_id) + "/status", "get"
+            )
+            if check_export_status(scan_id, file_id, res):
+                break
+
+        return record_export_wait(
+            self.export_waits, scan_id, file_id, time.perf_counter() - start, polls
+        )
+
+    async def download_export(
+        self, scan_id, file_id, output_file, progress=None, retries=5, chunk_size=2**20
+    ):
+        """
+        Stream a finished export to disk, resuming with an HTTP Range request
+        if the connection drops. See nessus6Lib.download_export().
+        :param output_file: Path to save the export to
+        :param progress: Called with (bytes received, total bytes or None, seconds elapsed)
+        :param retries: Times to reconnect after a dropped connection
+        :param chunk_size: Bytes read from the socket at a time
+        :return: output_file
+        """
+        action = "scans/%s/export/%s/download" % (scan_id, file_id)
+        url = "%s/%s" % (self.url, action)
+        async with self.download_slots:
+            return await self._download_export(
+                url, action, output_file, progress, retries, chunk_size
+            )
+
+    async def _download_export(
+        self, url, action, output_file, progress, retries, chunk_size
+    ):
+        # Only a stalled read should time out, not a long download
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=self.timeout)
+        download = PartialDownload(output_file, source=url, progress=progress)
+        attempt = 0
+
+        try:
+            while True:
+                start = time.perf_counter()
+                status = None
+                bytes_in = 0
+                try:
+                    async with self.session.get(
+                        url, headers=download.request_headers(), timeout=timeout
+                    ) as req:
+                        status = req.status
+                        ready = download.begin(
+                            req.status,
+                            req.headers.get("Content-Length"),
+                            req.headers.get("Content-Range"),
+                            req.headers.get("ETag"),
+                            req.headers.get("Last-Modified"),
+                        )
+                        if ready is None:
+                            continue
+                        if not ready:
+                            raise_for_download_status(req.status, await req.read(), url)
+                        async for chunk in req.content.iter_chunked(chunk_size):
+                            download.write(chunk)
+                            bytes_in += len(chunk)
+
+                    if download.complete():
+                        return download.finish()
+                except (
+                    aiohttp.ClientConnectionError,
+                    aiohttp.ClientPayloadError,
+                    asyncio.TimeoutError,
+                ):
+                    pass
+                finally:
+                    self.metrics.record(
+                        "get",
+                        action,
+                        status,
+                        time.perf_counter() - start,
+                        bytes_in=bytes_in,
+                        retry=attempt > 0,
+                    )
+
+                # Dropped connection or short body, pick up where we left off
+                attempt += 1
+                if attempt > retries:
+                    raise NessusException.FailureToConnect(
+                        "Download from %s kept failing after %d bytes.\nExiting!\n"
+                        % (url, download.received)
+                    )
+                await asyncio.sleep(min(2**attempt, 30))
+        except BaseException:
+            download.abort()
+            raise
+
+    async def download_scan(
+        self, scan_id, output_file, export_format="nessus", dbpasswd="", progress=None
+    ):
+        """
+        Export, wait for and stream a single scan to disk
+        :return: output_file
+        """
+        file_id = await self.export_scan(scan_id, export_format, dbpasswd)
+        await self.wait_for_export(scan_id, file_id)
+        return await self.download_export(
+            scan_id, file_id, output_file, progress=progress
+        )
+
+    async def download_scans(
+        self,
+        scans,
+        output_path,
+        export_format="nessus",
+        callback=None,
+        progress=None,
+    ):
+        """
+        Export several scans at once and download them as they become ready.
+
+        Every export is started up front and all of them are polled together,
+        so the total wait is roughly that of the slowest export. How long each
+        took to become ready is kept in export_waits. At most concurrency
+        downloads, as given to the constructor, run at the same time. Scans
+        are saved as <name>.<format>, or <name>_<id>.<format> when several
+        of them share a name.
+        :param scans: List of scan dicts from list_scans()
+        :param output_path: Directory to save the exports to
+        :param export_format: nessus, pdf, html or csv
+        :param callback: Called with (scan, path or exception) as each scan finishes
+        :param progress: Called with (scan, bytes received, total bytes or None)
+        :return: List of (scan, path or exception) in the order given
+        :rtype: list
+        """
+        paths = export_paths(scans, output_path, export_format)
+
+        async def one(scan):
+            try:
+                file_id = await self.export_scan(scan["id"], export_format)
+                await self.wait_for_export(scan["id"], file_id)
+                if progress is not None:
+
+                    def scan_progress(received, total, elapsed):
+                        progress(scan, received, total)
+
+                else:
+                    scan_progress = None
+
+                result = await self.download_export(
+                    scan["id"], file_id, paths[scan["id"]], progress=scan_progress
+                )
+            except NESSUS_ERRORS as e:
+                result = e
+
+            if callback is not None:
+                callback(scan, result)
+            return scan, result
+
+        return await asyncio.gather(*(one(scan) for scan in scans))
+
+
+async def fan_out(servers, work, concurrency=10, metrics=None):
+    """
+    Run the same work against several Nessus servers at once. Every server
+    gets its own nessus6AsyncLib and so its own connection pool, a server
+    that fails doesn't stop the others.
+    :param servers: List of dicts with name, target, access_key and secret_key,
+                    see lazyTools.nessusServerConfigs()
+    :param work: Coroutine function called with (server, client)
+    :param concurrency: Simultaneous downloads per server
+    :param metrics: RequestMetrics shared by every client
+    :return: List of (server, result or exception) in the order given
+    :rtype: list
+    """
+
+    async def one(server):
+        try:
+            async with nessus6AsyncLib(
+                url=server["target"],
+                api_akey=server["access_key"],
+                api_skey=server["secret_key"],
+                concurrency=concurrency,
+                metrics=metrics,
+            ) as client:
+                return server, await work(server, client)
+        except NESSUS_ERRORS as e:
+            return server, e
+
+    return await asyncio.gather(*(one(server) for server in servers))
+
+
+def export_paths(scans, output_path, export_format):
+    """
+    Pick a file for each scan's export. Scans that share a name get their
+    ID appended, so concurrent downloads never write to the same file.
+    :param scans: List of scan dicts from list_scans()
+    :return: Dict of scan ID to path
+    :rtype: dict
+    """
+    names = collections.Counter(scan["name"] for scan in scans)
+    paths = dict()
+    for scan in scans:
+        name = scan["name"]
+        if names[name] > 1:
+            name = "{}_{}".format(name, scan["id"])
+        paths[scan["id"]] = "{}.{}".format(
+            os.path.join(output_path, name), export_format
+        )
+    return paths
+
+
+def parse_plugin_ports(plugin):
+    """
+    Get the ports from a plugin_details() response
+    :return: List of (port, protocol, svc_name)
+    :rtype: list
+    """
+    ports = list()
+    for output in plugin.get("outputs") or []:
+        # Keys look like '443 / tcp / www'
+        for key in output.get("ports") or {}:
+            port = tuple(part.strip() for part in key.split("/"))
+            if len(port) == 3 and port not in ports:
+                ports.append(port)
+    return ports
+
+
+def json_report_host(host, details, plugin_ports):
+    """
+    Build a ReportHost like nessusParseLib's from the JSON API
+    :param host: Entry of the scan's host list
+    :param details: host_details() response
+    :param plugin_ports: Dict of plugin ID to parse_plugin_ports() lists
+    :rtype: ReportHost
+    """
+    name = host.get("hostname")
+    properties = {
+        key: str(value)
+        for key, value in (details.get("info") or {}).items()
+        if isinstance(value, (str, int, float))
+    }
+
+    items = list()
+    for vuln in details.get("vulnerabilities") or []:
+        plugin_id = str(vuln["plugin_id"])
+        severity = str(vuln.get("severity", 0))
+        plugin_name = vuln.get("plugin_name")
+        if plugin_id in plugin_ports:
+            for port, protocol, svc_name in plugin_ports[plugin_id]:
+                items.append(
+                    ReportItem(
+                        name,
+                        port,
+                        protocol,
+                        svc_name,
+                        plugin_id,
+                        severity,
+                        plugin_name,
+                        None,
+                    )
+                )
+        else:
+            # One item per instance, like the ReportItems of a .nessus file
+            for _ in range(max(1, vuln.get("count") or 1)):
+                items.append(
+                    ReportItem(
+                        name, None, None, None, plugin_id, severity, plugin_name, None
+                    )
+                )
+
+    return ReportHost(name, properties, items)
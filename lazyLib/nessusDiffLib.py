@@ -0,0 +1,155 @@
+# Standard Library
+from collections import namedtuple
+import os
+import sqlite3
+import tempfile
+
+# LazyLib Tools
+from lazyLib import nessusParseLib
+
+__version__ = "1.0"
+
+# One row of a scan-to-scan comparison. Severity and name come from the new
+# scan for new and persisting findings and from the old scan for fixed ones.
+DiffFinding = namedtuple(
+    "DiffFinding", ["status", "host", "port", "pluginID", "severity", "pluginName"]
+)
+
+DIFF_STATUSES = ["new", "fixed", "persisting"]
+
+
+class NessusDiff(object):
+    """
+    Compare an old and a new set of Nessus files on (host, port, pluginID).
+
+    Both sides are streamed into keyed tables in a scratch SQLite database and
+    joined there, so memory stays bounded no matter how many findings there
+    are and neither side's DOM is ever built.
+    """
+
+    # Number of findings written per transaction while loading a side
+    batch_size = 10000
+
+    def __init__(self, scratch_dir=None, min_severity=0, cache_path=None):
+        self.min_severity = min_severity
+        self.cache_path = cache_path
+
+        fd, self.db_path = tempfile.mkstemp(
+            prefix="nessus_diff_", suffix=".sqlite", dir=scratch_dir
+        )
+        os.close(fd)
+
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        for side in ("old", "new"):
+            self.conn.execute("""
+                CREATE TABLE {} (
+                    host TEXT NOT NULL,
+                    port TEXT NOT NULL,
+                    pluginID TEXT NOT NULL,
+                    severity TEXT,
+                    pluginName TEXT,
+                    PRIMARY KEY (host, port, pluginID)
+                ) WITHOUT ROWID
+                """.format(side))
+
+    def close(self):
+        self.conn.close()
+        os.remove(self.db_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def load(self, side, file_paths):
+        """
+        Stream the findings of a set of Nessus files into one side of the diff.
+        When a key is reported more than once the last sighting wins.
+        :param side: 'old' or 'new'
+        :param file_paths: List of paths to .nessus files
+        :return: Number of findings read
+        :rtype: int
+        """
+        if side not in ("old", "new"):
+            raise ValueError("side must be 'old' or 'new', not {}".format(side))
+
+        query = "INSERT OR REPLACE INTO {} VALUES (?, ?, ?, ?, ?)".format(side)
+        count = 0
+        batch = list()
+
+        for nessus_file_path in file_paths:
+            for host in nessusParseLib.iter_file_hosts(
+                nessus_file_path, cache_path=self.cache_path
+            ):
+                for i in host.items:
+                    if int(i.severity or 0) < self.min_severity:
+                        continue
+                    batch.append((i.host, i.port, i.pluginID, i.severity, i.pluginName))
+                    count += 1
+
+                if len(batch) >= self.batch_size:
+                    with self.conn:
+                        self.conn.executemany(query, batch)
+                    batch = list()
+
+        with self.conn:
+            self.conn.executemany(query, batch)
+
+        return count
+
+    def iter_status(self, status):
+        """
+        Stream the findings with a given status, ordered by host, port and plugin
+        :param status: One of DIFF_STATUSES
+        :return: Generator of DiffFinding tuples
+        """
+        if status == "new":
+            query = """
+                SELECT n.host, n.port, n.pluginID, n.severity, n.pluginName
+                FROM new n LEFT JOIN old o
+                  ON o.host = n.host AND o.port = n.port AND o.pluginID = n.pluginID
+                WHERE o.host IS NULL
+                ORDER BY n.host, n.port, n.pluginID
+            """
+        elif status == "fixed":
+            query = """
+                SELECT o.host, o.port, o.pluginID, o.severity, o.pluginName
+                FROM old o LEFT JOIN new n
+                  ON n.host = o.host AND n.port = o.port AND n.pluginID = o.pluginID
+                WHERE n.host IS NULL
+                ORDER BY o.host, o.port, o.pluginID
+            """
+        elif status == "persisting":
+            query = """
+                SELECT n.host, n.port, n.pluginID, n.severity, n.pluginName
+                FROM new n JOIN old o
+                  ON o.host = n.host AND o.port = n.port AND o.pluginID = n.pluginID
+                ORDER BY n.host, n.port, n.pluginID
+            """
+        else:
+            raise ValueError("Unknown diff status {}".format(status))
+
+        for row in self.conn.execute(query):
+            yield DiffFinding(status, *row)
+
+    def counts(self):
+        """
+        Count the findings in each status
+        :return: Dict of status to count
+        :rtype: dict
+        """
+        old_total = self.conn.execute("SELECT COUNT(*) FROM old").fetchone()[0]
+        new_total = self.conn.execute("SELECT COUNT(*) FROM new").fetchone()[0]
+        persisting = self.conn.execute("""
+            SELECT COUNT(*) FROM new n JOIN old o
+              ON o.host = n.host AND o.port = n.port AND o.pluginID = n.pluginID
+            """).fetchone()[0]
+
+        return {
+            "new": new_total - persisting,
+            "fixed": old_total - persisting,
+            "persisting": persisting,
+        }
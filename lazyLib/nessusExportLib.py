@@ -0,0 +1,250 @@
+# Standard Library
+import os
+import shutil
+import tempfile
+import zipfile
+
+# LazyLib Tools
+from lazyLib import nessusParseLib
+
+__version__ = "1.0"
+
+# Column name and type of every exported finding. Numeric columns are ints so
+# they can be filtered and grouped without parsing strings.
+FINDING_COLUMNS = [
+    ("host", "string"),
+    ("port", "int32"),
+    ("protocol", "string"),
+    ("pluginID", "int64"),
+    ("severity", "int8"),
+    ("pluginName", "string"),
+]
+
+PLUGIN_OUTPUT_COLUMN = ("plugin_output", "string")
+
+EXPORT_FORMATS = ["parquet", "feather", "npz"]
+
+
+def finding_columns(plugin_output=False):
+    """
+    List the columns written for each finding
+    :param plugin_output: Include the plugin_output column
+    :return: List of (name, type) tuples
+    :rtype: list
+    """
+    if plugin_output:
+        return FINDING_COLUMNS + [PLUGIN_OUTPUT_COLUMN]
+    return list(FINDING_COLUMNS)
+
+
+def iter_finding_batches(file_paths, batch_size=65536, plugin_output=False):
+    """
+    Stream the findings of several Nessus files as column batches
+    :param file_paths: List of paths to .nessus files
+    :param batch_size: Maximum number of rows in a batch
+    :param plugin_output: Include the plugin_output column
+    :return: Generator of {column name: list of values} dicts
+    """
+    columns = [name for name, _ in finding_columns(plugin_output)]
+    batch = {name: list() for name in columns}
+    rows = 0
+
+    for nessus_file_path in file_paths:
+        for item in nessusParseLib.iter_report_items(
+            nessus_file_path, plugin_output=plugin_output
+        ):
+            batch["host"].append(item.host)
+            batch["port"].append(int(item.port or 0))
+            batch["protocol"].append(item.protocol)
+            batch["pluginID"].append(int(item.pluginID or 0))
+            batch["severity"].append(int(item.severity or 0))
+            batch["pluginName"].append(item.pluginName)
+            if plugin_output:
+                batch["plugin_output"].append(item.plugin_output)
+            rows += 1
+
+            if rows >= batch_size:
+                yield batch
+                batch = {name: list() for name in columns}
+                rows = 0
+
+    if rows:
+        yield batch
+
+
+def arrow_schema(plugin_output=False):
+    """Build the pyarrow schema for the exported findings"""
+    import pyarrow
+
+    return pyarrow.schema(
+        [
+            (name, getattr(pyarrow, column_type)())
+            for name, column_type in finding_columns(plugin_output)
+        ]
+    )
+
+
+def write_parquet(batches, output_path, plugin_output=False):
+    """
+    Write each batch as a Parquet row group
+    :return: Number of rows written
+    :rtype: int
+    """
+    import pyarrow
+    import pyarrow.parquet
+
+    schema = arrow_schema(plugin_output)
+    rows = 0
+    with pyarrow.parquet.ParquetWriter(output_path, schema) as writer:
+        for batch in batches:
+            writer.write_table(pyarrow.Table.from_pydict(batch, schema=schema))
+            rows += len(batch["host"])
+    return rows
+
+
+def write_feather(batches, output_path, plugin_output=False):
+    """
+    Write each batch as a record batch of a Feather (Arrow IPC) file
+    :return: Number of rows written
+    :rtype: int
+    """
+    import pyarrow
+    import pyarrow.ipc
+
+    schema = arrow_schema(plugin_output)
+    rows = 0
+    with pyarrow.ipc.new_file(output_path, schema) as writer:
+        for batch in batches:
+            writer.write_batch(pyarrow.RecordBatch.from_pydict(batch, schema=schema))
+            rows += len(batch["host"])
+    return rows
+
+
+def write_npz(batches, output_path, plugin_output=False):
+    """
+    Write the findings as a NumPy .npz archive.
+
+    Each column is appended to a scratch file batch by batch and only copied
+    into the archive at the end, so memory is bounded by the batch size.
+    Numeric columns are stored as arrays of the same name. String columns are
+    stored as <name>_data, the UTF-8 bytes of every value, and <name>_offsets,
+    where value i is data[offsets[i]:offsets[i + 1]]. Use load_npz() to get
+    them back as arrays of str.
+    :return: Number of rows written
+    :rtype: int
+    """
+    import numpy
+
+    columns = finding_columns(plugin_output)
+    rows = 0
+
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        arrays = dict()
+        offsets = dict()
+
+        def scratch_file(array_name, dtype):
+            arrays[array_name] = (
+                open(os.path.join(scratch_dir, array_name), "wb"),
+                numpy.dtype(dtype),
+            )
+
+        for name, column_type in columns:
+            if column_type == "string":
+                scratch_file(name + "_data", "u1")
+                scratch_file(name + "_offsets", "<i8")
+                offsets[name] = 0
+                numpy.zeros(1, dtype="<i8").tofile(arrays[name + "_offsets"][0])
+            else:
+                scratch_file(name, column_type)
+
+        try:
+            for batch in batches:
+                for name, column_type in columns:
+                    if column_type == "string":
+                        encoded = [
+                            (value or "").encode("utf-8") for value in batch[name]
+                        ]
+                        arrays[name + "_data"][0].write(b"".join(encoded))
+                        ends = numpy.cumsum(
+                            [len(value) for value in encoded], dtype="<i8"
+                        )
+                        (ends + offsets[name]).tofile(arrays[name + "_offsets"][0])
+                        if len(ends):
+                            offsets[name] += int(ends[-1])
+                    else:
+                        numpy.asarray(batch[name], dtype=column_type).tofile(
+                            arrays[name][0]
+                        )
+                rows += len(batch["host"])
+        finally:
+            for scratch, _ in arrays.values():
+                scratch.close()
+
+        with zipfile.ZipFile(
+            output_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True
+        ) as archive:
+            for array_name, (scratch, dtype) in arrays.items():
+                length = os.path.getsize(scratch.name) // dtype.itemsize
+                with archive.open(array_name + ".npy", "w", force_zip64=True) as entry:
+                    numpy.lib.format.write_array_header_1_0(
+                        entry,
+                        {
+                            "descr": numpy.lib.format.dtype_to_descr(dtype),
+                            "fortran_order": False,
+                            "shape": (length,),
+                        },
+                    )
+                    with open(scratch.name, "rb") as f:
+                        shutil.copyfileobj(f, entry)
+
+    return rows
+
+
+def load_npz(npz_path):
+    """
+    Load an .npz written by write_npz(), decoding the string columns
+    :param npz_path: Path to the .npz file
+    :return: Dict of column name to numpy array
+    :rtype: dict
+    """
+    import numpy
+
+    columns = dict()
+    with numpy.load(npz_path) as archive:
+        for array_name in archive.files:
+            if array_name.endswith("_offsets"):
+                name = array_name[: -len("_offsets")]
+                data = archive[name + "_data"].tobytes()
+                bounds = archive[array_name]
+                columns[name] = numpy.array(
+                    [
+                        data[start:end].decode("utf-8")
+                        for start, end in zip(bounds[:-1], bounds[1:])
+                    ],
+                    dtype=object,
+                )
+            elif not array_name.endswith("_data"):
+                columns[array_name] = archive[array_name]
+    return columns
+
+
+WRITERS = {"parquet": write_parquet, "feather": write_feather, "npz": write_npz}
+
+
+def export_findings(
+    file_paths, output_path, export_format, batch_size=65536, plugin_output=False
+):
+    """
+    Convert Nessus files into a columnar findings table
+    :param file_paths: List of paths to .nessus files
+    :param output_path: File to write
+    :param export_format: One of EXPORT_FORMATS
+    :param batch_size: Rows per row group / record batch
+    :param plugin_output: Include the plugin_output column
+    :return: Number of rows written
+    :rtype: int
+    """
+    batches = iter_finding_batches(
+        file_paths, batch_size=batch_size, plugin_output=plugin_output
+    )
+    return WRITERS[export_format](batches, output_path, plugin_output=plugin_output)
@@ -0,0 +1,266 @@
+# Standard Library
+from collections import namedtuple
+import os
+import sqlite3
+
+# LazyLib Tools
+from lazyLib import nessusParseLib
+
+__version__ = "1.0"
+
+# One search hit. snippet is the matching part of the plugin output.
+SearchResult = namedtuple(
+    "SearchResult",
+    ["path", "host", "port", "pluginID", "severity", "pluginName", "snippet"],
+)
+
+
+class NessusIndex(object):
+    """
+    Persistent SQLite FTS5 index over plugin output, plugin names and host
+    properties of Nessus files. Files that haven't changed since they were
+    last indexed are skipped, changed files are re-indexed in place.
+    """
+
+    DEFAULT_PATH = "~/.lazy/nessus_index.sqlite"
+
+    # Number of findings written per transaction while indexing a file
+    batch_size = 5000
+
+    def __init__(self, index_path=DEFAULT_PATH):
+        self.index_path = os.path.expanduser(index_path)
+        index_dir = os.path.dirname(self.index_path)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+
+        self.conn = sqlite3.connect(self.index_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            with self.conn:
+                self.conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS files (
+                        id INTEGER PRIMARY KEY,
+                        path TEXT NOT NULL UNIQUE,
+                        size INTEGER NOT NULL,
+                        mtime REAL NOT NULL,
+                        sha256 TEXT NOT NULL,
+                        first_rowid INTEGER,
+                        last_rowid INTEGER
+                    );
+                    CREATE VIRTUAL TABLE IF NOT EXISTS findings USING fts5 (
+                        host,
+                        properties,
+                        pluginName,
+                        plugin_output,
+                        port UNINDEXED,
+                        pluginID UNINDEXED,
+                        severity UNINDEXED,
+                        file_id UNINDEXED
+                    );
+                    """)
+        except sqlite3.OperationalError as e:
+            self.conn.close()
+            raise NessusIndexException.FTS5NotAvailable(
+                "The SQLite library doesn't support FTS5: {}".format(e)
+            ) from None
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def is_current(self, nessus_file_path):
+        """
+        Check if a file is already indexed and unchanged
+        :param nessus_file_path: Path to a .nessus file
+        :rtype: bool
+        """
+        stat = os.stat(nessus_file_path)
+        row = self.conn.execute(
+            "SELECT size, mtime, sha256 FROM files WHERE path = ?",
+            (nessus_file_path,),
+        ).fetchone()
+
+        if row is None or row[0] != stat.st_size:
+            return False
+
+        if row[1] == stat.st_mtime:
+            return True
+
+        if row[2] == nessusParseLib.NessusCache.sha256(nessus_file_path):
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE files SET mtime = ? WHERE path = ?",
+                    (stat.st_mtime, nessus_file_path),
+                )
+            return True
+
+        return False
+
+    def remove(self, nessus_file_path):
+        """Drop a file and its findings from the index"""
+        row = self.conn.execute(
+            "SELECT id, first_rowid, last_rowid FROM files WHERE path = ?",
+            (nessus_file_path,),
+        ).fetchone()
+        if row is None:
+            return
+
+        with self.conn:
+            if row[2] is not None:
+                self.conn.execute(
+                    "DELETE FROM findings WHERE rowid BETWEEN ? AND ?", (row[1], row[2])
+                )
+            else:
+                # Left behind by an interrupted run, fall back to a full scan
+                self.conn.execute("DELETE FROM findings WHERE file_id = ?", (row[0],))
+            self.conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    def add(self, nessus_file_path):
+        """
+        Index a file, replacing any earlier copy of it
+        :param nessus_file_path: Path to a .nessus file
+        :return: Number of findings indexed
+        :rtype: int
+        """
+        self.remove(nessus_file_path)
+
+        stat = os.stat(nessus_file_path)
+        sha256 = nessusParseLib.NessusCache.sha256(nessus_file_path)
+
+        with self.conn:
+            # Findings of one file get a contiguous block of rowids
+            first_rowid = (
+                self.conn.execute("SELECT MAX(rowid) FROM findings").fetchone()[0] or 0
+            ) + 1
+            # A size of -1 marks the file as partially indexed
+            file_id = self.conn.execute(
+                """
+                INSERT INTO files (path, size, mtime, sha256, first_rowid)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (nessus_file_path, -1, stat.st_mtime, sha256, first_rowid),
+            ).lastrowid
+
+        count = 0
+        batch = list()
+        try:
+            for host in nessusParseLib.iter_report_hosts(
+                nessus_file_path, plugin_output=True
+            ):
+                properties = " ".join(
+                    "{}={}".format(name, value)
+                    for name, value in host.properties.items()
+                )
+                for i in host.items:
+                    batch.append(
+                        (
+                            first_rowid + count,
+                            i.host,
+                            properties,
+                            i.pluginName,
+                            i.plugin_output,
+                            i.port,
+                            i.pluginID,
+                            i.severity,
+                            file_id,
+                        )
+                    )
+                    count += 1
+
+                if len(batch) >= self.batch_size:
+                    self._store(batch)
+                    batch = list()
+            self._store(batch)
+        except BaseException:
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM findings WHERE rowid >= ?", (first_rowid,)
+                )
+                self.conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            raise
+
+        # The real size marks the file as completely indexed
+        with self.conn:
+            self.conn.execute(
+                "UPDATE files SET size = ?, last_rowid = ? WHERE id = ?",
+                (stat.st_size, first_rowid + count - 1, file_id),
+            )
+
+        return count
+
+    def _store(self, batch):
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO findings (rowid, host, properties, pluginName,
+                    plugin_output, port, pluginID, severity, file_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                batch,
+            )
+
+    def update(self, file_paths):
+        """
+        Index every new or changed file
+        :param file_paths: List of paths to .nessus files
+        :return: List of (path, number of findings) for the files indexed
+        :rtype: list
+        """
+        indexed = list()
+        for nessus_file_path in file_paths:
+            if not self.is_current(nessus_file_path):
+                indexed.append((nessus_file_path, self.add(nessus_file_path)))
+        return indexed
+
+    def search(self, query, limit=100):
+        """
+        Run an FTS5 query against the index
+        :param query: FTS5 query, e.g. 'openssl AND "1.0.2"' or 'host:"10.0.0.1"'
+        :param limit: Maximum number of results, 0 for no limit
+        :return: Generator of SearchResult tuples, best match first
+        """
+        sql = """
+            SELECT f.path, findings.host, findings.port, findings.pluginID,
+                   findings.severity, findings.pluginName,
+                   snippet(findings, 3, '[', ']', '...', 12)
+            FROM findings JOIN files f ON f.id = findings.file_id
+            WHERE findings MATCH ?
+            ORDER BY rank
+        """
+        params = [query]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        try:
+            for row in self.conn.execute(sql, params):
+                yield SearchResult(*row)
+        except sqlite3.OperationalError as e:
+            raise NessusIndexException.InvalidQuery(
+                "'{}' is not a valid search: {}. Put terms with punctuation, "
+                "such as IP addresses, in double quotes.".format(query, e)
+            ) from None
+
+    def stats(self):
+        """
+        :return: Number of indexed files and findings
+        :rtype: tuple
+        """
+        files = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        findings = self.conn.execute("SELECT COUNT(*) FROM findings").fetchone()[0]
+        return files, findings
+
+
+class NessusIndexException(Exception):
+    """General Exception"""
+
+    class FTS5NotAvailable(Exception):
+        """SQLite was built without the FTS5 extension"""
+
+    class InvalidQuery(Exception):
+        """The search couldn't be parsed by FTS5"""
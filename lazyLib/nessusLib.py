@@ -1,12 +1,12 @@
 import os
 import sys
 import atexit
+import random
 import time
 import requests
 import json
 
-import requests
-
+from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
 requests.packages.urllib3.disable_warnings()
@@ -32,6 +32,10 @@ class nessus6Lib(object):
         insecure=False,
         ca_bundle="",
         debug=False,
+        pool_maxsize=10,
+        timeout=300,
+        poll_ceiling=30,
+        export_timeout=3600,
     ):
         self.api_akey = None
         self.api_skey = None
@@ -83,14 +87,42 @@ class nessus6Lib(object):
         self.host_details = {}
         self.host_ids = {}
         self.debug = debug
+        self.timeout = timeout
+        self.metrics = RequestMetrics()
+        self.poll_ceiling = poll_ceiling
+        self.export_timeout = export_timeout
+        self.export_waits = []
 
         if insecure and hasattr(requests, "packages"):
             requests.packages.urllib3.disable_warnings()
 
+        # One keep-alive connection pool for every call to the scanner
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Figure out if we should verify SSL connection (possibly with a user
+        # supplied CA bundle). Default to true.
+        if self.insecure:
+            self.session.verify = False
+        elif self.ca_bundle:
+            self.session.verify = self.ca_bundle
+        else:
+            self.session.verify = True
+
         if api_akey and api_skey:
             self.api_akey = api_akey
             self.api_skey = api_skey
             self.use_api = True
+            self.session.headers.update(
+                {
+                    "X-ApiKeys": "accessKey="
+                    + self.api_akey
+                    + "; secretKey="
+                    + self.api_skey
+                }
+            )
         else:
             # Initial login to get our token for all subsequent transactions
             self._login(login, password)
@@ -116,6 +148,7 @@ class nessus6Lib(object):
 
         try:
             self.token = self.res["token"]
+            self.session.headers.update({"X-Cookie": "token=" + str(self.token)})
 
         except KeyError:
             if self.res["error"]:
@@ -130,6 +163,13 @@ class nessus6Lib(object):
 
     def __exit__(self, exception_type, exception_value, traceback):
         self._log_out()
+        self.close()
+
+    def close(self):
+        """
+        Close the pooled connections to the scanner
+        """
+        self.session.close()
 
     ################################################################################
     def _get_permissions(self):
@@ -180,23 +220,19 @@ class nessus6Lib(object):
         download=False,
         private=False,
         retry=True,
+        retried=False,
     ):
         """
         Generic actions for REST interface. The json_req may be unneeded, but
         the plugin searching functionality does not use a JSON-esque request.
         This is a backup setting to be able to change content types on the fly.
+        Every request is recorded in self.metrics, retried marks a call as the
+        retry of an earlier one.
         """
         payload = {}
         payload.update(extra)
-        if self.use_api:
-            headers = {
-                "X-ApiKeys": "accessKey="
-                + self.api_akey
-                + "; secretKey="
-                + self.api_skey
-            }
-        else:
-            headers = {"X-Cookie": "token=" + str(self.token)}
+        # Authentication headers live on the session
+        headers = {}
 
         if json_req:
             headers.update({"Content-type": "application/json", "Accept": "text/plain"})
@@ -216,21 +252,26 @@ class nessus6Lib(object):
             print("METHOD  : %s" % method)
             print("\n")
 
-        # Figure out if we should verify SSL connection (possibly with a user
-        # supplied CA bundle). Default to true.
-        if self.insecure:
-            verify = False
-        elif self.ca_bundle:
-            verify = self.ca_bundle
-        else:
-            verify = True
-
+        start = time.perf_counter()
         try:
-            print(method)
-            print(url)
-            print(payload)
-            req = requests.request(
-                method, url, data=payload, files=files, verify=False, headers=headers
+            req = self.session.request(
+                method,
+                url,
+                data=payload,
+                files=files,
+                headers=headers,
+                timeout=self.timeout,
+                # Passed explicitly, REQUESTS_CA_BUNDLE would override the session
+                verify=self.session.verify,
+            )
+            self.metrics.record(
+                method,
+                action,
+                req.status_code,
+                time.perf_counter() - start,
+                bytes_out=body_size(req.request.body),
+                bytes_in=len(req.content),
+                retry=retried,
             )
 
             if not download and req.text:
@@ -285,6 +326,9 @@ class nessus6Lib(object):
         except requests.exceptions.SSLError as ssl_error:
             raise SSLException("%s for %s." % (ssl_error, url))
         except requests.exceptions.ConnectionError:
+            self.metrics.record(
+                method, action, None, time.perf_counter() - start, retry=retried
+            )
             raise NessusException.FailureToConnect(
                 "Could not connect to %s.\nExiting!\n" % url
             ) from None
@@ -301,6 +345,7 @@ class nessus6Lib(object):
                     download=download,
                     private=private,
                     retry=False,
+                    retried=True,
                 )
 
     ################################################################################
@@ -328,9 +373,11 @@ class nessus6Lib(object):
         self.action(action="scans/import", method="post", extra=data, json_req=True)
 
     ################################################################################
-    def download_scan(self, scan_id, export_format="nessus", dbpasswd=""):
-        running = True
-        counter = 0
+    def export_scan(self, scan_id, export_format="nessus", dbpasswd=""):
+        """
+        Ask the server to start exporting a scan
+        :return: The export's file ID
+        """
         self.scan_id = scan_id
 
         self.action("scans/" + str(self.scan_id), method="get")
@@ -340,22 +387,139 @@ class nessus6Lib(object):
             data = {"format": export_format}
         self.action("scans/" + str(self.scan_id) + "/export", method="post", extra=data)
 
-        file_id = self.res["file"]
-        # print('Download for file id ' + str(self.res['file']) + '.')
-        while running:
-            time.sleep(2)
-            counter += 2
+        return self.res["file"]
+
+    ################################################################################
+    def wait_for_export(self, scan_id, file_id):
+        """
+        Poll an export until the server reports it ready, backing off as
+        described in poll_delays(). Raises NessusException if the export
+        fails or isn't ready within export_timeout seconds.
+        :return: Seconds until the export was ready
+        :rtype: float
+        """
+        start = time.perf_counter()
+        polls = 0
+        for delay in poll_delays(ceiling=self.poll_ceiling):
+            time.sleep(
+                export_poll_delay(scan_id, file_id, start, delay, self.export_timeout)
+            )
+            polls += 1
             self.action(
-                "scans/" + str(self.scan_id) + "/export/" + str(file_id) + "/status",
+                "scans/" + str(scan_id) + "/export/" + str(file_id) + "/status",
                 method="get",
             )
-            running = self.res["status"] != "ready"
-            # sys.stdout.write(".")
-            # sys.stdout.flush()
-            if counter % 60 == 0:
-                pass  # print("")
-        #
-        # print("")
+            if check_export_status(scan_id, file_id, self.res):
+                break
+
+        return record_export_wait(
+            self.export_waits, scan_id, file_id, time.perf_counter() - start, polls
+        )
+
+    ################################################################################
+    def download_export(
+        self, scan_id, file_id, output_file, progress=None, retries=5, chunk_size=2**20
+    ):
+        """
+        Stream a finished export to disk. The body is written in chunks to
+        output_file.part, resumed with an HTTP Range request if the connection
+        drops and renamed over output_file once complete, so memory use doesn't
+        grow with the size of the export. A .part file left by an earlier
+        failed download of the same export is resumed too.
+        :param output_file: Path to save the export to
+        :param progress: Called with (bytes received, total bytes or None, seconds elapsed)
+        :param retries: Times to reconnect after a dropped connection
+        :param chunk_size: Bytes read from the socket at a time
+        :return: output_file
+        """
+        action = "scans/" + str(scan_id) + "/export/" + str(file_id) + "/download"
+        url = "%s/%s" % (self.url, action)
+        download = PartialDownload(output_file, source=url, progress=progress)
+        attempt = 0
+
+        try:
+            while True:
+                start = time.perf_counter()
+                status = None
+                bytes_in = 0
+                try:
+                    with self.session.get(
+                        url,
+                        headers=download.request_headers(),
+                        stream=True,
+                        timeout=self.timeout,
+                        verify=self.session.verify,
+                    ) as req:
+                        status = req.status_code
+                        ready = download.begin(
+                            req.status_code,
+                            req.headers.get("Content-Length"),
+                            req.headers.get("Content-Range"),
+                            req.headers.get("ETag"),
+                            req.headers.get("Last-Modified"),
+                        )
+                        if ready is None:
+                            continue
+                        if not ready:
+                            raise_for_download_status(req.status_code, req.content, url)
+                        for chunk in req.iter_content(chunk_size):
+                            download.write(chunk)
+                            bytes_in += len(chunk)
+
+                    if download.complete():
+                        return download.finish()
+                except requests.exceptions.SSLError as ssl_error:
+                    raise SSLException("%s for %s." % (ssl_error, url))
+                except (
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout,
+                ):
+                    pass
+                finally:
+                    self.metrics.record(
+                        "get",
+                        action,
+                        status,
+                        time.perf_counter() - start,
+                        bytes_in=bytes_in,
+                        retry=attempt > 0,
+                    )
+
+                # Dropped connection or short body, pick up where we left off
+                attempt += 1
+                if attempt > retries:
+                    raise NessusException.FailureToConnect(
+                        "Download from %s kept failing after %d bytes.\nExiting!\n"
+                        % (url, download.received)
+                    )
+                time.sleep(min(2**attempt, 30))
+        except BaseException:
+            download.abort()
+            raise
+
+    ################################################################################
+    def download_scan(
+        self,
+        scan_id,
+        export_format="nessus",
+        dbpasswd="",
+        output_file=None,
+        progress=None,
+    ):
+        """
+        Export and download a scan
+        :param output_file: Stream the export to this path instead of returning it
+        :param progress: Download progress callback, see download_export()
+        :return: The export's content, or output_file if one was given
+        """
+        file_id = self.export_scan(scan_id, export_format, dbpasswd)
+        self.wait_for_export(self.scan_id, file_id)
+
+        if output_file is not None:
+            return self.download_export(
+                self.scan_id, file_id, output_file, progress=progress
+            )
 
         content = self.action(
             "scans/" + str(self.scan_id) + "/export/" + str(file_id) + "/download",
@@ -366,12 +530,23 @@ class nessus6Lib(object):
 
     ################################################################################
 
-    def list_scans(self):
+    def list_scans(self, last_modification_date=None):
 
-        # List all scans and their containing folder
-        self.action(action="scans", method="get", download=False)
+        # List all scans and their containing folder, or only the scans
+        # modified since a timestamp
+        action = "scans"
+        if last_modification_date is not None:
+            action += "?last_modification_date=%d" % last_modification_date
+        self.action(action=action, method="get", download=False)
         return self.res
 
+    ################################################################################
+    def timing_summary(self):
+        """
+        Summarize the calls made so far, see RequestMetrics.summary()
+        """
+        return self.metrics.summary()
+
     ################################################################################
     def pretty_print(self):
         """
@@ -385,6 +560,326 @@ class nessus6Lib(object):
 ################################################################################
 
 
+def body_size(body):
+    """Size in bytes of a request body"""
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    # Streamed from a file or generator
+    return 0
+
+
+class RequestMetrics(object):
+    """
+    Record of every HTTP request a Nessus client made: method, action,
+    status, seconds taken, bytes sent and received and whether it was a
+    retry. Nothing is printed. Hooks added with add_hook() are called with
+    each record as it's made, summary() and to_json() report on them after.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.hooks = []
+
+    def add_hook(self, hook):
+        """Call hook(record) for every request from now on"""
+        self.hooks.append(hook)
+
+    def record(
+        self, method, action, status, elapsed, bytes_out=0, bytes_in=0, retry=False
+    ):
+        """
+        Note a finished request
+        :param status: HTTP status, None if the connection failed
+        :return: The record
+        :rtype: dict
+        """
+        record = {
+            "method": method.upper(),
+            "action": action,
+            "status": status,
+            "elapsed": elapsed,
+            "bytes_out": bytes_out,
+            "bytes_in": bytes_in,
+            "retry": retry,
+        }
+        self.records.append(record)
+        for hook in self.hooks:
+            hook(record)
+        return record
+
+    def summary(self):
+        """
+        Totals over the requests made so far. The first call pays for the
+        TCP and TLS handshake, later calls reuse the pooled connection.
+        :rtype: dict
+        """
+        elapsed = [record["elapsed"] for record in self.records]
+        if not elapsed:
+            return {"calls": 0}
+
+        return {
+            "calls": len(elapsed),
+            "total": sum(elapsed),
+            "first": elapsed[0],
+            "mean": sum(elapsed) / len(elapsed),
+            "mean_after_first": (
+                sum(elapsed[1:]) / (len(elapsed) - 1)
+                if len(elapsed) > 1
+                else elapsed[0]
+            ),
+            "bytes_out": sum(record["bytes_out"] for record in self.records),
+            "bytes_in": sum(record["bytes_in"] for record in self.records),
+            "retries": sum(1 for record in self.records if record["retry"]),
+            "errors": sum(
+                1 for record in self.records if record["status"] not in (200, 206)
+            ),
+        }
+
+    def to_json(self):
+        """The summary and every request as JSON"""
+        return json.dumps(
+            {"summary": self.summary(), "requests": self.records}, indent=4
+        )
+
+    def dump(self, json_path):
+        """Write to_json() to a file"""
+        with open(json_path, "w") as f:
+            f.write(self.to_json())
+
+
+def poll_delays(initial=0.25, factor=2, ceiling=30, jitter=0.25):
+    """
+    Delays between checks of an export's status. Small exports are usually
+    ready within a second so polling starts fast, then backs off
+    exponentially up to ceiling so large exports don't make hundreds of
+    requests. Every delay is randomised by +/- jitter so concurrent exports
+    don't poll in lockstep.
+    :param initial: First delay in seconds
+    :param factor: Growth of each following delay
+    :param ceiling: Longest delay in seconds
+    :param jitter: Fraction each delay is randomised by
+    :return: Endless generator of delays in seconds
+    """
+    delay = initial
+    while True:
+        yield min(ceiling, delay * random.uniform(1 - jitter, 1 + jitter))
+        delay = min(ceiling, delay * factor)
+
+
+def check_export_status(scan_id, file_id, res):
+    """
+    Read an export status reply
+    :return: True once the export is ready, False while it's still running
+    :rtype: bool
+    """
+    status = res.get("status") if isinstance(res, dict) else None
+    if status == "ready":
+        return True
+    if status not in (None, "error"):
+        # Still loading
+        return False
+    raise NessusException(
+        "Export %s of scan %s failed, the server reported %r"
+        % (file_id, scan_id, status if status is not None else res)
+    )
+
+
+def export_poll_delay(scan_id, file_id, start, delay, export_timeout):
+    """
+    Shorten the delay before the next status check so the last check falls
+    on the deadline, and give up once export_timeout seconds have passed
+    since start. An export_timeout of None waits forever.
+    :return: Seconds to wait before the next check
+    :rtype: float
+    """
+    if export_timeout is None:
+        return delay
+    remaining = export_timeout - (time.perf_counter() - start)
+    if remaining <= 0:
+        raise NessusException(
+            "Export %s of scan %s wasn't ready after %d seconds"
+            % (file_id, scan_id, export_timeout)
+        )
+    return min(delay, remaining)
+
+
+def record_export_wait(export_waits, scan_id, file_id, seconds, polls):
+    """
+    Note how long an export took to become ready
+    :return: seconds
+    """
+    export_waits.append(
+        {"scan_id": scan_id, "file_id": file_id, "seconds": seconds, "polls": polls}
+    )
+    return seconds
+
+
+class PartialDownload(object):
+    """
+    Temporary file an export is streamed into. Keeps track of how much has
+    arrived so a dropped connection can be resumed with an HTTP Range request
+    and is only renamed over the destination once it's complete. Shared by
+    the sync and async clients.
+
+    A failed download leaves its .part file behind, with a .part.json next
+    to it naming the export (source), its length and its ETag or
+    Last-Modified. A later download to the same path only carries on from
+    the .part if it is for the same export, and sends If-Range so the
+    server sends everything again if the export changed. Anything else
+    starts from byte 0.
+    """
+
+    def __init__(self, output_file, source=None, progress=None):
+        """
+        :param output_file: Path to save the download to
+        :param source: What is being downloaded, e.g. the export's URL
+        :param progress: Called with (bytes received, total bytes or None, seconds elapsed)
+        """
+        self.output_file = output_file
+        self.part_path = output_file + ".part"
+        self.meta_path = self.part_path + ".json"
+        self.source = source
+        self.progress = progress
+        self.total = None
+        self.start = time.perf_counter()
+        self.f = open(self.part_path, "ab")
+        self.received = os.path.getsize(self.part_path)
+        self.meta = self.read_meta()
+        if self.received and (source is None or self.meta.get("source") != source):
+            # Left by a download of something else
+            self.restart()
+
+    def read_meta(self):
+        """What an earlier run recorded about the .part file"""
+        try:
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return dict()
+        return meta if isinstance(meta, dict) else dict()
+
+    def save_meta(self, validator):
+        meta = {"source": self.source, "total": self.total, "validator": validator}
+        if meta != self.meta:
+            with open(self.meta_path, "w") as f:
+                json.dump(meta, f)
+            self.meta = meta
+
+    def request_headers(self):
+        """
+        Headers asking for the rest of the body. Compression is turned off so
+        byte offsets and Content-Length match what is written to disk.
+        """
+        headers = {"Accept-Encoding": "identity"}
+        if self.received:
+            headers["Range"] = "bytes=%d-" % self.received
+            if self.meta.get("validator"):
+                headers["If-Range"] = self.meta["validator"]
+        return headers
+
+    def begin(
+        self,
+        status,
+        content_length=None,
+        content_range=None,
+        etag=None,
+        last_modified=None,
+    ):
+        """
+        Prepare for a response body
+        :return: True if the body should be written, False if it's an error,
+                 None if the partial file can't be resumed and the download
+                 has to start over
+        :rtype: bool
+        """
+        if status == 206 and (content_range or "").startswith(
+            "bytes %d-" % self.received
+        ):
+            total = content_range.rpartition("/")[2]
+            if self.meta.get("total") and total != str(self.meta["total"]):
+                # Same URL, but not the export the .part came from
+                self.restart()
+                return None
+        elif status == 200:
+            # Range ignored or If-Range didn't match, everything is sent again
+            self.restart()
+        elif status == 416 and self.received:
+            # The partial file is at least as long as this export
+            self.restart()
+            return None
+        else:
+            return False
+
+        if content_length is not None:
+            self.total = self.received + int(content_length)
+        # Weak ETags can't be used with If-Range
+        if etag and not etag.startswith("W/"):
+            self.save_meta(etag)
+        else:
+            self.save_meta(last_modified)
+        return True
+
+    def restart(self):
+        """Throw away what has been received so far"""
+        self.f.seek(0)
+        self.f.truncate()
+        self.received = 0
+        self.meta = dict()
+        self.remove_meta()
+
+    def remove_meta(self):
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+
+    def write(self, chunk):
+        self.f.write(chunk)
+        self.received += len(chunk)
+        if self.progress is not None:
+            self.progress(self.received, self.total, time.perf_counter() - self.start)
+
+    def complete(self):
+        """Whether the whole body has arrived"""
+        return self.total is None or self.received >= self.total
+
+    def finish(self):
+        """
+        Move the finished download into place
+        :return: Path of the saved file
+        """
+        self.f.close()
+        os.replace(self.part_path, self.output_file)
+        self.remove_meta()
+        return self.output_file
+
+    def abort(self):
+        """Stop a failed download, keeping the .part file to resume from"""
+        self.f.close()
+        if not self.received and os.path.exists(self.part_path):
+            os.remove(self.part_path)
+            self.remove_meta()
+
+
+def raise_for_download_status(status, body, url):
+    """
+    Turn an error response to a download into the matching NessusException
+    """
+    try:
+        error = json.loads(body).get("error", "")
+    except ValueError:
+        error = body.decode("utf-8", "replace")
+
+    if error == "The requested file was not found" or status == 404:
+        raise NessusException.RequestedFileNotFound("Requested file not found")
+    raise NessusException("GET %s returned %d: %s" % (url, status, error))
+
+
+################################################################################
+
+
 class NessusException(Exception):
     """General Exception"""
 
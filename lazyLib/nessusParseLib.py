@@ -0,0 +1,656 @@
+# Standard Library
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import gzip
+import hashlib
+import itertools
+import json
+import lzma
+import mmap
+import os
+import sqlite3
+import sys
+import zlib
+
+# 3rd Party Libs
+from lxml import etree
+
+__version__ = "1.0"
+
+# Raised while reading a truncated or corrupt gzip or xz file
+DECOMPRESSION_ERRORS = (EOFError, OSError, zlib.error, lzma.LZMAError)
+
+# One finding from a .nessus file. plugin_output is None unless requested.
+ReportItem = namedtuple(
+    "ReportItem",
+    [
+        "host",
+        "port",
+        "protocol",
+        "svc_name",
+        "pluginID",
+        "severity",
+        "pluginName",
+        "plugin_output",
+    ],
+)
+
+# One host from a .nessus file along with the findings reported for it.
+ReportHost = namedtuple("ReportHost", ["name", "properties", "items"])
+
+
+# Extensions of plain and compressed Nessus files
+NESSUS_EXTENSIONS = (".nessus",)
+COMPRESSED_NESSUS_EXTENSIONS = (".nessus.gz", ".nessus.xz", ".nessus.zst")
+
+
+def is_nessus_file(filename, compressed=True):
+    """
+    Check if a filename looks like a Nessus file
+    :param filename: Name or path of the file
+    :param compressed: Also accept gzip, xz and zstd compressed Nessus files
+    :rtype: bool
+    """
+    if compressed:
+        return filename.endswith(NESSUS_EXTENSIONS + COMPRESSED_NESSUS_EXTENSIONS)
+    return filename.endswith(NESSUS_EXTENSIONS)
+
+
+def find_nessus_files(paths, compressed=True):
+    """
+    Find every Nessus file in the given files and directories
+    :param paths: Iterable of file or directory paths
+    :param compressed: Also find gzip, xz and zstd compressed Nessus files
+    :return: List of (dirpath, filename) tuples
+    :rtype: list
+    """
+    nessus_list = list()
+
+    for entry in paths:
+        if os.path.isfile(entry):
+            if is_nessus_file(entry, compressed=compressed):
+                nessus_list.append(os.path.split(entry))
+        elif os.path.isdir(entry):
+            for (dirpath, dirnames, filenames) in os.walk(entry):
+                for fn in filenames:
+                    if is_nessus_file(fn, compressed=compressed):
+                        nessus_list.append((dirpath, fn))
+
+    return nessus_list
+
+
+@contextmanager
+def open_nessus_file(nessus_file_path):
+    """
+    Open a Nessus file for parsing. Compressed files are decompressed as they
+    are read and plain files are memory-mapped instead of read into buffers.
+    A compressed file that turns out to be truncated or corrupt while it is
+    read raises NessusParseException.
+    :param nessus_file_path: Path to a .nessus, .nessus.gz, .nessus.xz or .nessus.zst file
+    :return: Readable binary file-like object
+    """
+    if nessus_file_path.endswith(".gz"):
+        with gzip.open(nessus_file_path, "rb") as f:
+            with decompression_errors(nessus_file_path, DECOMPRESSION_ERRORS):
+                yield f
+    elif nessus_file_path.endswith(".xz"):
+        with lzma.open(nessus_file_path, "rb") as f:
+            with decompression_errors(nessus_file_path, DECOMPRESSION_ERRORS):
+                yield f
+    elif nessus_file_path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "Reading {} needs the zstandard library".format(nessus_file_path)
+            ) from None
+        with open(nessus_file_path, "rb") as raw:
+            with zstandard.ZstdDecompressor().stream_reader(raw) as f:
+                with decompression_errors(nessus_file_path, zstandard.ZstdError):
+                    yield f
+    else:
+        with open(nessus_file_path, "rb") as raw:
+            # Empty files can't be mapped
+            if os.fstat(raw.fileno()).st_size == 0:
+                yield raw
+                return
+            with mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as f:
+                if hasattr(f, "madvise"):
+                    f.madvise(mmap.MADV_SEQUENTIAL)
+                yield f
+
+
+@contextmanager
+def decompression_errors(nessus_file_path, errors):
+    """
+    Turn errors from a decompressor into NessusParseException
+    :param errors: Exception class or tuple of them to convert
+    """
+    try:
+        yield
+    except errors as e:
+        raise NessusParseException(
+            "{} is truncated or corrupt: {}".format(nessus_file_path, e)
+        ) from e
+
+
+def iter_report_hosts(nessus_file_path, plugin_output=False):
+    """
+    Stream the ReportHost elements of a Nessus file one at a time.
+
+    Elements are cleared as soon as they have been read so memory stays flat
+    regardless of how large the file is.
+    :param nessus_file_path: Path to a plain or compressed .nessus file
+    :param plugin_output: Include the text of each plugin_output element
+    :return: Generator of ReportHost tuples
+    """
+    with open_nessus_file(nessus_file_path) as nessus_file:
+        yield from _iter_report_hosts(nessus_file, plugin_output)
+
+
+def _iter_report_hosts(nessus_file, plugin_output):
+    hostname = None
+    properties = dict()
+    items = list()
+
+    context = etree.iterparse(
+        nessus_file,
+        events=("start", "end"),
+        tag=("ReportHost", "ReportItem", "tag"),
+        huge_tree=True,
+    )
+
+    for event, elem in context:
+        if event == "start":
+            if elem.tag == "ReportHost":
+                hostname = elem.get("name")
+                properties = dict()
+                items = list()
+            continue
+
+        if elem.tag == "tag":
+            # HostProperties/tag elements describe the current host
+            if hostname is not None:
+                properties[elem.get("name")] = elem.text
+            continue
+
+        if elem.tag == "ReportItem":
+            if plugin_output:
+                output = elem.findtext("plugin_output")
+            else:
+                output = None
+
+            items.append(
+                ReportItem(
+                    host=hostname,
+                    port=elem.get("port"),
+                    protocol=elem.get("protocol"),
+                    svc_name=elem.get("svc_name"),
+                    pluginID=elem.get("pluginID"),
+                    severity=elem.get("severity"),
+                    pluginName=elem.get("pluginName"),
+                    plugin_output=output,
+                )
+            )
+            elem.clear()
+            continue
+
+        # End of a ReportHost
+        yield ReportHost(name=hostname, properties=properties, items=items)
+        hostname = None
+
+        # Drop the host and any siblings already processed
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+    del context
+
+
+def iter_report_items(nessus_file_path, plugin_output=False):
+    """
+    Stream every ReportItem in a Nessus file
+    :param nessus_file_path: Path to a .nessus file
+    :param plugin_output: Include the text of each plugin_output element
+    :return: Generator of ReportItem tuples
+    """
+    for host in iter_report_hosts(nessus_file_path, plugin_output=plugin_output):
+        for item in host.items:
+            yield item
+
+
+class NessusCache(object):
+    """
+    On-disk SQLite store of the normalized findings from parsed Nessus files.
+
+    Files are keyed by path, size, modification time and SHA-256 so only new
+    or changed files are parsed again. plugin_output is not stored.
+    """
+
+    DEFAULT_PATH = "~/.lazy/nessus_cache.sqlite"
+
+    # Number of hosts written per transaction while storing a file
+    batch_size = 500
+
+    def __init__(self, cache_path=DEFAULT_PATH):
+        self.cache_path = os.path.expanduser(cache_path)
+        cache_dir = os.path.dirname(self.cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # Worker processes each hold their own connection to the same file
+        self.conn = sqlite3.connect(self.cache_path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    complete INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS files_path ON files (path);
+                CREATE TABLE IF NOT EXISTS hosts (
+                    id INTEGER PRIMARY KEY,
+                    file_id INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+                    name TEXT,
+                    properties TEXT
+                );
+                CREATE INDEX IF NOT EXISTS hosts_file_id ON hosts (file_id);
+                CREATE TABLE IF NOT EXISTS items (
+                    host_id INTEGER NOT NULL REFERENCES hosts (id) ON DELETE CASCADE,
+                    port TEXT,
+                    protocol TEXT,
+                    svc_name TEXT,
+                    pluginID TEXT,
+                    severity TEXT,
+                    pluginName TEXT
+                );
+                CREATE INDEX IF NOT EXISTS items_host_id ON items (host_id);
+                """)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    @staticmethod
+    def sha256(nessus_file_path, chunk_size=1024 * 1024):
+        """
+        Hash a file without reading it all into memory
+        :param nessus_file_path: Path to the file
+        :return: Hex digest of the file's SHA-256
+        :rtype: str
+        """
+        digest = hashlib.sha256()
+        with open(nessus_file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def lookup(self, nessus_file_path):
+        """
+        Find a complete cache entry that still matches the file on disk
+        :param nessus_file_path: Path to a .nessus file
+        :return: The entry's file ID or None if the file must be parsed
+        """
+        stat = os.stat(nessus_file_path)
+        row = self.conn.execute(
+            "SELECT id, size, mtime, sha256 FROM files WHERE path = ? AND complete = 1",
+            (nessus_file_path,),
+        ).fetchone()
+
+        if row is None or row[1] != stat.st_size:
+            return None
+
+        if row[2] == stat.st_mtime:
+            return row[0]
+
+        # Touched but possibly unchanged, let the content hash decide
+        if row[3] == self.sha256(nessus_file_path):
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE files SET mtime = ? WHERE id = ?", (stat.st_mtime, row[0])
+                )
+            return row[0]
+
+        return None
+
+    def iter_report_hosts(self, nessus_file_path):
+        """
+        Stream the hosts of a Nessus file from the cache, parsing and storing
+        the file first if it is new or has changed
+        :param nessus_file_path: Path to a .nessus file
+        :return: Generator of ReportHost tuples
+        """
+        file_id = self.lookup(nessus_file_path)
+        if file_id is None:
+            return self._parse_and_store(nessus_file_path)
+        return self._iter_cached(file_id)
+
+    def _iter_cached(self, file_id):
+        host_id = None
+        host = None
+
+        cursor = self.conn.execute(
+            """
+            SELECT h.id, h.name, h.properties, i.port, i.protocol, i.svc_name,
+                   i.pluginID, i.severity, i.pluginName
+            FROM hosts h LEFT JOIN items i ON i.host_id = h.id
+            WHERE h.file_id = ?
+            ORDER BY h.id, i.rowid
+            """,
+            (file_id,),
+        )
+        for row in cursor:
+            if row[0] != host_id:
+                if host is not None:
+                    yield host
+                host_id = row[0]
+                host = ReportHost(
+                    name=row[1], properties=json.loads(row[2]), items=list()
+                )
+
+            # Hosts without findings come back with a row of NULLs
+            if row[6] is not None:
+                host.items.append(ReportItem(host.name, *row[3:], plugin_output=None))
+
+        if host is not None:
+            yield host
+
+    def _parse_and_store(self, nessus_file_path):
+        stat = os.stat(nessus_file_path)
+        sha256 = self.sha256(nessus_file_path)
+
+        with self.conn:
+            self.conn.execute("DELETE FROM files WHERE path = ?", (nessus_file_path,))
+            file_id = self.conn.execute(
+                "INSERT INTO files (path, size, mtime, sha256) VALUES (?, ?, ?, ?)",
+                (nessus_file_path, stat.st_size, stat.st_mtime, sha256),
+            ).lastrowid
+
+        try:
+            batch = list()
+            for host in iter_report_hosts(nessus_file_path):
+                batch.append(host)
+                if len(batch) >= self.batch_size:
+                    self._store_hosts(file_id, batch)
+                    batch = list()
+                yield host
+            self._store_hosts(file_id, batch)
+
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE files SET complete = 1 WHERE id = ?", (file_id,)
+                )
+        except BaseException:
+            # Don't leave a partial entry behind for an unreadable or abandoned file
+            with self.conn:
+                self.conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            raise
+
+    def _store_hosts(self, file_id, hosts):
+        with self.conn:
+            for host in hosts:
+                host_id = self.conn.execute(
+                    "INSERT INTO hosts (file_id, name, properties) VALUES (?, ?, ?)",
+                    (file_id, host.name, json.dumps(host.properties)),
+                ).lastrowid
+                self.conn.executemany(
+                    "INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(host_id,) + tuple(item[1:7]) for item in host.items],
+                )
+
+
+class NessusAggregator(object):
+    """
+    Base class for a report built up from the hosts in one or more Nessus
+    files. Each aggregator sees every ReportHost once and renders its report
+    as a list of lines when asked.
+    """
+
+    name = ""
+
+    def empty(self):
+        """Return a new, empty aggregator configured like this one"""
+        return self.__class__()
+
+    def add_host(self, host):
+        """Fold a single ReportHost into the aggregate"""
+        raise NotImplementedError
+
+    def merge(self, other):
+        """
+        Fold a partial aggregate built from later files into this one. Merging
+        partials in file order must give the same report as the serial walk.
+        """
+        raise NotImplementedError
+
+    def report(self):
+        """
+        Render the aggregate
+        :return: List of output lines
+        :rtype: list
+        """
+        raise NotImplementedError
+
+
+class OrderedSetAggregator(NessusAggregator):
+    """
+    Base class for aggregators that collect unique strings in the order they
+    were first seen. Backed by a dict so each record costs amortized O(1).
+    """
+
+    def __init__(self, intern=True):
+        self.intern = intern
+        self.seen = dict()
+
+    def empty(self):
+        return self.__class__(intern=self.intern)
+
+    def add(self, value):
+        """Add a value if it hasn't been seen before"""
+        if value not in self.seen:
+            if self.intern:
+                value = sys.intern(value)
+            self.seen[value] = None
+
+    def merge(self, other):
+        for value in other.seen:
+            self.add(value)
+
+    def report(self):
+        return list(self.seen)
+
+
+class SSLippyCupAggregator(OrderedSetAggregator):
+    """
+    Collect every host:port pair that reported one of the given plugin IDs
+    """
+
+    name = "sslippycup"
+
+    def __init__(self, plugin_id=("10863",), intern=True):
+        super(SSLippyCupAggregator, self).__init__(intern=intern)
+        self.plugin_id = frozenset(plugin_id)
+
+    def empty(self):
+        return self.__class__(self.plugin_id, intern=self.intern)
+
+    def add_host(self, host):
+        for i in host.items:
+            if i.pluginID in self.plugin_id:
+                self.add("{}:{}".format(i.host, i.port))
+
+
+class LiveHostAggregator(OrderedSetAggregator):
+    """
+    Collect the name of every host that appears in a report
+    """
+
+    name = "live-host-count"
+
+    def add_host(self, host):
+        self.add(host.name)
+
+
+class EventCountAggregator(NessusAggregator):
+    """
+    Count the number of times each plugin fires across all hosts
+    """
+
+    name = "event-count"
+
+    sev_list = {
+        "0": "Informational",
+        "1": "Low",
+        "2": "Medium",
+        "3": "High",
+        "4": "High",
+    }
+
+    delimeter = ","
+
+    def __init__(self):
+        # Output format:
+        ## {<plugin_id_number>: {'Severity': <severity>, 'Vulnerability Name': <pluginName>, 'Count': <count>}}
+        self.outdict = dict()
+
+    def add_host(self, host):
+        for i in host.items:
+            if i.pluginID in self.outdict:
+                tempCount = self.outdict[i.pluginID]["Count"]
+                tempCount += 1
+                self.outdict[i.pluginID] = {
+                    "Severity": i.severity,
+                    "Vulnerability Name": i.pluginName,
+                    "Count": tempCount,
+                }
+
+            else:
+                # First time we've seen this plugin, count = 0
+                self.outdict[i.pluginID] = {
+                    "Severity": i.severity,
+                    "Vulnerability Name": i.pluginName,
+                    "Count": 0,
+                }
+
+    def merge(self, other):
+        for plugin, entry in other.outdict.items():
+            if plugin in self.outdict:
+                # Each side counts its first sighting as 0
+                entry = dict(entry)
+                entry["Count"] += self.outdict[plugin]["Count"] + 1
+            self.outdict[plugin] = entry
+
+    def report(self):
+        lines = [
+            "Severity"
+            + self.delimeter
+            + "Vulnerability Name"
+            + self.delimeter
+            + "Total Occurrences Found"
+        ]
+
+        for plugin in self.outdict:
+            lines.append(
+                self.sev_list[self.outdict[plugin]["Severity"]]
+                + self.delimeter
+                + self.outdict[plugin]["Vulnerability Name"]
+                + self.delimeter
+                + str(self.outdict[plugin]["Count"])
+            )
+
+        return lines
+
+
+# Aggregators selectable by name from the command line
+AGGREGATORS = {
+    SSLippyCupAggregator.name: SSLippyCupAggregator,
+    LiveHostAggregator.name: LiveHostAggregator,
+    EventCountAggregator.name: EventCountAggregator,
+}
+
+
+def iter_file_hosts(nessus_file_path, cache_path=None):
+    """
+    Stream the hosts of a Nessus file, from the cache if one is given
+    :param nessus_file_path: Path to a .nessus file
+    :param cache_path: Answer from this NessusCache file when possible
+    :return: Generator of ReportHost tuples
+    """
+    if cache_path:
+        with NessusCache(cache_path) as cache:
+            yield from cache.iter_report_hosts(nessus_file_path)
+    else:
+        yield from iter_report_hosts(nessus_file_path)
+
+
+def aggregate_file(nessus_file_path, aggregators, cache_path=None):
+    """
+    Feed every host in a single Nessus file to the given aggregators
+    :param nessus_file_path: Path to a .nessus file
+    :param aggregators: List of NessusAggregator instances
+    :param cache_path: Answer from this NessusCache file when possible
+    :return: The aggregators that were passed in
+    :rtype: list
+    """
+    for host in iter_file_hosts(nessus_file_path, cache_path=cache_path):
+        for aggregator in aggregators:
+            aggregator.add_host(host)
+
+    return aggregators
+
+
+def aggregate_files(nessus_list, aggregators, workers=1, cache_path=None):
+    """
+    Walk each Nessus file exactly once, feeding every host to every aggregator.
+
+    With more than one worker each file is parsed in its own process into
+    partial aggregates, which are merged back in file order.
+    :param nessus_list: List of (dirpath, filename) tuples
+    :param aggregators: List of NessusAggregator instances
+    :param workers: Number of processes to parse files with
+    :param cache_path: Answer from this NessusCache file when possible
+    :return: The aggregators that were passed in
+    :rtype: list
+    """
+    file_paths = list()
+    for file in nessus_list:
+        nessus_file_path = os.path.join(file[0], file[1])
+        if os.path.isfile(nessus_file_path):
+            file_paths.append(nessus_file_path)
+
+    if workers <= 1 or len(file_paths) <= 1:
+        for nessus_file_path in file_paths:
+            aggregate_file(nessus_file_path, aggregators, cache_path=cache_path)
+        return aggregators
+
+    # Blank copies are sent to the workers so they never see merged state
+    blank_aggregators = [aggregator.empty() for aggregator in aggregators]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        partials = executor.map(
+            aggregate_file,
+            file_paths,
+            itertools.repeat(blank_aggregators),
+            itertools.repeat(cache_path),
+        )
+        for partial in partials:
+            for aggregator, partial_aggregator in zip(aggregators, partial):
+                aggregator.merge(partial_aggregator)
+
+    return aggregators
+
+
+class NessusParseException(Exception):
+    """A Nessus file couldn't be read"""
@@ -0,0 +1,107 @@
+# Standard Library
+import os
+import sqlite3
+import time
+
+# LazyLib Tools
+from lazyLib import nessusParseLib
+
+__version__ = "1.0"
+
+
+class UploadRegistry(object):
+    """
+    Local record of the Nessus files that were successfully imported, keyed
+    by scanner, destination folder and SHA-256 of the file's content. Lets
+    'nessus upload' skip files a folder already has, even if they were
+    renamed or moved since.
+    """
+
+    DEFAULT_PATH = "~/.lazy/nessus_uploads.sqlite"
+
+    def __init__(self, registry_path=DEFAULT_PATH):
+        self.registry_path = os.path.expanduser(registry_path)
+        registry_dir = os.path.dirname(self.registry_path)
+        if registry_dir:
+            os.makedirs(registry_dir, exist_ok=True)
+
+        self.conn = sqlite3.connect(self.registry_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS uploads (
+                    scanner TEXT NOT NULL,
+                    folder_id INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    scan_id INTEGER,
+                    imported REAL NOT NULL,
+                    PRIMARY KEY (scanner, folder_id, sha256)
+                );
+                """)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def lookup(self, scanner, folder_id, sha256):
+        """
+        Find an earlier import of the same content into the same folder
+        :param scanner: URL of the Nessus server
+        :param folder_id: Destination folder ID
+        :param sha256: Hex SHA-256 of the file
+        :return: (path, scan_id, imported) or None
+        :rtype: tuple
+        """
+        return self.conn.execute(
+            """
+            SELECT path, scan_id, imported FROM uploads
+            WHERE scanner = ? AND folder_id = ? AND sha256 = ?
+            """,
+            (scanner, folder_id, sha256),
+        ).fetchone()
+
+    def record(self, scanner, folder_id, sha256, path, scan_id=None):
+        """Remember a successful import"""
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO uploads
+                    (scanner, folder_id, sha256, path, scan_id, imported)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (scanner, folder_id, sha256, path, scan_id, time.time()),
+            )
+
+    def partition(self, scanner, folder_id, file_paths):
+        """
+        Split files into the ones still to upload and the ones already
+        imported. Files with the same content as an earlier file in the list
+        are skipped too.
+        :param scanner: URL of the Nessus server
+        :param folder_id: Destination folder ID
+        :param file_paths: List of paths to .nessus files
+        :return: List of (path, sha256) to upload and list of (path, sha256, earlier path) skipped
+        :rtype: tuple
+        """
+        pending = list()
+        skipped = list()
+        seen = dict()
+
+        for file_path in file_paths:
+            sha256 = nessusParseLib.NessusCache.sha256(file_path)
+            earlier = self.lookup(scanner, folder_id, sha256)
+            if earlier is not None:
+                skipped.append((file_path, sha256, earlier[0]))
+            elif sha256 in seen:
+                skipped.append((file_path, sha256, seen[sha256]))
+            else:
+                seen[sha256] = file_path
+                pending.append((file_path, sha256))
+
+        return pending, skipped
@@ -0,0 +1,199 @@
+# Standard Library
+import json
+import os
+import sqlite3
+import time
+
+__version__ = "1.0"
+
+
+class ScanListCache(object):
+    """
+    Local copy of the scan and folder listing of each Nessus server.
+
+    A listing younger than ttl is used as is. An older one is brought up to
+    date by asking the server only for scans modified since the last refresh
+    (the last_modification_date filter of GET /scans). Scans deleted on the
+    server don't show up in those, so the whole listing is fetched again
+    once it is older than full_ttl or when asked to.
+    """
+
+    DEFAULT_PATH = "~/.lazy/nessus_scans.sqlite"
+
+    def __init__(self, cache_path=DEFAULT_PATH, ttl=300, full_ttl=86400):
+        self.cache_path = os.path.expanduser(cache_path)
+        cache_dir = os.path.dirname(self.cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.ttl = ttl
+        self.full_ttl = full_ttl
+
+        self.conn = sqlite3.connect(self.cache_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS servers (
+                    scanner TEXT PRIMARY KEY,
+                    refreshed REAL NOT NULL,
+                    full_refreshed REAL NOT NULL,
+                    server_timestamp INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS folders (
+                    scanner TEXT NOT NULL,
+                    id INTEGER NOT NULL,
+                    name TEXT,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (scanner, id)
+                );
+                CREATE TABLE IF NOT EXISTS scans (
+                    scanner TEXT NOT NULL,
+                    id INTEGER NOT NULL,
+                    name TEXT,
+                    folder_id INTEGER,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (scanner, id)
+                );
+                CREATE INDEX IF NOT EXISTS scans_name ON scans (scanner, name);
+                """)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def age(self, scanner):
+        """
+        :return: Seconds since the last refresh and since the last full one, or None
+        :rtype: tuple
+        """
+        row = self.conn.execute(
+            "SELECT refreshed, full_refreshed FROM servers WHERE scanner = ?",
+            (scanner,),
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        return now - row[0], now - row[1]
+
+    def listing(self, scanner, list_scans, refresh=False):
+        """
+        Get a server's scans and folders, refreshing the cache if needed
+        :param scanner: URL of the Nessus server
+        :param list_scans: Callable taking last_modification_date (or None)
+                           and returning the server's GET /scans response
+        :param refresh: Fetch the whole listing whatever its age
+        :return: Dict with 'folders' and 'scans' lists like GET /scans
+        :rtype: dict
+        """
+        age = self.age(scanner)
+        if refresh or age is None or age[1] >= self.full_ttl:
+            self.store(scanner, list_scans(None), full=True)
+        elif age[0] >= self.ttl:
+            since = self.conn.execute(
+                "SELECT server_timestamp FROM servers WHERE scanner = ?", (scanner,)
+            ).fetchone()[0]
+            self.store(scanner, list_scans(since), full=since is None)
+
+        return self.cached(scanner)
+
+    def store(self, scanner, response, full=False):
+        """
+        Save a GET /scans response
+        :param full: The response lists every scan, drop the ones it doesn't have
+        """
+        now = time.time()
+        with self.conn:
+            if full:
+                self.conn.execute("DELETE FROM scans WHERE scanner = ?", (scanner,))
+            # Folders are always listed in full
+            self.conn.execute("DELETE FROM folders WHERE scanner = ?", (scanner,))
+            self.conn.executemany(
+                "INSERT INTO folders (scanner, id, name, data) VALUES (?, ?, ?, ?)",
+                [
+                    (scanner, folder["id"], folder.get("name"), json.dumps(folder))
+                    for folder in response.get("folders") or []
+                ],
+            )
+            self.conn.executemany(
+                """
+                INSERT OR REPLACE INTO scans (scanner, id, name, folder_id, data)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        scanner,
+                        scan["id"],
+                        scan.get("name"),
+                        scan.get("folder_id"),
+                        json.dumps(scan),
+                    )
+                    for scan in response.get("scans") or []
+                ],
+            )
+
+            if full:
+                self.conn.execute(
+                    """
+                    INSERT OR REPLACE INTO servers
+                        (scanner, refreshed, full_refreshed, server_timestamp)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (scanner, now, now, response.get("timestamp")),
+                )
+            else:
+                self.conn.execute(
+                    """
+                    UPDATE servers SET refreshed = ?,
+                        server_timestamp = COALESCE(?, server_timestamp)
+                    WHERE scanner = ?
+                    """,
+                    (now, response.get("timestamp"), scanner),
+                )
+
+    def cached(self, scanner):
+        """
+        :return: The cached listing, shaped like a GET /scans response
+        :rtype: dict
+        """
+        return {
+            "folders": [
+                json.loads(row[0])
+                for row in self.conn.execute(
+                    "SELECT data FROM folders WHERE scanner = ? ORDER BY id",
+                    (scanner,),
+                )
+            ],
+            "scans": [
+                json.loads(row[0])
+                for row in self.conn.execute(
+                    "SELECT data FROM scans WHERE scanner = ? ORDER BY id",
+                    (scanner,),
+                )
+            ],
+        }
+
+    def find(self, scanner, name):
+        """
+        Look up scans and folders by name
+        :return: List of matching scans and list of matching folders
+        :rtype: tuple
+        """
+        scans = [
+            json.loads(row[0])
+            for row in self.conn.execute(
+                "SELECT data FROM scans WHERE scanner = ? AND name = ?",
+                (scanner, name),
+            )
+        ]
+        folders = [
+            json.loads(row[0])
+            for row in self.conn.execute(
+                "SELECT data FROM folders WHERE scanner = ? AND name = ?",
+                (scanner, name),
+            )
+        ]
+        return scans, folders
@@ -9,7 +9,7 @@ setup(
     author="Scott Fraser",
     author_email="quincy.fraser@gmail.com",
     url="https://github.com/radioboyQ/lazy",
-    packages=["commands", "lazyLib"],
+    packages=["commands", "lazyLib", "asyncGoPhishClient", "asyncGoPhishClient.api"],
     py_modules=["lazy"],
     entry_points="""
         [console_scripts]
@@ -35,4 +35,5 @@ setup(
         "dataset",
         "loguru",
     ],
+    extras_require={"export": ["pyarrow", "numpy"], "zstd": ["zstandard"]},
 )
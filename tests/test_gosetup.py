@@ -0,0 +1,70 @@
+# Standard Library
+import asyncio
+
+# 3rd Party Libs
+from aiohttp import web
+
+# Lazy Lib
+from asyncGoPhishClient import Gophish
+from asyncGoPhishClient.models import Error, Group, User
+from commands.gosetup import post_groups
+
+
+async def create_group(request):
+    group = await request.json()
+    if group["name"].endswith("_2"):
+        # A proxy's login page instead of the API's reply
+        return web.Response(text="<html>Please log in</html>", content_type="text/html")
+    if group["name"].endswith("_3"):
+        return web.Response(status=502, text="<html>Bad Gateway</html>")
+    if group["name"].endswith("_4"):
+        # JSON, but not a group
+        return web.json_response(None)
+    return web.json_response(dict(group, id=int(group["name"].rsplit("_", 1)[1])))
+
+
+def post(groups, concurrency=2):
+    async def run():
+        app = web.Application()
+        app.router.add_post("/api/groups/", create_group)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        finished = list()
+        try:
+            async with Gophish(
+                "test", host="http://127.0.0.1:{}".format(runner.addresses[0][1])
+            ) as api:
+                added, failed = await post_groups(
+                    api,
+                    iter(groups),
+                    concurrency=concurrency,
+                    callback=lambda group, result: finished.append(group.name),
+                )
+        finally:
+            await runner.cleanup()
+        return added, failed, finished
+
+    return asyncio.run(run())
+
+
+def test_post_groups_records_replies_it_cant_use():
+    groups = [
+        Group(
+            name="Group_{}".format(count),
+            targets=[User(email="user{}@example.com".format(count))],
+        )
+        for count in range(1, 7)
+    ]
+
+    added, failed, finished = post(groups)
+
+    assert added == 3
+    assert sorted(finished) == sorted(group.name for group in groups)
+    failed = dict(failed)
+    assert sorted(failed) == ["Group_2", "Group_3", "Group_4"]
+    assert isinstance(failed["Group_2"], Error)
+    assert "Please log in" in failed["Group_2"].message
+    assert isinstance(failed["Group_3"], Error)
+    assert isinstance(failed["Group_4"], Exception)
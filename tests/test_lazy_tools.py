@@ -0,0 +1,64 @@
+# 3rd Party Libs
+import click
+from click.testing import CliRunner
+
+# Lazy Lib
+from lazyLib import lazyTools
+
+CONFIG = """
+[nessus]
+    [nessus.complete]
+    Hostname = 'scanner.example.com'
+    Port = 8834
+    access_key = 'access'
+    secret_key = 'secret'
+    VPN_Required = false
+
+    [nessus.password_only]
+    Hostname = 'old.example.com'
+    Port = 8834
+    VPN_Required = false
+"""
+
+
+@click.group()
+@click.option("--config-path")
+def cli(config_path):
+    pass
+
+
+@cli.group()
+def nessus():
+    pass
+
+
+@nessus.command()
+@click.option("-n", "--name", "names", multiple=True)
+@click.pass_context
+def servers(ctx, names):
+    for server in lazyTools.nessusServerConfigs(ctx, names):
+        click.echo("{} {}".format(server["name"], server["target"]))
+
+
+def run(tmp_path, *args):
+    config_path = tmp_path / "lazy.conf"
+    config_path.write_text(CONFIG)
+    return CliRunner().invoke(
+        cli, ["--config-path", str(config_path), "nessus", "servers"] + list(args)
+    )
+
+
+def test_sections_without_api_keys_are_skipped(tmp_path):
+    result = run(tmp_path)
+
+    assert result.exit_code == 0
+    assert "complete https://scanner.example.com:8834" in result.output
+    assert "password_only https" not in result.output
+    assert "password_only has no access_key, secret_key" in result.output
+
+
+def test_a_section_without_api_keys_asked_for_by_name_is_an_error(tmp_path):
+    result = run(tmp_path, "-n", "password_only")
+
+    assert result.exit_code == 2
+    assert "password_only has no access_key, secret_key" in result.output
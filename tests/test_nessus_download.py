@@ -0,0 +1,193 @@
+# Standard Library
+import asyncio
+import json
+import os
+import time
+
+# 3rd Party Libs
+from aiohttp import web
+import pytest
+
+# Lazy Lib
+from benchmarks.nessus_server import BLOCK, NessusStandIn
+from benchmarks.transfer import start_server
+from lazyLib.nessusAsyncLib import nessus6AsyncLib
+from lazyLib.nessusLib import NessusException, nessus6Lib
+
+
+def run_client(server, work):
+    """Start server, then call work with a client and the server's URL"""
+
+    async def run():
+        runner, port = await server.start()
+        url = "http://127.0.0.1:{}".format(port)
+        try:
+            async with nessus6AsyncLib(
+                url, api_akey="test", api_skey="test", concurrency=4
+            ) as nessusAPI:
+                return await work(nessusAPI, url)
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def download_scans(server, output_path, scan_ids):
+    scans = [server.scans[scan_id] for scan_id in scan_ids]
+    return run_client(
+        server,
+        lambda nessusAPI, url: nessusAPI.download_scans(scans, str(output_path)),
+    )
+
+
+def download_export(server, output_file, leave_part):
+    """
+    Download export 1 of scan 1 after leave_part(url) has put a .part file
+    in place
+    """
+    server.exports[1] = 0
+
+    async def work(nessusAPI, url):
+        leave_part(url + "/scans/1/export/1/download")
+        return await nessusAPI.download_export(1, 1, str(output_file))
+
+    return run_client(server, work)
+
+
+def payload(size):
+    return (BLOCK * (size // len(BLOCK) + 1))[:size]
+
+
+def write_part(output_file, data, meta=None):
+    with open(str(output_file) + ".part", "wb") as f:
+        f.write(data)
+    if meta is not None:
+        with open(str(output_file) + ".part.json", "w") as f:
+            json.dump(meta, f)
+
+
+def test_download_scans_with_the_same_name(tmp_path):
+    server = NessusStandIn(export_delay=0, payload_size=3 * 2**20, scans=3)
+    server.scans[2]["name"] = server.scans[1]["name"]
+
+    results = download_scans(server, tmp_path, [1, 2, 3])
+
+    paths = [result for _, result in results]
+    assert not [path for path in paths if isinstance(path, Exception)]
+    assert paths == [
+        str(tmp_path / "Benchmark scan 1_1.nessus"),
+        str(tmp_path / "Benchmark scan 1_2.nessus"),
+        str(tmp_path / "Benchmark scan 3.nessus"),
+    ]
+    for path in paths:
+        assert os.path.getsize(path) == server.payload_size
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+
+
+def test_download_resumes_a_part_of_the_same_export(tmp_path):
+    server = NessusStandIn(payload_size=3 * 2**20)
+    output_file = tmp_path / "scan.nessus"
+
+    download_export(
+        server,
+        output_file,
+        lambda url: write_part(
+            output_file,
+            payload(2**20),
+            {"source": url, "total": server.payload_size, "validator": None},
+        ),
+    )
+
+    assert output_file.read_bytes() == payload(server.payload_size)
+    assert server.counters["bytes_out"] == server.payload_size - 2**20
+    assert sorted(os.listdir(tmp_path)) == ["scan.nessus"]
+
+
+def test_download_ignores_a_stale_part(tmp_path):
+    server = NessusStandIn(payload_size=3 * 2**20)
+    output_file = tmp_path / "scan.nessus"
+    stale = b"<stale export of another scan>" * 1000
+
+    def leave_part(url):
+        write_part(
+            output_file,
+            stale,
+            {
+                "source": url.replace("/scans/1/", "/scans/2/"),
+                "total": server.payload_size,
+                "validator": None,
+            },
+        )
+
+    download_export(server, output_file, leave_part)
+
+    assert output_file.read_bytes() == payload(server.payload_size)
+    assert server.counters["bytes_out"] == server.payload_size
+    assert sorted(os.listdir(tmp_path)) == ["scan.nessus"]
+
+
+def test_download_ignores_a_part_without_a_record(tmp_path):
+    server = NessusStandIn(payload_size=2**20)
+    output_file = tmp_path / "scan.nessus"
+
+    download_export(server, output_file, lambda url: write_part(output_file, b"x" * 10))
+
+    assert output_file.read_bytes() == payload(server.payload_size)
+
+
+def test_download_restarts_when_the_export_changed_length(tmp_path):
+    server = NessusStandIn(payload_size=2**20)
+    output_file = tmp_path / "scan.nessus"
+
+    download_export(
+        server,
+        output_file,
+        lambda url: write_part(
+            output_file,
+            b"x" * 1000,
+            {"source": url, "total": 5 * 2**20, "validator": None},
+        ),
+    )
+
+    assert output_file.read_bytes() == payload(server.payload_size)
+
+
+class FailingExports(NessusStandIn):
+    """Stand-in whose exports fail or get replies without a status"""
+
+    def __init__(self, reply, **kwargs):
+        super(FailingExports, self).__init__(**kwargs)
+        self.reply = reply
+
+    async def status(self, request):
+        return web.json_response(self.reply)
+
+
+@pytest.mark.parametrize("reply", [{"status": "error"}, {"error": "Busy"}])
+def test_wait_for_export_stops_on_a_failed_export(reply):
+    server = FailingExports(reply)
+
+    async def work(nessusAPI, url):
+        file_id = await nessusAPI.export_scan(1)
+        await nessusAPI.wait_for_export(1, file_id)
+
+    with pytest.raises(NessusException) as e:
+        run_client(server, work)
+    assert "failed" in str(e.value)
+
+
+def test_wait_for_export_gives_up_after_export_timeout():
+    proc, url = start_server(export_delay=60)
+    try:
+        nessusAPI = nessus6Lib(
+            url, api_akey="test", api_skey="test", poll_ceiling=1, export_timeout=2
+        )
+        file_id = nessusAPI.export_scan(1)
+        start = time.perf_counter()
+        with pytest.raises(NessusException) as e:
+            nessusAPI.wait_for_export(1, file_id)
+        assert "wasn't ready after 2 seconds" in str(e.value)
+        assert time.perf_counter() - start < 5
+    finally:
+        proc.terminate()
+        proc.join()
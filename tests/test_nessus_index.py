@@ -0,0 +1,47 @@
+# Standard Library
+import os
+
+# 3rd Party Libs
+import pytest
+from click.testing import CliRunner
+
+# Lazy Lib
+from benchmarks import generator
+from lazyLib import nessusIndexLib
+import lazy
+
+CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "lazy.example.conf"
+)
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    nessus_path = str(tmp_path / "scan.nessus")
+    generator.generate(nessus_path, hosts=20, items_per_host=5)
+    index_path = str(tmp_path / "index.sqlite")
+    with nessusIndexLib.NessusIndex(index_path) as search_index:
+        search_index.update([nessus_path])
+    return index_path
+
+
+def test_search_by_host(index_path):
+    with nessusIndexLib.NessusIndex(index_path) as search_index:
+        results = list(search_index.search('host:"10.0.0.1"', limit=0))
+
+    assert len(results) == 5
+    assert {result.host for result in results} == {"10.0.0.1"}
+
+
+def test_search_reports_an_invalid_query(index_path):
+    result = CliRunner().invoke(
+        lazy.cli,
+        ["--config-path", CONFIG_PATH, "nessus", "search", "-i", index_path]
+        + ["host:10.0.0.1"],
+    )
+
+    assert result.exit_code == 1
+    assert "is not a valid search" in result.output
+    assert "double quotes" in result.output
+    # A click error, not a traceback
+    assert isinstance(result.exception, SystemExit)
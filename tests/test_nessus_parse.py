@@ -0,0 +1,60 @@
+# Standard Library
+import gzip
+import os
+
+# 3rd Party Libs
+import pytest
+from click.testing import CliRunner
+
+# Lazy Lib
+from benchmarks import generator
+from lazyLib import nessusParseLib
+import lazy
+
+CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "lazy.example.conf"
+)
+
+
+@pytest.fixture
+def truncated_gzip(tmp_path):
+    """A .nessus.gz cut off half way through"""
+    nessus_path = str(tmp_path / "scan.nessus")
+    generator.generate(nessus_path, hosts=50)
+    with open(nessus_path, "rb") as f:
+        data = gzip.compress(f.read())
+    os.remove(nessus_path)
+    with open(nessus_path + ".gz", "wb") as f:
+        f.write(data[: len(data) // 2])
+    return nessus_path + ".gz"
+
+
+def run_nessus(*args):
+    return CliRunner().invoke(
+        lazy.cli, ["--config-path", CONFIG_PATH, "nessus"] + list(args)
+    )
+
+
+def test_truncated_gzip_raises_a_parse_exception(truncated_gzip):
+    with pytest.raises(nessusParseLib.NessusParseException) as e:
+        list(nessusParseLib.iter_report_hosts(truncated_gzip))
+    assert truncated_gzip in str(e.value)
+
+
+def test_export_findings_reports_a_truncated_gzip(truncated_gzip, tmp_path):
+    output_path = str(tmp_path / "findings.parquet")
+
+    result = run_nessus(
+        "export-findings", truncated_gzip, "-o", output_path, "-b", "10"
+    )
+
+    assert result.exit_code == 1
+    assert "truncated or corrupt" in result.output
+    assert not os.path.exists(output_path)
+
+
+def test_index_reports_a_truncated_gzip(truncated_gzip, tmp_path):
+    result = run_nessus("index", truncated_gzip, "-i", str(tmp_path / "index.db"))
+
+    assert result.exit_code == 1
+    assert "truncated or corrupt" in result.output